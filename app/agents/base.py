@@ -26,6 +26,9 @@ class ReviewAgent:
     def analyze(self, changes: List[DiffChange], context: str) -> List[AgentFinding]:
         raise NotImplementedError
 
+    def heuristic_analyze(self, changes: List[DiffChange]) -> List[AgentFinding]:
+        return []
+
     def analyze_with_llm(self, diff_text: str, context: str, role: str) -> List[AgentFinding]:
         client = LLMClient()
         prompt = base_prompt(role, diff_text, context)
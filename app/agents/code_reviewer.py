@@ -20,6 +20,9 @@ class CodeReviewerAgent(ReviewAgent):
             )
             if llm_findings:
                 return llm_findings
+        return self.heuristic_analyze(changes)
+
+    def heuristic_analyze(self, changes: List[DiffChange]) -> List[AgentFinding]:
         findings: List[AgentFinding] = []
         for change in changes:
             content = change.content.strip()
@@ -36,6 +36,11 @@ class CriticAgent(ReviewAgent):
                     )
                 if findings:
                     return findings
+        return self.heuristic_analyze(changes)
+
+    def heuristic_analyze(self, changes: List[DiffChange]) -> List[AgentFinding]:
+        if not changes:
+            return []
         return [
             AgentFinding(
                 file_path=changes[0].file_path,
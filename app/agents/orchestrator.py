@@ -1,25 +1,33 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Sequence, Tuple
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Sequence, Tuple
 
 from app.agents.base import AgentFinding, ReviewAgent
+from app.circuit_breaker import BreakerPermit, llm_breaker
 from app.config import settings
-from app.llm import LLMClient, parse_findings, parse_json_block
+from app.llm import parse_findings, parse_json_block
+from app.llm_routing import RouteDecision, router
 from app.prompts import base_prompt, critic_prompt
 from app.agents.code_reviewer import CodeReviewerAgent
-from app.agents.critic import CriticAgent
 from app.agents.security import SecurityAgent
 from app.agents.style import StyleAgent
 from app.models import AgentTrace
 from app.pipeline.diff_parser import DiffChange
 
 
+AgentCallback = Callable[[str, List[AgentFinding], List[AgentTrace], bool], None]
+
+
 @dataclass(frozen=True)
 class OrchestratorResult:
     findings: List[Tuple[str, AgentFinding]]
     traces: List[AgentTrace]
+    llm_stats: Dict[str, Any] = field(default_factory=dict)
+    degraded: bool = False
+    degraded_reason: str = ""
 
 
 class AgentOrchestrator:
@@ -27,68 +35,229 @@ class AgentOrchestrator:
         self.agents: List[ReviewAgent] = list(
             agents
             if agents is not None
-            else [CodeReviewerAgent(), SecurityAgent(), StyleAgent(), CriticAgent()]
+            else [CodeReviewerAgent(), SecurityAgent(), StyleAgent()]
         )
 
-    def run(self, changes: List[DiffChange], context: str) -> OrchestratorResult:
+    def run(
+        self,
+        changes: List[DiffChange],
+        context: str,
+        agents: Sequence[ReviewAgent] | None = None,
+        on_agent: AgentCallback | None = None,
+    ) -> OrchestratorResult:
+        selected = list(agents) if agents is not None else self.agents
         findings: List[Tuple[str, AgentFinding]] = []
         traces: List[AgentTrace] = []
+        llm_stats: Dict[str, Any] = {}
 
+        degraded = False
+        degraded_reason = ""
         if settings.llm_backend != "disabled" and changes:
-            client = LLMClient()
-            diff_text = "\n".join(change.content for change in changes)
-            prompts = []
-            agent_map: List[ReviewAgent] = []
-            for agent in self.agents:
-                if agent.id == "critic":
-                    prompts.append(critic_prompt(diff_text, context))
-                else:
-                    prompts.append(base_prompt(agent.name, diff_text, context))
-                agent_map.append(agent)
+            permit = llm_breaker.allow()
+            if permit:
+                try:
+                    self._run_llm(selected, changes, context, findings, traces, llm_stats, permit, on_agent)
+                    return OrchestratorResult(findings=findings, traces=traces, llm_stats=llm_stats)
+                except Exception as exc:
+                    findings.clear()
+                    traces.clear()
+                    llm_stats.clear()
+                    degraded = True
+                    degraded_reason = f"llm call failed: {exc}"
+            else:
+                degraded = True
+                degraded_reason = f"llm circuit {llm_breaker.state}"
+
+        for agent in selected:
+            start = datetime.utcnow()
+            if degraded:
+                agent_findings = agent.heuristic_analyze(changes)
+            else:
+                agent_findings = agent.analyze(changes, context)
+            end = datetime.utcnow()
+            findings.extend([(agent.id, finding) for finding in agent_findings])
+            trace = AgentTrace(
+                agent_id=agent.id,
+                started_at=start,
+                completed_at=end,
+                input_summary=f"{len(changes)} diff changes",
+                output_summary=(
+                    f"{len(agent_findings)} findings (heuristics only)"
+                    if degraded
+                    else f"{len(agent_findings)} findings"
+                ),
+            )
+            traces.append(trace)
+            if on_agent is not None:
+                on_agent(agent.id, agent_findings, [trace], degraded)
+
+        return OrchestratorResult(
+            findings=findings,
+            traces=traces,
+            llm_stats=llm_stats,
+            degraded=degraded,
+            degraded_reason=degraded_reason,
+        )
+
+    def run_batch(self, items: List[Tuple[List[DiffChange], str]]) -> List[OrchestratorResult]:
+        results: List[OrchestratorResult | None] = [None] * len(items)
+        groups: Dict[str, List[int]] = {}
+        if settings.llm_backend != "disabled":
+            for index, (changes, _context) in enumerate(items):
+                if changes:
+                    groups.setdefault(router.route(changes).tier, []).append(index)
+        permit = llm_breaker.allow() if groups else None
+        if not permit:
+            groups = {}
+        elif permit.probe:
+            # One probe call per half-open window: the other tiers fall back to
+            # run() below, which sees the breaker after the probe resolved.
+            tier = next(iter(groups))
+            groups = {tier: groups[tier]}
+        for indices in groups.values():
+            try:
+                for index, result in zip(indices, self._run_llm_batch([items[index] for index in indices], permit)):
+                    results[index] = result
+            except Exception:
+                continue
+        return [
+            result if result is not None else self.run(changes, context)
+            for result, (changes, context) in zip(results, items)
+        ]
 
+    def _run_llm_batch(
+        self, items: List[Tuple[List[DiffChange], str]], permit: BreakerPermit
+    ) -> List[OrchestratorResult]:
+        decisions = [router.route(changes) for changes, _context in items]
+        client = router.client_for(decisions[0])
+        prompts: List[str] = []
+        for changes, context in items:
+            prompts.extend(self._build_prompts(self.agents, changes, context))
+        generation_start = perf_counter()
+        try:
             outputs = client.batch_generate(prompts)
-            for agent, output in zip(agent_map, outputs):
-                start = datetime.utcnow()
-                payload = parse_json_block(output) or {}
-                parsed = parse_findings(payload)
-                agent_findings = [
-                    AgentFinding(
-                        file_path=item.get("file_path", ""),
-                        line_number=item.get("line_number"),
-                        severity=item.get("severity", "low"),
-                        category=item.get("category", "general"),
-                        description=item.get("description", ""),
-                        suggestion=item.get("suggestion", ""),
-                    )
-                    for item in parsed
-                ]
-                if not agent_findings:
-                    agent_findings = agent.analyze(changes, context)
-                end = datetime.utcnow()
-                findings.extend([(agent.id, finding) for finding in agent_findings])
-                traces.append(
-                    AgentTrace(
-                        agent_id=agent.id,
-                        started_at=start,
-                        completed_at=end,
-                        input_summary=f"{len(changes)} diff changes",
-                        output_summary=f"{len(agent_findings)} findings",
-                    )
+        except Exception:
+            llm_breaker.record(perf_counter() - generation_start, ok=False, permit=permit)
+            raise
+        elapsed = perf_counter() - generation_start
+        llm_breaker.record(elapsed / max(len(prompts), 1), ok=True, permit=permit)
+        router.record_latency(decisions[0].tier, elapsed)
+        results: List[OrchestratorResult] = []
+        per_item = len(self.agents)
+        for position, ((changes, _context), decision) in enumerate(zip(items, decisions)):
+            findings: List[Tuple[str, AgentFinding]] = []
+            traces = [self._router_trace(decision, batch_size=len(items))]
+            item_outputs = outputs[position * per_item : (position + 1) * per_item]
+            self._parse_outputs(self.agents, changes, item_outputs, findings, traces)
+            results.append(
+                OrchestratorResult(
+                    findings=findings,
+                    traces=traces,
+                    llm_stats={"routing": {"tier": decision.tier, "model": decision.model_name}},
                 )
-        else:
-            for agent in self.agents:
-                start = datetime.utcnow()
-                agent_findings = agent.analyze(changes, context)
-                end = datetime.utcnow()
-                findings.extend([(agent.id, finding) for finding in agent_findings])
-                traces.append(
-                    AgentTrace(
-                        agent_id=agent.id,
-                        started_at=start,
-                        completed_at=end,
-                        input_summary=f"{len(changes)} diff changes",
-                        output_summary=f"{len(agent_findings)} findings",
-                    )
+            )
+        return results
+
+    def _router_trace(self, decision: RouteDecision, batch_size: int = 1) -> AgentTrace:
+        output_summary = f"tier={decision.tier} model={decision.model_name} ({decision.reason})"
+        if batch_size > 1:
+            output_summary += f" batch={batch_size}"
+        return AgentTrace(
+            agent_id="router",
+            started_at=datetime.utcnow(),
+            completed_at=datetime.utcnow(),
+            input_summary=(
+                f"{decision.changed_lines} changed lines across {decision.files} files, "
+                f"risk {decision.risk}"
+            ),
+            output_summary=output_summary,
+        )
+
+    def _build_prompts(
+        self, agents: List[ReviewAgent], changes: List[DiffChange], context: str
+    ) -> List[str]:
+        diff_text = "\n".join(change.content for change in changes)
+        return [
+            critic_prompt(diff_text, context)
+            if agent.id == "critic"
+            else base_prompt(agent.name, diff_text, context)
+            for agent in agents
+        ]
+
+    def _parse_outputs(
+        self,
+        agents: List[ReviewAgent],
+        changes: List[DiffChange],
+        outputs: List[str],
+        findings: List[Tuple[str, AgentFinding]],
+        traces: List[AgentTrace],
+        on_agent: AgentCallback | None = None,
+    ) -> None:
+        for agent, output in zip(agents, outputs):
+            start = datetime.utcnow()
+            payload = parse_json_block(output) or {}
+            parsed = parse_findings(payload)
+            agent_findings = [
+                AgentFinding(
+                    file_path=item.get("file_path", ""),
+                    line_number=item.get("line_number"),
+                    severity=item.get("severity", "low"),
+                    category=item.get("category", "general"),
+                    description=item.get("description", ""),
+                    suggestion=item.get("suggestion", ""),
                 )
+                for item in parsed
+            ]
+            if not agent_findings:
+                agent_findings = agent.heuristic_analyze(changes)
+            end = datetime.utcnow()
+            findings.extend([(agent.id, finding) for finding in agent_findings])
+            trace = AgentTrace(
+                agent_id=agent.id,
+                started_at=start,
+                completed_at=end,
+                input_summary=f"{len(changes)} diff changes",
+                output_summary=f"{len(agent_findings)} findings",
+            )
+            traces.append(trace)
+            if on_agent is not None:
+                on_agent(agent.id, agent_findings, [trace], False)
+
+    def _run_llm(
+        self,
+        agents: List[ReviewAgent],
+        changes: List[DiffChange],
+        context: str,
+        findings: List[Tuple[str, AgentFinding]],
+        traces: List[AgentTrace],
+        llm_stats: Dict[str, Any],
+        permit: BreakerPermit,
+        on_agent: AgentCallback | None = None,
+    ) -> None:
+        decision = router.route(changes)
+        client = router.client_for(decision)
+        traces.append(self._router_trace(decision))
+        prompts = self._build_prompts(agents, changes, context)
 
-        return OrchestratorResult(findings=findings, traces=traces)
+        speculative = {"generations": 0, "draft_tokens": 0, "accepted_tokens": 0}
+        generation_start = perf_counter()
+        try:
+            outputs = client.batch_generate(prompts, stats=speculative)
+        except Exception:
+            llm_breaker.record(perf_counter() - generation_start, ok=False, permit=permit)
+            raise
+        elapsed = perf_counter() - generation_start
+        llm_breaker.record(elapsed / max(len(prompts), 1), ok=True, permit=permit)
+        router.record_latency(decision.tier, elapsed)
+        self._parse_outputs(agents, changes, outputs, findings, traces, on_agent)
+        llm_stats["routing"] = {"tier": decision.tier, "model": decision.model_name}
+        if speculative["generations"]:
+            llm_stats["speculative"] = {
+                **speculative,
+                "draft_model": client.draft_model_name,
+                "acceptance_rate": (
+                    speculative["accepted_tokens"] / speculative["draft_tokens"]
+                    if speculative["draft_tokens"]
+                    else None
+                ),
+            }
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Deque, List, Tuple
+
+from app.config import settings
+from app.queue import ReviewQueue
+
+
+logger = logging.getLogger("codereview")
+
+
+@dataclass(frozen=True)
+class ScalingEvent:
+    timestamp: float
+    from_workers: int
+    to_workers: int
+    reason: str
+    depth: int
+    oldest_wait_seconds: float
+    cpu: float | None
+
+
+def cpu_utilization() -> float | None:
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class QueueAutoscaler:
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        jobs_per_worker: int = 2,
+        target_wait_seconds: float = 30.0,
+        cpu_high: float = 0.9,
+        cooldown_seconds: float = 15.0,
+        idle_rounds: int = 3,
+    ) -> None:
+        self.min_workers = max(min_workers, 1)
+        self.max_workers = max(max_workers, self.min_workers)
+        self.jobs_per_worker = max(jobs_per_worker, 1)
+        self.target_wait_seconds = target_wait_seconds
+        self.cpu_high = cpu_high
+        self.cooldown_seconds = cooldown_seconds
+        self.idle_rounds = idle_rounds
+        self.events: Deque[ScalingEvent] = deque(maxlen=200)
+        self._last_change = -math.inf
+        self._idle_streak = 0
+        self._task: asyncio.Task | None = None
+
+    def decide(
+        self, workers: int, depth: int, busy: int, oldest_wait: float, cpu: float | None, now: float
+    ) -> Tuple[int, str]:
+        if now - self._last_change < self.cooldown_seconds:
+            return workers, "cooldown"
+        backlog = depth > workers * self.jobs_per_worker or oldest_wait > self.target_wait_seconds
+        if backlog:
+            self._idle_streak = 0
+            if workers >= self.max_workers:
+                return workers, "at max"
+            if cpu is not None and cpu >= self.cpu_high:
+                return workers, "cpu saturated"
+            wanted = max(workers + 1, math.ceil(depth / self.jobs_per_worker))
+            return min(wanted, self.max_workers), "backlog"
+        if depth == 0 and busy < workers:
+            self._idle_streak += 1
+            if self._idle_streak >= self.idle_rounds and workers > self.min_workers:
+                self._idle_streak = 0
+                return max(self.min_workers, max(busy, workers - 1)), "idle"
+            return workers, "idle"
+        self._idle_streak = 0
+        return workers, "steady"
+
+    def observe(
+        self, workers: int, depth: int, busy: int, oldest_wait: float, cpu: float | None, now: float
+    ) -> int:
+        target, reason = self.decide(workers, depth, busy, oldest_wait, cpu, now)
+        if target != workers:
+            self._last_change = now
+            event = ScalingEvent(
+                timestamp=now,
+                from_workers=workers,
+                to_workers=target,
+                reason=reason,
+                depth=depth,
+                oldest_wait_seconds=round(oldest_wait, 3),
+                cpu=round(cpu, 3) if cpu is not None else None,
+            )
+            self.events.append(event)
+            logger.info("Autoscaler %s -> %s workers (%s, depth=%s)", workers, target, reason, depth)
+        return target
+
+    async def run(self, queue: ReviewQueue, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            stats = queue.stats()
+            busy = sum(1 for worker in stats["workers"] if worker["busy"])
+            target = self.observe(
+                queue.active_workers,
+                stats["depth"],
+                busy,
+                stats["wait_seconds"]["oldest_pending"],
+                cpu_utilization(),
+                time.time(),
+            )
+            if target != queue.active_workers:
+                queue.resize(target)
+
+    def start(self, queue: ReviewQueue, interval: float) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(queue, interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "min_workers": self.min_workers,
+            "max_workers": self.max_workers,
+            "events": [asdict(event) for event in self.events],
+        }
+
+
+def build_autoscaler() -> QueueAutoscaler:
+    return QueueAutoscaler(
+        min_workers=settings.review_workers_min,
+        max_workers=settings.review_workers_max,
+        jobs_per_worker=settings.review_autoscale_jobs_per_worker,
+        target_wait_seconds=settings.review_autoscale_target_wait_seconds,
+        cpu_high=settings.review_autoscale_cpu_high,
+        cooldown_seconds=settings.review_autoscale_cooldown_seconds,
+    )
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import List, Tuple
+from uuid import uuid4
+
+from app.config import settings
+
+
+BATCH_KEY = "codereview:review-batch"
+PROCESSING_KEY = "codereview:review-batch:processing"
+
+
+def should_batch(metadata: dict) -> bool:
+    return (
+        settings.review_batch_size > 1
+        and metadata.get("lane") != "interactive"
+        and metadata.get("diff_lines", 0) <= settings.review_batch_max_lines
+    )
+
+
+class ReviewBatcher:
+    def __init__(self, url: str) -> None:
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+
+    def push(self, review_id: str, diff_ref: str) -> int:
+        return int(self._client.rpush(BATCH_KEY, json.dumps([review_id, diff_ref])))
+
+    def take(self, limit: int) -> Tuple[str, List[Tuple[str, str]]]:
+        self.recover()
+        batch_id = uuid4().hex
+        deadline = time.time() + settings.review_batch_visibility_seconds
+        self._client.zadd(PROCESSING_KEY, {batch_id: deadline})
+        items = []
+        for _ in range(limit):
+            item = self._client.lmove(BATCH_KEY, f"{BATCH_KEY}:{batch_id}", "LEFT", "RIGHT")
+            if item is None:
+                break
+            items.append(tuple(json.loads(item)))
+        if not items:
+            self.ack(batch_id)
+        return batch_id, items
+
+    def ack(self, batch_id: str) -> None:
+        pipe = self._client.pipeline(transaction=True)
+        pipe.delete(f"{BATCH_KEY}:{batch_id}")
+        pipe.zrem(PROCESSING_KEY, batch_id)
+        pipe.execute()
+
+    def requeue(self, batch_id: str) -> int:
+        moved = 0
+        while self._client.lmove(f"{BATCH_KEY}:{batch_id}", BATCH_KEY, "RIGHT", "LEFT") is not None:
+            moved += 1
+        self._client.zrem(PROCESSING_KEY, batch_id)
+        return moved
+
+    def recover(self) -> int:
+        expired = self._client.zrangebyscore(PROCESSING_KEY, 0, time.time())
+        return sum(self.requeue(batch_id.decode("utf-8")) for batch_id in expired)
+
+    def pending(self) -> int:
+        return int(self._client.llen(BATCH_KEY))
+
+
+_batcher: ReviewBatcher | None = None
+_batcher_lock = threading.Lock()
+
+
+def batcher() -> ReviewBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = ReviewBatcher(settings.celery_broker_url)
+    return _batcher
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.db import build_engine, get_session, init_db
+from app.db_models import DiffBlobModel
+
+
+def blob_ref(data: bytes) -> str:
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+def _digest(ref: str) -> str:
+    algorithm, _, digest = ref.partition(":")
+    if algorithm != "sha256" or len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+        raise ValueError(f"Invalid blob reference: {ref}")
+    return digest
+
+
+class FileBlobStore:
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def _path(self, ref: str) -> Path:
+        digest = _digest(ref)
+        return self.root / digest[:2] / digest[2:]
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        ref = blob_ref(data)
+        path = self._path(ref)
+        if path.exists():
+            return ref
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(zlib.compress(data))
+        os.replace(tmp_path, path)
+        return ref
+
+    def get(self, ref: str) -> str:
+        return zlib.decompress(self._path(ref).read_bytes()).decode("utf-8")
+
+
+class SqlBlobStore:
+    def __init__(self, database_url: str) -> None:
+        self.engine = build_engine(database_url)
+        init_db(self.engine)
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        ref = blob_ref(data)
+        with get_session(self.engine) as session:
+            if session.get(DiffBlobModel, ref) is None:
+                session.merge(
+                    DiffBlobModel(
+                        ref=ref,
+                        payload=zlib.compress(data),
+                        size=len(data),
+                        created_at=datetime.utcnow(),
+                    )
+                )
+                session.commit()
+        return ref
+
+    def get(self, ref: str) -> str:
+        _digest(ref)
+        with get_session(self.engine) as session:
+            payload = session.execute(
+                select(DiffBlobModel.payload).where(DiffBlobModel.ref == ref)
+            ).scalar_one_or_none()
+        if payload is None:
+            raise KeyError(ref)
+        return zlib.decompress(payload).decode("utf-8")
+
+
+_blob_store: FileBlobStore | SqlBlobStore | None = None
+_blob_lock = threading.Lock()
+
+
+def diff_blobs() -> FileBlobStore | SqlBlobStore:
+    global _blob_store
+    if _blob_store is None:
+        with _blob_lock:
+            if _blob_store is None:
+                if settings.diff_blob_backend == "db":
+                    _blob_store = SqlBlobStore(settings.database_url)
+                else:
+                    _blob_store = FileBlobStore(settings.diff_blob_path)
+    return _blob_store
+
+
+def load_review_diff(metadata: dict) -> str:
+    diff_ref = metadata.get("diff_ref")
+    if diff_ref:
+        return diff_blobs().get(diff_ref)
+    return metadata.get("diff", "")
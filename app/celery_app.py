@@ -9,6 +9,14 @@ celery_app = Celery(
     "code_review",
     broker=settings.celery_broker_url,
     backend=settings.celery_result_backend,
+    include=["app.tasks"],
 )
 
-celery_app.conf.task_routes = {"app.tasks.*": {"queue": "reviews"}}
+celery_app.conf.task_routes = {
+    "app.tasks.critique_review": {"queue": "critic"},
+    "app.tasks.*": {"queue": "reviews.small"},
+}
+celery_app.conf.task_queue_max_priority = 10
+celery_app.conf.task_default_priority = 5
+celery_app.conf.worker_prefetch_multiplier = 1
+celery_app.conf.broker_transport_options = {"queue_order_strategy": "priority"}
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Tuple
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class BreakerPermit:
+    probe: bool = False
+    window: int = 0
+
+
+_CLOSED = BreakerPermit()
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        latency_slo_ms: float,
+        error_rate_threshold: float,
+        window: int,
+        min_samples: int,
+        cooldown_seconds: float,
+    ) -> None:
+        self.latency_slo_ms = latency_slo_ms
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = max(min_samples, 1)
+        self.cooldown_seconds = cooldown_seconds
+        self.state = "closed"
+        self.trips = 0
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=max(window, 1))
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started_at = 0.0
+        self._probe_window = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> BreakerPermit | None:
+        with self._lock:
+            if self.state == "closed":
+                return _CLOSED
+            now = time.monotonic()
+            if self.state == "open" and now - self._opened_at >= self.cooldown_seconds:
+                self.state = "half_open"
+            if self.state != "half_open":
+                return None
+            # A probe that never reports back must not keep the breaker half-open forever.
+            if self._probe_in_flight and now - self._probe_started_at < self.cooldown_seconds:
+                return None
+            self._probe_in_flight = True
+            self._probe_started_at = now
+            self._probe_window += 1
+            return BreakerPermit(probe=True, window=self._probe_window)
+
+    def record(self, latency_seconds: float, ok: bool, permit: BreakerPermit | None = None) -> None:
+        latency_ms = latency_seconds * 1000
+        with self._lock:
+            if self.state == "half_open":
+                # Only the current probe decides; calls admitted before the
+                # breaker opened, or a replaced probe, report into the void.
+                if permit is None or not permit.probe or permit.window != self._probe_window:
+                    return
+                self._probe_in_flight = False
+                if ok and latency_ms <= self.latency_slo_ms:
+                    self.state = "closed"
+                    self._samples.clear()
+                else:
+                    self._open()
+                return
+            if self.state == "open" or (permit is not None and permit.probe):
+                return
+            self._samples.append((latency_ms, ok))
+            if len(self._samples) < self.min_samples:
+                return
+            if self._p95_latency() > self.latency_slo_ms or self._error_rate() > self.error_rate_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self.state = "open"
+        self.trips += 1
+        self._opened_at = time.monotonic()
+
+    def _p95_latency(self) -> float:
+        latencies = sorted(sample[0] for sample in self._samples)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def _error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "trips": self.trips,
+                "samples": len(self._samples),
+                "p95_latency_ms": round(self._p95_latency(), 1),
+                "error_rate": round(self._error_rate(), 3),
+                "latency_slo_ms": self.latency_slo_ms,
+                "error_rate_threshold": self.error_rate_threshold,
+            }
+
+
+llm_breaker = CircuitBreaker(
+    latency_slo_ms=settings.llm_breaker_latency_slo_ms,
+    error_rate_threshold=settings.llm_breaker_error_rate,
+    window=settings.llm_breaker_window,
+    min_samples=settings.llm_breaker_min_samples,
+    cooldown_seconds=settings.llm_breaker_cooldown_seconds,
+)
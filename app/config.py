@@ -7,7 +7,56 @@ class Settings:
     def __init__(self) -> None:
         self.database_url = os.getenv("DATABASE_URL", "sqlite:///./codereview.db")
         self.use_database = os.getenv("USE_DATABASE", "0") == "1"
+        self.database_async = os.getenv("DATABASE_ASYNC", "1") == "1"
+        self.database_async_url = os.getenv("DATABASE_ASYNC_URL", "")
+        self.db_pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+        self.db_pool_max_overflow = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+        self.db_pool_timeout_seconds = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+        self.db_pool_pre_ping = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+        self.db_pool_stats_window = int(os.getenv("DB_POOL_STATS_WINDOW", "1000"))
         self.use_celery = os.getenv("USE_CELERY", "0") == "1"
+        self.review_workers = int(os.getenv("REVIEW_WORKERS", "2"))
+        self.review_executor = os.getenv("REVIEW_EXECUTOR", "thread")
+        self.review_autoscale = os.getenv("REVIEW_AUTOSCALE", "0") == "1"
+        self.review_workers_min = int(os.getenv("REVIEW_WORKERS_MIN", "1"))
+        self.review_workers_max = int(os.getenv("REVIEW_WORKERS_MAX", "8"))
+        self.review_autoscale_interval_seconds = float(os.getenv("REVIEW_AUTOSCALE_INTERVAL_SECONDS", "5"))
+        self.review_autoscale_jobs_per_worker = int(os.getenv("REVIEW_AUTOSCALE_JOBS_PER_WORKER", "2"))
+        self.review_autoscale_target_wait_seconds = float(
+            os.getenv("REVIEW_AUTOSCALE_TARGET_WAIT_SECONDS", "30")
+        )
+        self.review_autoscale_cpu_high = float(os.getenv("REVIEW_AUTOSCALE_CPU_HIGH", "0.9"))
+        self.review_autoscale_cooldown_seconds = float(os.getenv("REVIEW_AUTOSCALE_COOLDOWN_SECONDS", "15"))
+        self.review_lease_seconds = float(os.getenv("REVIEW_LEASE_SECONDS", "60"))
+        self.checkpoint_retention_seconds = float(os.getenv("CHECKPOINT_RETENTION_SECONDS", "86400"))
+        self.checkpoint_prune_interval_seconds = float(os.getenv("CHECKPOINT_PRUNE_INTERVAL_SECONDS", "3600"))
+        self.review_drain_timeout_seconds = float(os.getenv("REVIEW_DRAIN_TIMEOUT_SECONDS", "30"))
+        self.review_queue_max_size = int(os.getenv("REVIEW_QUEUE_MAX_SIZE", "100"))
+        self.review_queue_admission = os.getenv("REVIEW_QUEUE_ADMISSION", "reject")
+        self.review_queue_retry_after_seconds = int(os.getenv("REVIEW_QUEUE_RETRY_AFTER_SECONDS", "30"))
+        self.review_queue_backend = os.getenv("REVIEW_QUEUE_BACKEND", "memory")
+        self.review_queue_path = os.getenv("REVIEW_QUEUE_PATH", "./review_queue.db")
+        self.review_queue_visibility_timeout_seconds = float(
+            os.getenv("REVIEW_QUEUE_VISIBILITY_TIMEOUT_SECONDS", "120")
+        )
+        self.review_queue_max_attempts = int(os.getenv("REVIEW_QUEUE_MAX_ATTEMPTS", "3"))
+        self.review_queue_retry_backoff_seconds = float(os.getenv("REVIEW_QUEUE_RETRY_BACKOFF_SECONDS", "5"))
+        self.schedule_small_max_lines = int(os.getenv("SCHEDULE_SMALL_MAX_LINES", "200"))
+        self.schedule_aging_seconds = float(os.getenv("SCHEDULE_AGING_SECONDS", "120"))
+        self.schedule_max_running_per_repo = int(os.getenv("SCHEDULE_MAX_RUNNING_PER_REPO", "1"))
+        self.review_sharding = os.getenv("REVIEW_SHARDING", "0") == "1"
+        self.review_shard_max_lines = int(os.getenv("REVIEW_SHARD_MAX_LINES", "400"))
+        self.review_shard_max_retries = int(os.getenv("REVIEW_SHARD_MAX_RETRIES", "3"))
+        self.review_shard_retry_backoff_seconds = float(os.getenv("REVIEW_SHARD_RETRY_BACKOFF_SECONDS", "5"))
+        self.review_batch_size = int(os.getenv("REVIEW_BATCH_SIZE", "0"))
+        self.review_batch_window_seconds = float(os.getenv("REVIEW_BATCH_WINDOW_SECONDS", "2"))
+        self.review_batch_max_lines = int(os.getenv("REVIEW_BATCH_MAX_LINES", "50"))
+        self.review_batch_visibility_seconds = float(os.getenv("REVIEW_BATCH_VISIBILITY_SECONDS", "600"))
+        self.api_page_size_max = int(os.getenv("API_PAGE_SIZE_MAX", "200"))
+        self.diff_blob_backend = os.getenv(
+            "DIFF_BLOB_BACKEND", "db" if self.use_database or self.use_celery else "fs"
+        )
+        self.diff_blob_path = os.getenv("DIFF_BLOB_PATH", "./diff_blobs")
         self.celery_broker_url = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
         self.celery_result_backend = os.getenv(
             "CELERY_RESULT_BACKEND", "redis://localhost:6379/0"
@@ -28,17 +77,31 @@ class Settings:
         self.gitlab_client_secret = os.getenv("GITLAB_CLIENT_SECRET", "")
         self.gitlab_redirect_uri = os.getenv("GITLAB_REDIRECT_URI", "")
         self.llm_backend = os.getenv("LLM_BACKEND", "local")
+        self.llm_warm_on_start = os.getenv("LLM_WARM_ON_START", "1") == "1"
         self.llm_model = os.getenv("LLM_MODEL", "gpt2")
         self.llm_max_tokens = int(os.getenv("LLM_MAX_TOKENS", "256"))
         self.llm_temperature = float(os.getenv("LLM_TEMPERATURE", "0.2"))
         self.use_langgraph = os.getenv("USE_LANGGRAPH", "0") == "1"
+        self.critic_sample_rate = float(os.getenv("CRITIC_SAMPLE_RATE", "1.0"))
         self.llm_device = os.getenv("LLM_DEVICE", "cpu")
         self.llm_adapter_path = os.getenv("LLM_ADAPTER_PATH", "")
         self.llm_adapter_type = os.getenv("LLM_ADAPTER_TYPE", "lora")
         self.llm_cache_size = int(os.getenv("LLM_CACHE_SIZE", "256"))
+        self.llm_cache_enabled = os.getenv("LLM_CACHE", "1") == "1"
+        self.llm_draft_model = os.getenv("LLM_DRAFT_MODEL", "")
+        self.llm_small_model = os.getenv("LLM_SMALL_MODEL", "")
+        self.llm_routing_small_max_lines = int(os.getenv("LLM_ROUTING_SMALL_MAX_LINES", "40"))
+        self.llm_routing_small_max_files = int(os.getenv("LLM_ROUTING_SMALL_MAX_FILES", "3"))
+        self.llm_breaker_latency_slo_ms = float(os.getenv("LLM_BREAKER_LATENCY_SLO_MS", "20000"))
+        self.llm_breaker_error_rate = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+        self.llm_breaker_window = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+        self.llm_breaker_min_samples = int(os.getenv("LLM_BREAKER_MIN_SAMPLES", "5"))
+        self.llm_breaker_cooldown_seconds = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "60"))
+        self.llm_routing_stats_window = int(os.getenv("LLM_ROUTING_STATS_WINDOW", "500"))
         self.token_encryption_key = os.getenv("TOKEN_ENCRYPTION_KEY", "")
         self.rate_limit_per_hour = int(os.getenv("RATE_LIMIT_PER_HOUR", "0"))
         self.llm_quantization = os.getenv("LLM_QUANTIZATION", "none")
+        self.llm_quantized_cache_dir = os.getenv("LLM_QUANTIZED_CACHE_DIR", "./model_cache")
         self.llm_batch_size = int(os.getenv("LLM_BATCH_SIZE", "4"))
         self.llm_cache_redis_url = os.getenv("LLM_CACHE_REDIS_URL", "")
         self.session_cookie_name = os.getenv("SESSION_COOKIE_NAME", "cr_session")
@@ -1,17 +1,167 @@
 from __future__ import annotations
 
+import importlib.util
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+from app.migrations import migrate
+
+
+logger = logging.getLogger("codereview")
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+ASYNC_DRIVER_MODULES = {"aiosqlite": "aiosqlite", "asyncpg": "asyncpg"}
+LIBPQ_ONLY_ARGS = {
+    "application_name",
+    "client_encoding",
+    "gssencmode",
+    "keepalives",
+    "keepalives_count",
+    "keepalives_idle",
+    "keepalives_interval",
+    "options",
+    "sslcert",
+    "sslcrl",
+    "sslkey",
+    "sslrootcert",
+    "target_session_attrs",
+}
+
+
+class CheckoutStats:
+    def __init__(self) -> None:
+        self._samples: Deque[float] = deque(maxlen=max(settings.db_pool_stats_window, 1))
+        self._checkouts = 0
+        self._timeouts = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self._samples.append(seconds * 1000)
+            self._checkouts += 1
+            self._timeouts += int(timed_out)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            checkouts, timeouts = self._checkouts, self._timeouts
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "p50_ms": round(samples[len(samples) // 2], 3) if samples else None,
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3) if samples else None,
+            "max_ms": round(samples[-1], 3) if samples else None,
+        }
+
+
+checkout_stats: Dict[str, CheckoutStats] = {"sync": CheckoutStats(), "async": CheckoutStats()}
+
+
+class _TimedCheckout:
+    stats_key = "sync"
+
+    def connect(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except PoolTimeout:
+            timed_out = True
+            raise
+        finally:
+            checkout_stats[self.stats_key].record(time.perf_counter() - started, timed_out)
 
-from app.db_models import Base
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    stats_key = "async"
+
+
+def _pool_options(database_url: str, poolclass) -> dict:
+    url = make_url(database_url)
+    options = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+    options.update(
+        poolclass=poolclass,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_pool_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+    )
+    return options
+
+
+def async_database_url(database_url: str) -> str | None:
+    if settings.database_async_url:
+        return settings.database_async_url
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        return None
+    modules = ("greenlet", ASYNC_DRIVER_MODULES[driver.split("+")[1]])
+    if any(importlib.util.find_spec(module) is None for module in modules):
+        return None
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _asyncpg_args(database_url: str) -> Tuple[str, dict]:
+    url = make_url(database_url)
+    if url.get_driver_name() != "asyncpg":
+        return database_url, {}
+    query = dict(url.query)
+    connect_args = {}
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    if "connect_timeout" in query:
+        connect_args["timeout"] = float(query.pop("connect_timeout"))
+    dropped = sorted(name for name in query if name in LIBPQ_ONLY_ARGS)
+    if dropped:
+        logger.warning("Ignoring libpq options asyncpg does not support: %s", ", ".join(dropped))
+    query = {name: value for name, value in query.items() if name not in LIBPQ_ONLY_ARGS}
+    return url.set(query=query).render_as_string(hide_password=False), connect_args
 
 
 def build_engine(database_url: str):
-    return create_engine(database_url, future=True)
+    return create_engine(database_url, future=True, **_pool_options(database_url, TimedQueuePool))
+
+
+def build_async_engine(database_url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = async_database_url(database_url)
+    if url is None:
+        raise ValueError(f"No async driver available for {make_url(database_url).get_backend_name()}")
+    url, connect_args = _asyncpg_args(url)
+    return create_async_engine(url, connect_args=connect_args, **_pool_options(url, TimedAsyncQueuePool))
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+    }
 
 
 def init_db(engine) -> None:
-    Base.metadata.create_all(engine)
+    migrate(engine)
 
 
 def get_session(engine) -> Session:
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, JSON
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, LargeBinary, String, Text, JSON
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -12,12 +12,21 @@ class Base(DeclarativeBase):
 
 class ReviewModel(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_created_at_id", "created_at", "id"),
+        Index("ix_reviews_status_created_at", "status", "created_at"),
+        Index("ix_reviews_repo_created_at", "repo", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     status: Mapped[str] = mapped_column(String(32), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     meta: Mapped[dict] = mapped_column(JSON, default=dict)
+    pr_key: Mapped[str | None] = mapped_column(String(512), nullable=True, index=True)
+    repo: Mapped[str | None] = mapped_column(String(512), nullable=True)
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     comments: Mapped[list["CommentModel"]] = relationship(
         "CommentModel", back_populates="review", cascade="all, delete-orphan"
@@ -32,6 +41,7 @@ class ReviewModel(Base):
 
 class CommentModel(Base):
     __tablename__ = "comments"
+    __table_args__ = (Index("ix_comments_review_id_id", "review_id", "id"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     review_id: Mapped[str] = mapped_column(String(36), ForeignKey("reviews.id"))
@@ -47,6 +57,10 @@ class CommentModel(Base):
 
 class TraceModel(Base):
     __tablename__ = "traces"
+    __table_args__ = (
+        Index("ix_traces_review_id_id", "review_id", "id"),
+        Index("ix_traces_agent_id_id", "agent_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     review_id: Mapped[str] = mapped_column(String(36), ForeignKey("reviews.id"))
@@ -61,6 +75,10 @@ class TraceModel(Base):
 
 class MessageModel(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_review_id_id", "review_id", "id"),
+        Index("ix_messages_agent_id_id", "agent_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     review_id: Mapped[str] = mapped_column(String(36), ForeignKey("reviews.id"))
@@ -72,6 +90,7 @@ class MessageModel(Base):
 
 class FeedbackModel(Base):
     __tablename__ = "feedback"
+    __table_args__ = (Index("ix_feedback_review_id_comment_id", "review_id", "comment_id"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     review_id: Mapped[str] = mapped_column(String(36), ForeignKey("reviews.id"))
@@ -83,11 +102,58 @@ class FeedbackModel(Base):
     review: Mapped["ReviewModel"] = relationship("ReviewModel", back_populates="feedback")
 
 
+class FeedbackRollupModel(Base):
+    __tablename__ = "feedback_rollups"
+
+    scope: Mapped[str] = mapped_column(String(16), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    up: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    down: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    neutral: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
 class OAuthTokenModel(Base):
     __tablename__ = "oauth_tokens"
+    __table_args__ = (Index("ix_oauth_tokens_provider_user_id", "provider", "user_id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     provider: Mapped[str] = mapped_column(String(32), nullable=False)
     user_id: Mapped[str] = mapped_column(String(128), nullable=False)
     access_token: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class CheckpointModel(Base):
+    __tablename__ = "review_checkpoints"
+
+    review_id: Mapped[str] = mapped_column(String(36), ForeignKey("reviews.id"), primary_key=True)
+    stage: Mapped[str] = mapped_column(String(128), primary_key=True)
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class IdempotencyKeyModel(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (Index("ix_idempotency_keys_review_id", "review_id"),)
+
+    key: Mapped[str] = mapped_column(String(128), primary_key=True)
+    review_id: Mapped[str] = mapped_column(String(36), ForeignKey("reviews.id"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class DiffBlobModel(Base):
+    __tablename__ = "diff_blobs"
+
+    ref: Mapped[str] = mapped_column(String(71), primary_key=True)
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class SchemaVersionModel(Base):
+    __tablename__ = "schema_version"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(128), nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
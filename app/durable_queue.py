@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+from uuid import UUID, uuid4
+
+from app.queue import ReviewJob, ReviewQueue, logger
+
+
+class SqliteJobJournal:
+    def __init__(self, path: str) -> None:
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS review_jobs (
+                review_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                enqueued_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_review_jobs_status_lease ON review_jobs (status, lease_expires)"
+        )
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def add(self, job: ReviewJob) -> None:
+        payload = {**asdict(job), "review_id": str(job.review_id)}
+        self._execute(
+            "INSERT OR REPLACE INTO review_jobs (review_id, payload, status, attempts, enqueued_at, updated_at) "
+            "VALUES (?, ?, 'pending', 0, ?, ?)",
+            (str(job.review_id), json.dumps(payload), job.enqueued_at, time.time()),
+        )
+
+    def lease(self, review_id: UUID, owner: str, visibility_timeout: float) -> int | None:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE review_jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, updated_at = ? "
+                "WHERE review_id = ? AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))",
+                (owner, now + visibility_timeout, now, str(review_id), now),
+            )
+            if cursor.rowcount != 1:
+                return None
+            row = self._conn.execute(
+                "SELECT attempts FROM review_jobs WHERE review_id = ?", (str(review_id),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def renew(self, owner: str, review_ids: List[UUID], visibility_timeout: float) -> None:
+        if not review_ids:
+            return
+        now = time.time()
+        placeholders = ",".join("?" for _ in review_ids)
+        self._execute(
+            f"UPDATE review_jobs SET lease_expires = ?, updated_at = ? "
+            f"WHERE lease_owner = ? AND status = 'leased' AND review_id IN ({placeholders})",
+            (now + visibility_timeout, now, owner, *(str(review_id) for review_id in review_ids)),
+        )
+
+    def release(self, review_id: UUID, error: str) -> None:
+        self._execute(
+            "UPDATE review_jobs SET status = 'pending', lease_owner = NULL, lease_expires = NULL, "
+            "last_error = ?, updated_at = ? WHERE review_id = ?",
+            (error, time.time(), str(review_id)),
+        )
+
+    def bury(self, review_id: UUID, error: str) -> None:
+        self._execute(
+            "UPDATE review_jobs SET status = 'dead', lease_owner = NULL, lease_expires = NULL, "
+            "last_error = ?, updated_at = ? WHERE review_id = ?",
+            (error, time.time(), str(review_id)),
+        )
+
+    def delete(self, review_id: UUID) -> None:
+        self._execute("DELETE FROM review_jobs WHERE review_id = ?", (str(review_id),))
+
+    def recoverable(self, exclude: List[UUID]) -> List[Tuple[ReviewJob, int, str]]:
+        skip = {str(review_id) for review_id in exclude}
+        rows = self._execute(
+            "SELECT payload, attempts, status FROM review_jobs "
+            "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) ORDER BY enqueued_at",
+            (time.time(),),
+        ).fetchall()
+        jobs = []
+        for payload, attempts, status in rows:
+            data = json.loads(payload)
+            if data["review_id"] in skip:
+                continue
+            data["review_id"] = UUID(data["review_id"])
+            jobs.append((ReviewJob(**data), attempts, status))
+        return jobs
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._execute("SELECT status, COUNT(*) FROM review_jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class DurableReviewQueue(ReviewQueue):
+    def __init__(
+        self,
+        path: str,
+        visibility_timeout: float = 120.0,
+        max_attempts: int = 3,
+        retry_backoff: float = 5.0,
+        on_dead: Callable[[ReviewJob, str], None] | None = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max(max_attempts, 1)
+        self.retry_backoff = retry_backoff
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._on_dead = on_dead
+        self._journal: SqliteJobJournal | None = SqliteJobJournal(path)
+        self._attempts: Dict[UUID, int] = {}
+        self._running: Dict[UUID, ReviewJob] = {}
+        self._retrying: Dict[UUID, asyncio.TimerHandle] = {}
+        self._lease_task: asyncio.Task | None = None
+        self._journal_tasks: Set[asyncio.Task] = set()
+        self._counters.update({"recovered": 0, "retried": 0, "dead": 0, "lost_leases": 0})
+
+    async def start(self, handler, deferred_handler=None) -> None:
+        if self._worker_tasks:
+            return
+        await self._recover()
+        await super().start(handler, deferred_handler)
+        self._lease_task = asyncio.create_task(self._maintain_leases())
+
+    async def _recover(self) -> None:
+        queued = [job.review_id for job in self._pending] + list(self._running) + list(self._retrying)
+        recovered = 0
+        for job, attempts, status in await asyncio.to_thread(self._journal.recoverable, queued):
+            if status == "leased" and attempts >= self.max_attempts:
+                await self._bury(job, "Lease expired after final attempt")
+                continue
+            recovered += 1
+            self._push(job)
+        if recovered:
+            self._counters["recovered"] += recovered
+            logger.info("Recovered %s review jobs from %s", recovered, self.path)
+
+    async def _maintain_leases(self) -> None:
+        interval = max(self.visibility_timeout / 3, 0.05)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(
+                    self._journal.renew, self.owner, list(self._running), self.visibility_timeout
+                )
+                await self._recover()
+            except sqlite3.Error as exc:
+                logger.warning("Review job lease maintenance failed: %s", exc)
+
+    async def enqueue(self, job: ReviewJob, reserved: bool = False) -> None:
+        if self._accepting and self._journal is not None:
+            try:
+                await asyncio.to_thread(self._journal.add, job)
+            except BaseException:
+                if reserved:
+                    self.release_slot()
+                raise
+        await super().enqueue(job, reserved=reserved)
+
+    async def _next_job(self):
+        while True:
+            job = await super()._next_job()
+            if not isinstance(job, ReviewJob) or self._journal is None:
+                return job
+            lease = asyncio.ensure_future(
+                asyncio.to_thread(self._journal.lease, job.review_id, self.owner, self.visibility_timeout)
+            )
+            try:
+                attempts = await asyncio.shield(lease)
+            except asyncio.CancelledError:
+                # resize() and stop() cancel idle workers, and a worker waiting on
+                # its lease counts as idle: hand the job back instead of dropping it.
+                self._release_repo(job.repo)
+                self._in_background(self._return_job(job, lease))
+                raise
+            if attempts is not None:
+                self._attempts[job.review_id] = attempts
+                self._running[job.review_id] = job
+                return job
+            self._counters["lost_leases"] += 1
+            self._release_repo(job.repo)
+            self._task_done()
+
+    async def _return_job(self, job: ReviewJob, lease: asyncio.Future) -> None:
+        try:
+            attempts = await lease
+        except Exception:
+            attempts = None
+        if attempts is not None and self._journal is not None:
+            await asyncio.to_thread(self._journal.release, job.review_id, "Worker stopped")
+        if not self._accepting:
+            self._task_done()
+            return
+        self._pending.append(job)
+        if job.dedupe_key:
+            self._by_key.setdefault(job.dedupe_key, job)
+        self._wakeup.set()
+
+    def _in_background(self, work: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(work)
+        self._journal_tasks.add(task)
+        task.add_done_callback(self._journal_tasks.discard)
+
+    async def _job_done(self, job: ReviewJob, error: BaseException | None) -> None:
+        self._running.pop(job.review_id, None)
+        attempts = self._attempts.pop(job.review_id, 1)
+        if self._journal is None:
+            return
+        if error is None:
+            await asyncio.to_thread(self._journal.delete, job.review_id)
+            return
+        if isinstance(error, asyncio.CancelledError):
+            await asyncio.to_thread(self._journal.release, job.review_id, "Worker stopped")
+            return
+        if attempts >= self.max_attempts:
+            await self._bury(job, str(error))
+            return
+        await asyncio.to_thread(self._journal.release, job.review_id, str(error))
+        self._counters["retried"] += 1
+        delay = self.retry_backoff * (2 ** (attempts - 1))
+        self._retrying[job.review_id] = asyncio.get_running_loop().call_later(delay, self._retry, job)
+
+    def _retry(self, job: ReviewJob) -> None:
+        self._retrying.pop(job.review_id, None)
+        if self._accepting:
+            self._push(job)
+
+    async def _bury(self, job: ReviewJob, error: str) -> None:
+        await asyncio.to_thread(self._journal.bury, job.review_id, error)
+        self._counters["dead"] += 1
+        logger.warning("Review job %s moved to dead letter: %s", job.review_id, error)
+        if self._on_dead is not None:
+            self._on_dead(job, error)
+
+    def _remove(self, job: ReviewJob) -> None:
+        super()._remove(job)
+        if self._journal is not None:
+            self._in_background(asyncio.to_thread(self._journal.delete, job.review_id))
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        for handle in self._retrying.values():
+            handle.cancel()
+        self._retrying = {}
+        await super().stop(timeout=timeout)
+        if self._lease_task is not None:
+            self._lease_task.cancel()
+            await asyncio.gather(self._lease_task, return_exceptions=True)
+            self._lease_task = None
+        if self._journal_tasks:
+            await asyncio.gather(*self._journal_tasks, return_exceptions=True)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["backend"] = "sqlite"
+        stats["journal"] = self._journal.counts() if self._journal is not None else {}
+        return stats
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Tuple
+from uuid import UUID
+
+
+ROLLUP_SCOPES = ("review", "agent", "repo", "day")
+RATING_BUCKETS = ("up", "down", "neutral")
+
+
+def rating_bucket(rating: int) -> str:
+    if rating > 0:
+        return "up"
+    if rating < 0:
+        return "down"
+    return "neutral"
+
+
+def rollup_keys(
+    review_id: UUID, agent_id: str | None, repo: str | None, created_at: datetime
+) -> List[Tuple[str, str]]:
+    keys = [("review", str(review_id)), ("day", created_at.date().isoformat())]
+    if agent_id:
+        keys.append(("agent", agent_id))
+    if repo:
+        keys.append(("repo", repo))
+    return keys
+
+
+def acceptance_rate(up: int, down: int) -> float | None:
+    return round(up / (up + down), 4) if up + down else None
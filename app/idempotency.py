@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from typing import List
+
+
+REUSABLE_STATUSES = ("pending", "in_progress", "completed")
+SUPERSEDABLE_STATUSES = ("pending", "in_progress")
+
+
+def diff_hash(diff_text: str) -> str:
+    return hashlib.sha256(diff_text.encode("utf-8")).hexdigest()
+
+
+def content_key(diff_text: str, metadata: dict) -> str:
+    repo = metadata.get("repo") or ""
+    head = metadata.get("commit_id") or metadata.get("commit") or ""
+    digest = hashlib.sha256(f"{repo}\0{head}\0{diff_hash(diff_text)}".encode("utf-8")).hexdigest()
+    return f"content:{digest}"
+
+
+def delivery_key(metadata: dict) -> str | None:
+    delivery_id = metadata.get("delivery_id")
+    if not delivery_id:
+        return None
+    return f"delivery:{metadata.get('source') or 'unknown'}:{delivery_id}"
+
+
+def review_keys(diff_text: str, metadata: dict) -> List[str]:
+    keys = [] if metadata.get("diff_error") else [content_key(diff_text, metadata)]
+    delivery = delivery_key(metadata)
+    if delivery:
+        keys.append(delivery)
+    return keys
+
+
+def event_time(value: str | None) -> str | None:
+    if not value:
+        return None
+    text = value.strip().replace(" UTC", "+00:00").replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def is_newer(metadata: dict, other: dict) -> bool:
+    # Reviews without a PR update time (API submissions, older rows) are
+    # ordered by arrival, so they never count as newer.
+    mine, theirs = metadata.get("pr_updated_at"), other.get("pr_updated_at")
+    return bool(mine and theirs and mine > theirs)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+from uuid import UUID, uuid4
+
+
+logger = logging.getLogger("codereview")
+
+_owners: dict = {}
+
+
+def lease_owner() -> str:
+    # One token per claim, not per process, so threads in one worker cannot
+    # take over each other's reviews.
+    pid = os.getpid()
+    if pid not in _owners:
+        _owners[pid] = f"{socket.gethostname()}:{pid}"
+    return f"{_owners[pid]}:{uuid4().hex[:12]}"
+
+
+class ReviewLease:
+    def __init__(self, store: object, review_id: UUID, owner: str, seconds: float) -> None:
+        self.store = store
+        self.review_id = review_id
+        self.owner = owner
+        self.seconds = seconds
+        self._lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def lost(self) -> bool:
+        return self._lost.is_set()
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(max(self.seconds / 3, 0.05)):
+            try:
+                renewed = self.store.renew_lease(self.review_id, self.owner, self.seconds)
+            except Exception as exc:
+                logger.warning("Lease heartbeat for review %s failed: %s", self.review_id, exc)
+                continue
+            if not renewed:
+                logger.warning("Lost lease on review %s", self.review_id)
+                self._lost.set()
+                return
+
+    def __enter__(self) -> "ReviewLease":
+        self._thread = threading.Thread(
+            target=self._heartbeat, name=f"lease-{self.review_id}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -1,92 +1,231 @@
 from __future__ import annotations
 
 import json
+import logging
+import threading
 from typing import Any, Dict, List, Optional
 
 from app.config import settings
-from app.llm_cache import LRUCache, RedisCache, build_cache_key
+from app.llm_cache import LRUCache, NullCache, RedisCache, build_cache_key
+
+
+logger = logging.getLogger("codereview")
+
+
+def tokenizers_compatible(tokenizer, draft_tokenizer) -> bool:
+    if tokenizer.eos_token_id != draft_tokenizer.eos_token_id:
+        return False
+    return tokenizer.get_vocab() == draft_tokenizer.get_vocab()
 
 
 class LLMClient:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        model_name: str | None = None,
+        quantization: str | None = None,
+        draft_model_name: str | None = None,
+    ) -> None:
         self.backend = settings.llm_backend
-        self.model_name = settings.llm_model
+        self.model_name = model_name or settings.llm_model
         self.max_tokens = settings.llm_max_tokens
         self.temperature = settings.llm_temperature
         self.device = settings.llm_device
         self.adapter_path = settings.llm_adapter_path
         self.adapter_type = settings.llm_adapter_type
-        self.quantization = settings.llm_quantization
+        self.quantization = quantization or settings.llm_quantization
         self.batch_size = settings.llm_batch_size
-        self._pipeline = None
-        self._cache = (
-            RedisCache(settings.llm_cache_redis_url)
-            if settings.llm_cache_redis_url
-            else LRUCache(settings.llm_cache_size)
+        self.draft_model_name = (
+            settings.llm_draft_model if draft_model_name is None else draft_model_name
         )
+        self._pipeline = None
+        if not settings.llm_cache_enabled:
+            self._cache = NullCache()
+        elif settings.llm_cache_redis_url:
+            self._cache = RedisCache(settings.llm_cache_redis_url)
+        else:
+            self._cache = LRUCache(settings.llm_cache_size)
         self._loaded_adapter = None
+        self._load_lock = threading.Lock()
+        self._draft_model = None
+        self._calls = threading.local()
+        self._stats_lock = threading.Lock()
+        self.speculative_stats = {"generations": 0, "draft_tokens": 0, "accepted_tokens": 0}
 
-    def _load_local(self):
+    def warm(self) -> None:
+        if self.backend == "local":
+            self.load()
+
+    def load(self) -> None:
         if self._pipeline is not None:
             return
+        with self._load_lock:
+            if self._pipeline is None:
+                self._load_model()
+
+    def _load_model(self) -> None:
         from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
 
         tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        model_kwargs = {}
-        if self.quantization == "8bit":
-            model_kwargs["load_in_8bit"] = True
-        model = AutoModelForCausalLM.from_pretrained(self.model_name, **model_kwargs)
-        if self.adapter_path:
-            try:
-                from peft import PeftModel
-
-                model = PeftModel.from_pretrained(model, self.adapter_path)
+        if self.quantization == "dynamic_int8":
+            from app.llm_quantization import load_dynamic_int8
+
+            model, loaded_adapter = load_dynamic_int8(
+                self.model_name, self.adapter_path, settings.llm_quantized_cache_dir
+            )
+            if loaded_adapter:
                 self._loaded_adapter = self.adapter_path
-            except Exception:
-                pass
-        self._pipeline = pipeline(
+        else:
+            model_kwargs = {}
+            if self.quantization == "8bit":
+                model_kwargs["load_in_8bit"] = True
+            model = AutoModelForCausalLM.from_pretrained(self.model_name, **model_kwargs)
+            if self.adapter_path:
+                try:
+                    from peft import PeftModel
+
+                    model = PeftModel.from_pretrained(model, self.adapter_path)
+                    self._loaded_adapter = self.adapter_path
+                except Exception:
+                    pass
+        text_pipeline = pipeline(
             "text-generation",
             model=model,
             tokenizer=tokenizer,
             max_new_tokens=self.max_tokens,
             temperature=self.temperature,
-            device=0 if self.device == "cuda" else -1,
+            device=0 if self.device == "cuda" and self.quantization != "dynamic_int8" else -1,
         )
+        if self.draft_model_name:
+            self._load_draft(model, tokenizer, text_pipeline.device)
+        self._pipeline = text_pipeline
+
+    def _load_draft(self, model, tokenizer, device) -> None:
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        try:
+            draft_tokenizer = AutoTokenizer.from_pretrained(self.draft_model_name)
+        except Exception as exc:
+            logger.warning("Draft model %s unavailable: %s", self.draft_model_name, exc)
+            return
+        if not tokenizers_compatible(tokenizer, draft_tokenizer):
+            logger.warning(
+                "Draft model %s tokenizer is incompatible with %s; using plain decoding",
+                self.draft_model_name,
+                self.model_name,
+            )
+            return
+        try:
+            draft = AutoModelForCausalLM.from_pretrained(self.draft_model_name)
+            draft.to(device)
+            draft.eval()
+        except Exception as exc:
+            logger.warning(
+                "Draft model %s failed to load (%s); using plain decoding", self.draft_model_name, exc
+            )
+            return
+
+        def _counter(name: str):
+            def hook(_module, _inputs, _output) -> None:
+                forward_calls = getattr(self._calls, "forward_calls", None)
+                if forward_calls is not None:
+                    forward_calls[name] += 1
+
+            return hook
+
+        model.register_forward_hook(_counter("target"))
+        draft.register_forward_hook(_counter("draft"))
+        self._draft_model = draft
 
-    def generate(self, prompt: str) -> str:
+    def _run_pipeline(self, prompt: str, stats: Dict[str, int] | None = None) -> str:
+        draft_model = self._draft_model
+        if draft_model is None:
+            result = self._pipeline(prompt, num_return_sequences=1)
+            return result[0].get("generated_text", "") if result else ""
+        forward_calls = {"target": 0, "draft": 0}
+        self._calls.forward_calls = forward_calls
+        try:
+            result = self._pipeline(prompt, num_return_sequences=1, assistant_model=draft_model)
+        except Exception as exc:
+            logger.warning("Assisted generation failed (%s); disabling draft model", exc)
+            self._draft_model = None
+            return self._run_pipeline(prompt, stats)
+        finally:
+            self._calls.forward_calls = None
+        text = result[0].get("generated_text", "") if result else ""
+        tokenizer = self._pipeline.tokenizer
+        new_tokens = max(len(tokenizer(text)["input_ids"]) - len(tokenizer(prompt)["input_ids"]), 0)
+        # Each verification pass of the target keeps the accepted draft tokens plus one of its own.
+        accepted = max(new_tokens - forward_calls["target"], 0)
+        call = {
+            "generations": 1,
+            "draft_tokens": forward_calls["draft"],
+            "accepted_tokens": min(accepted, forward_calls["draft"]),
+        }
+        with self._stats_lock:
+            for key, value in call.items():
+                self.speculative_stats[key] += value
+        if stats is not None:
+            for key, value in call.items():
+                stats[key] = stats.get(key, 0) + value
+        return text
+
+    def _run_pipeline_batch(self, prompts: List[str], stats: Dict[str, int] | None = None) -> List[str]:
+        if self._draft_model is not None or len(prompts) == 1 or self.batch_size <= 1:
+            return [self._run_pipeline(prompt, stats) for prompt in prompts]
+        tokenizer = self._pipeline.tokenizer
+        if tokenizer.pad_token_id is None:
+            tokenizer.pad_token_id = tokenizer.eos_token_id
+        tokenizer.padding_side = "left"
+        results = self._pipeline(prompts, num_return_sequences=1, batch_size=self.batch_size)
+        return [result[0].get("generated_text", "") if result else "" for result in results]
+
+    def acceptance_rate(self) -> float | None:
+        with self._stats_lock:
+            draft_tokens = self.speculative_stats["draft_tokens"]
+            accepted_tokens = self.speculative_stats["accepted_tokens"]
+        return accepted_tokens / draft_tokens if draft_tokens else None
+
+    def _cache_namespace(self) -> str:
+        if self.quantization in {"none", ""}:
+            return self.model_name
+        return f"{self.model_name}@{self.quantization}"
+
+    def generate(self, prompt: str, stats: Dict[str, int] | None = None) -> str:
         if self.backend == "disabled":
             return ""
         if self.backend != "local":
             return ""
-        cache_key = build_cache_key(self.model_name, self.adapter_path, prompt)
+        cache_key = build_cache_key(self._cache_namespace(), self.adapter_path, prompt)
         cached = self._cache.get(cache_key)
         if cached is not None:
             return cached
-        self._load_local()
-        result = self._pipeline(prompt, num_return_sequences=1)
-        if not result:
+        self.load()
+        output = self._run_pipeline(prompt, stats)
+        if not output:
             return ""
-        output = result[0].get("generated_text", "")
         self._cache.set(cache_key, output)
         return output
 
-    def batch_generate(self, prompts: List[str]) -> List[str]:
+    def batch_generate(self, prompts: List[str], stats: Dict[str, int] | None = None) -> List[str]:
         if self.backend == "disabled":
             return ["" for _ in prompts]
         if self.backend != "local":
             return ["" for _ in prompts]
-        self._load_local()
+        self.load()
         outputs: List[str] = []
+        misses: List[int] = []
         for prompt in prompts:
-            cache_key = build_cache_key(self.model_name, self.adapter_path, prompt)
+            cache_key = build_cache_key(self._cache_namespace(), self.adapter_path, prompt)
             cached = self._cache.get(cache_key)
-            if cached is not None:
-                outputs.append(cached)
-                continue
-            result = self._pipeline(prompt, num_return_sequences=1)
-            text = result[0].get("generated_text", "") if result else ""
-            self._cache.set(cache_key, text)
-            outputs.append(text)
+            outputs.append(cached if cached is not None else "")
+            if cached is None:
+                misses.append(len(outputs) - 1)
+        if misses:
+            generated = self._run_pipeline_batch([prompts[index] for index in misses], stats)
+            for index, text in zip(misses, generated):
+                cache_key = build_cache_key(self._cache_namespace(), self.adapter_path, prompts[index])
+                self._cache.set(cache_key, text)
+                outputs[index] = text
         return outputs
 
 
@@ -29,6 +29,14 @@ class LRUCache:
             self._data.popitem(last=False)
 
 
+class NullCache:
+    def get(self, key: str) -> Optional[str]:
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        return None
+
+
 class RedisCache:
     def __init__(self, url: str) -> None:
         import redis
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from pathlib import Path
+
+
+logger = logging.getLogger("codereview")
+
+
+def _adapter_digest(adapter_path: str) -> str:
+    if not adapter_path:
+        return ""
+    root = Path(adapter_path)
+    if not root.exists():
+        return adapter_path
+    digest = hashlib.sha256()
+    files = sorted(path for path in root.rglob("*") if path.is_file()) if root.is_dir() else [root]
+    for path in files:
+        digest.update(str(path.relative_to(root) if root.is_dir() else path.name).encode("utf-8"))
+        with path.open("rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def quantized_cache_path(cache_dir: str, model_name: str, adapter_path: str) -> Path:
+    import torch
+    import transformers
+
+    key = ":".join(
+        [
+            model_name,
+            _adapter_digest(adapter_path),
+            f"torch={torch.__version__}",
+            f"transformers={transformers.__version__}",
+        ]
+    )
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    safe_name = model_name.replace("/", "--")
+    return Path(cache_dir) / f"{safe_name}-{digest}-dynamic-int8.pt"
+
+
+def quantize_dynamic_int8(model):
+    import torch
+
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_dynamic_int8(model_name: str, adapter_path: str, cache_dir: str):
+    import torch
+    from transformers import AutoConfig, AutoModelForCausalLM
+
+    cache_path = quantized_cache_path(cache_dir, model_name, adapter_path)
+    if cache_path.exists():
+        config = AutoConfig.from_pretrained(model_name)
+        model = quantize_dynamic_int8(AutoModelForCausalLM.from_config(config))
+        model.load_state_dict(torch.load(cache_path, map_location="cpu"))
+        logger.info("Loaded dynamic int8 model from %s", cache_path)
+        return model, bool(adapter_path)
+
+    model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+    loaded_adapter = False
+    if adapter_path:
+        try:
+            from peft import PeftModel
+
+            model = PeftModel.from_pretrained(model, adapter_path).merge_and_unload()
+            loaded_adapter = True
+        except Exception:
+            pass
+    model = quantize_dynamic_int8(model)
+    if adapter_path and not loaded_adapter:
+        return model, loaded_adapter
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    torch.save(model.state_dict(), tmp_path)
+    tmp_path.replace(cache_path)
+    logger.info("Quantized %s to dynamic int8 and cached at %s", model_name, cache_path)
+    return model, loaded_adapter
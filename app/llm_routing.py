@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import statistics
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Deque, Dict, List
+
+from app.config import settings
+from app.llm import LLMClient
+from app.pipeline.diff_parser import DiffChange
+
+
+SENSITIVE_PATH_MARKERS = ("auth", "security", "crypto", "secret", "password", "token", "permission", "migration")
+SENSITIVE_FILE_NAMES = {"dockerfile", ".env", "settings.py", "config.py"}
+RISKY_CONTENT_MARKERS = ("PASSWORD", "SECRET", "TOKEN", "EVAL(", "EXEC(", "SUBPROCESS", "PICKLE", "EXECUTE(")
+LOW_WEIGHT_SUFFIXES = {".md", ".rst", ".txt", ".lock", ".csv", ".svg"}
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    tier: str
+    model_name: str
+    reason: str
+    changed_lines: int
+    files: int
+    risk: int
+
+
+def _risk_score(changes: List[DiffChange]) -> int:
+    score = 0
+    for path in {change.file_path for change in changes}:
+        lowered = path.lower()
+        if PurePosixPath(lowered).name in SENSITIVE_FILE_NAMES:
+            score += 1
+        elif any(marker in lowered for marker in SENSITIVE_PATH_MARKERS):
+            score += 1
+    for change in changes:
+        if change.change_type != "added":
+            continue
+        content = change.content.upper()
+        if any(marker in content for marker in RISKY_CONTENT_MARKERS):
+            score += 1
+    return score
+
+
+def _weighted_lines(changes: List[DiffChange]) -> int:
+    total = 0.0
+    for change in changes:
+        suffix = PurePosixPath(change.file_path.lower()).suffix
+        total += 0.25 if suffix in LOW_WEIGHT_SUFFIXES else 1.0
+    return int(total)
+
+
+class ModelRouter:
+    def __init__(self) -> None:
+        self._clients: Dict[str, LLMClient] = {}
+        self._latencies: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=settings.llm_routing_stats_window)
+        )
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def tiers(self) -> Dict[str, str]:
+        tiers = {"large": settings.llm_model}
+        if settings.llm_small_model:
+            tiers["small"] = settings.llm_small_model
+        return tiers
+
+    def route(self, changes: List[DiffChange]) -> RouteDecision:
+        tiers = self.tiers()
+        changed_lines = _weighted_lines(changes)
+        files = len({change.file_path for change in changes})
+        risk = _risk_score(changes)
+        if "small" not in tiers:
+            tier, reason = "large", "single model configured"
+        elif risk > 0:
+            tier, reason = "large", "security-sensitive change"
+        elif changed_lines > settings.llm_routing_small_max_lines:
+            tier, reason = "large", "large diff"
+        elif files > settings.llm_routing_small_max_files:
+            tier, reason = "large", "many files"
+        else:
+            tier, reason = "small", "trivial diff"
+        return RouteDecision(
+            tier=tier,
+            model_name=tiers[tier],
+            reason=reason,
+            changed_lines=changed_lines,
+            files=files,
+            risk=risk,
+        )
+
+    def client_for(self, decision: RouteDecision) -> LLMClient:
+        with self._lock:
+            client = self._clients.get(decision.tier)
+            if client is None:
+                draft = None if decision.tier == "large" else ""
+                client = LLMClient(model_name=decision.model_name, draft_model_name=draft)
+                self._clients[decision.tier] = client
+            return client
+
+    def tier_client(self, tier: str, reason: str = "fixed tier") -> LLMClient:
+        decision = RouteDecision(
+            tier=tier, model_name=self.tiers()[tier], reason=reason, changed_lines=0, files=0, risk=0
+        )
+        return self.client_for(decision)
+
+    def warm(self) -> None:
+        for tier in self.tiers():
+            self.tier_client(tier, reason="warm-up").warm()
+
+    def record_latency(self, tier: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies[tier].append(seconds * 1000)
+            self._counts[tier] += 1
+
+    def stats(self) -> Dict[str, dict]:
+        result: Dict[str, dict] = {}
+        with self._lock:
+            for tier, model_name in self.tiers().items():
+                samples = sorted(self._latencies.get(tier, []))
+                result[tier] = {
+                    "model": model_name,
+                    "requests": self._counts.get(tier, 0),
+                    "mean_ms": round(statistics.mean(samples), 1) if samples else None,
+                    "p50_ms": round(samples[len(samples) // 2], 1) if samples else None,
+                    "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1)
+                    if samples
+                    else None,
+                }
+        return result
+
+
+router = ModelRouter()
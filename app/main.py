@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from uuid import UUID, uuid4
 
+import asyncio
 import logging
 from time import perf_counter
 
 import requests
-from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.models import (
     AgentInfo,
@@ -16,8 +18,10 @@ from app.models import (
     AgentTrace,
     Comment,
     FeedbackEntry,
+    FeedbackRollup,
     FeedbackSummary,
     FeedbackRequest,
+    MessagePage,
     OAuthToken,
     PreferencePair,
     RagIndexRequest,
@@ -25,25 +29,35 @@ from app.models import (
     RagSearchRequest,
     RagUpdateRequest,
     ReviewRequest,
+    ReviewPage,
     ReviewResult,
     ReviewStatus,
+    ReviewSummary,
+    TracePage,
 )
 from app.preference import generate_preference_pairs
 from app.auth import require_api_key
+from app.autoscaler import build_autoscaler
+from app.blobs import diff_blobs, load_review_diff
 from app.config import settings
-from app.pipeline.review import AGENTS, run_review_pipeline
-from app.queue import ReviewJob, ReviewQueue
+from app.db import checkout_stats, pool_status
+from app.durable_queue import DurableReviewQueue
+from app.feedback_rollups import ROLLUP_SCOPES, acceptance_rate
+from app.circuit_breaker import llm_breaker
+from app.llm_routing import router
+from app.pipeline.review import AGENTS
+from app.queue import QueueFullError, ReviewJob, ReviewQueue
 from app.rag.index import RagChunk
 from app.rag.service import RagService
 from app.rag.builder import build_chunks
 from app.storage import InMemoryStore
+from app.storage_async import AsyncStoreAdapter, build_async_store
 from app.storage_sql import SqlStore
-from app.integrations.github import build_summary, create_check_run, post_pr_comment, post_review_comments
-from app.integrations.gitlab import post_mr_comment, post_mr_inline_comments, set_commit_status
 from app.webhook_handlers import handle_github_webhook, handle_gitlab_webhook
 from app.rate_limit import RateLimiter
 from app.sessions import SessionStore
 from app.webhooks import verify_github_signature, verify_gitlab_token
+from app import batching, idempotency, projections, scheduling, worker
 
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
@@ -51,6 +65,12 @@ logger = logging.getLogger("codereview")
 
 app = FastAPI(title="Agentic Code Review API", version="0.1.0")
 store = SqlStore(settings.database_url) if settings.use_database else InMemoryStore()
+aio_store = (
+    build_async_store(store, settings.database_url)
+    if settings.use_database and settings.database_async
+    else AsyncStoreAdapter(store, offload=settings.use_database)
+)
+_background_tasks: set = set()
 rate_limiter = RateLimiter(settings.rate_limit_per_hour) if settings.rate_limit_per_hour > 0 else None
 sessions = SessionStore(settings.session_ttl_hours)
 
@@ -83,87 +103,270 @@ def health_check() -> dict:
 
 @app.on_event("startup")
 async def start_workers() -> None:
-    app.state.queue = ReviewQueue()
+    executor = settings.review_executor
+    if executor == "process" and not settings.use_database:
+        logger.warning("Process executor requires USE_DATABASE=1; falling back to threads")
+        executor = "thread"
+    queue_options = dict(
+        workers=settings.review_workers,
+        executor=executor,
+        initializer=worker.init_process_worker if executor == "process" else None,
+        max_size=settings.review_queue_max_size,
+        admission=settings.review_queue_admission,
+        default_retry_after=settings.review_queue_retry_after_seconds,
+        aging_seconds=settings.schedule_aging_seconds,
+        max_running_per_repo=settings.schedule_max_running_per_repo,
+        max_workers=settings.review_workers_max if settings.review_autoscale else 0,
+    )
+    backend = settings.review_queue_backend
+    if backend == "sqlite" and not settings.use_database:
+        logger.warning("SQLite review queue requires USE_DATABASE=1; falling back to memory")
+        backend = "memory"
+    if backend == "sqlite":
+        app.state.queue = DurableReviewQueue(
+            settings.review_queue_path,
+            visibility_timeout=settings.review_queue_visibility_timeout_seconds,
+            max_attempts=settings.review_queue_max_attempts,
+            retry_backoff=settings.review_queue_retry_backoff_seconds,
+            on_dead=lambda job, error: _background(
+                aio_store.mark_failed(job.review_id, f"Review job failed: {error}")
+            ),
+            **queue_options,
+        )
+    else:
+        app.state.queue = ReviewQueue(**queue_options)
+    app.state.autoscaler = build_autoscaler() if settings.review_autoscale else None
     app.state.rag_index = RagService()
+    worker.configure(store, app.state.rag_index)
+
+    app.state.checkpoint_pruner = asyncio.create_task(_prune_checkpoints())
 
     if not settings.use_celery:
-        async def handle_job(job: ReviewJob) -> None:
-            store.mark_in_progress(job.review_id)
-            try:
-                comments, traces, messages = run_review_pipeline(
-                    job.review_id, job.diff_text, rag_index=app.state.rag_index
-                )
-                store.add_comments(job.review_id, comments)
-                store.add_traces(job.review_id, traces)
-                store.add_messages(job.review_id, messages)
-                store.complete_review(job.review_id)
-                review = store.get_review(job.review_id)
-                pr_url = review.metadata.get("pr_url")
-                if pr_url and settings.github_token:
-                    commit_id = review.metadata.get("commit_id")
-                    post_pr_comment(pr_url, build_summary(comments), settings.github_token)
-                    post_review_comments(
-                        pr_url,
-                        "Inline review comments",
-                        comments,
-                        settings.github_token,
-                        commit_id=commit_id,
-                    )
-                    if commit_id:
-                        create_check_run(
-                            pr_url,
-                            commit_id,
-                            "AI Code Review",
-                            build_summary(comments),
-                            settings.github_token,
-                        )
-                if pr_url and settings.gitlab_token:
-                    commit_id = review.metadata.get("commit_id")
-                    post_mr_comment(pr_url, build_summary(comments), settings.gitlab_token)
-                    post_mr_inline_comments(pr_url, comments, settings.gitlab_token, commit_id=commit_id)
-                    if commit_id:
-                        set_commit_status(
-                            pr_url,
-                            commit_id,
-                            "success",
-                            "AI review completed",
-                            settings.gitlab_token,
-                        )
-            except Exception as exc:
-                store.mark_failed(job.review_id, str(exc))
-
-        await app.state.queue.start(handle_job)
+        await app.state.queue.start(worker.run_review_job, deferred_handler=worker.run_critic_job)
+        if app.state.autoscaler is not None:
+            app.state.autoscaler.start(app.state.queue, settings.review_autoscale_interval_seconds)
+
+
+@app.on_event("shutdown")
+async def stop_workers() -> None:
+    if app.state.autoscaler is not None:
+        await app.state.autoscaler.stop()
+    await app.state.queue.stop(timeout=settings.review_drain_timeout_seconds)
+    app.state.checkpoint_pruner.cancel()
+    await asyncio.gather(app.state.checkpoint_pruner, return_exceptions=True)
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+    await aio_store.dispose()
+
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
-async def enqueue_review(diff_text: str, metadata: dict) -> UUID:
-    review = store.create_review(metadata=metadata)
+async def _prune_checkpoints() -> None:
+    while True:
+        await asyncio.sleep(settings.checkpoint_prune_interval_seconds)
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.checkpoint_retention_seconds)
+        try:
+            pruned = await aio_store.prune_checkpoints(cutoff)
+        except Exception as exc:
+            logger.warning("Pruning review checkpoints failed: %s", exc)
+            continue
+        if pruned:
+            logger.info("Pruned %s checkpoints of failed or superseded reviews", pruned)
+
+
+def _background(coro) -> None:
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _supersede_older(review_id: UUID, metadata: dict) -> bool:
+    pr_key = metadata.get("pr_url")
+    if not pr_key:
+        return False
+    superseded = await aio_store.supersede_pr_reviews(pr_key, review_id)
+    if review_id in superseded:
+        logger.info("Review %s arrived after a newer update of %s; not running it", review_id, pr_key)
+        return True
+    for superseded_id in superseded:
+        logger.info("Review %s superseded by %s", superseded_id, review_id)
+    return False
+
+
+async def _dispatch_review(
+    review_id: UUID, metadata: dict, dedupe_key: str = "", reserved: bool = False
+) -> None:
+    lane = metadata["lane"]
     if settings.use_celery:
-        from app.tasks import process_review
+        from app.tasks import enqueue_batched_review, process_review
+
+        if batching.should_batch(metadata):
+            enqueue_batched_review(str(review_id), metadata["diff_ref"])
+            return
+        process_review.apply_async(
+            (str(review_id), metadata["diff_ref"]),
+            queue=scheduling.celery_queue(lane),
+            priority=scheduling.celery_priority(lane),
+        )
+        return
+    await app.state.queue.enqueue(
+        ReviewJob(
+            review_id=review_id,
+            diff_ref=metadata["diff_ref"],
+            priority=scheduling.LANE_PRIORITY[lane],
+            dedupe_key=dedupe_key,
+            lane=lane,
+            cost=metadata.get("diff_lines", 0),
+            repo=metadata.get("repo") or "",
+            pr_key=metadata.get("pr_url") or "",
+        ),
+        reserved=reserved,
+    )
 
-        process_review.delay(str(review.id), diff_text)
-    else:
-        await app.state.queue.enqueue(ReviewJob(review_id=review.id, diff_text=diff_text))
+
+async def _admit(lane: str) -> bool:
+    if settings.use_celery:
+        return False
+    for shed in app.state.queue.make_room(scheduling.LANE_PRIORITY[lane]):
+        _background(aio_store.mark_failed(shed.review_id, "Shed by admission control: review queue full"))
+    return True
+
+
+def _release_slot(reserved: bool) -> None:
+    if reserved:
+        app.state.queue.release_slot()
+
+
+async def enqueue_review(diff_text: str, metadata: dict) -> UUID:
+    keys = idempotency.review_keys(diff_text, metadata)
+    existing = await aio_store.find_review_by_keys(keys)
+    if existing is not None:
+        return existing.id
+    dedupe_key = keys[0] if keys else ""
+    if not settings.use_celery:
+        duplicate = app.state.queue.find_duplicate(dedupe_key)
+        if duplicate is not None:
+            return duplicate
+    metadata = {**metadata, "lane": scheduling.classify(diff_text, metadata)}
+    metadata["diff_ref"] = await asyncio.to_thread(diff_blobs().put, diff_text)
+    metadata["diff_lines"] = scheduling.diff_size(diff_text)
+    # Claim before admission: a duplicate that lost the claim race must not
+    # take a queue slot or shed someone else's job.
+    review, created = await aio_store.claim_review(metadata, keys)
+    if not created:
+        return review.id
+    try:
+        reserved = await _admit(metadata["lane"])
+    except QueueFullError:
+        await aio_store.mark_failed(review.id, "Rejected by admission control: review queue full")
+        raise
+    try:
+        if await _supersede_older(review.id, metadata):
+            _release_slot(reserved)
+            return review.id
+        if not settings.use_celery:
+            app.state.queue.drop_superseded(metadata.get("pr_url") or "", review.id)
+    except BaseException:
+        _release_slot(reserved)
+        raise
+    await _dispatch_review(review.id, metadata, dedupe_key, reserved=reserved)
     return review.id
 
 
 @app.post("/api/reviews", response_model=ReviewResult)
 async def create_review(request: ReviewRequest) -> ReviewResult:
-    metadata = {"repo": request.repo, "commit": request.commit, "diff": request.diff}
+    metadata = {"source": "api", "repo": request.repo, "commit": request.commit}
     review_id = await enqueue_review(request.diff, metadata)
-    return store.get_result(review_id)
+    return await aio_store.get_result(review_id)
+
+
+@app.post("/api/reviews/{review_id}/retry", response_model=ReviewStatus)
+async def retry_review(review_id: UUID) -> ReviewStatus:
+    try:
+        review = await aio_store.get_review(review_id)
+    except Exception:
+        raise HTTPException(status_code=404, detail="Review not found")
+    if review.status != "failed":
+        raise HTTPException(status_code=409, detail="Only failed reviews can be retried")
+    metadata = dict(review.metadata)
+    if not metadata.get("diff_ref"):
+        if "diff" not in metadata:
+            raise HTTPException(status_code=409, detail="Review diff is not stored")
+        diff_text = metadata["diff"]
+        diff_ref = await asyncio.to_thread(diff_blobs().put, diff_text)
+        metadata = (
+            await aio_store.update_metadata(
+                review_id,
+                {
+                    "diff_ref": diff_ref,
+                    "diff_lines": scheduling.diff_size(diff_text),
+                    "lane": metadata.get("lane") or scheduling.classify(diff_text, metadata),
+                },
+            )
+        ).metadata
+    reserved = await _admit(metadata["lane"])
+    await _dispatch_review(review_id, metadata, reserved=reserved)
+    return await aio_store.get_review(review_id)
 
 
-@app.get("/api/reviews/{review_id}", response_model=ReviewStatus)
-def get_review_status(review_id: UUID) -> ReviewStatus:
+@app.get("/api/reviews/{review_id}/diff")
+def get_review_diff(review_id: UUID) -> dict:
     try:
-        return store.get_review(review_id)
+        review = store.get_review(review_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Review not found")
+    try:
+        diff_text = load_review_diff(review.metadata)
+    except (KeyError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail="Review diff not found")
+    return {"review_id": str(review_id), "diff_ref": review.metadata.get("diff_ref"), "diff": diff_text}
 
 
-@app.get("/api/reviews", response_model=list[ReviewStatus])
-def list_reviews() -> list[ReviewStatus]:
-    return store.list_reviews()
+def _review_fields(fields: str | None) -> list[str]:
+    try:
+        return projections.parse_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/api/reviews/{review_id}", response_model=ReviewSummary, response_model_exclude_unset=True)
+def get_review_status(review_id: UUID, fields: str | None = None) -> ReviewSummary:
+    summary = store.get_review_summary(review_id, _review_fields(fields))
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Review not found")
+    return ReviewSummary(**summary)
+
+
+@app.get("/api/reviews", response_model=ReviewPage, response_model_exclude_unset=True)
+def list_reviews(
+    limit: int = Query(default=50, ge=1, le=settings.api_page_size_max),
+    cursor: str | None = None,
+    status: str | None = None,
+    repo: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    fields: str | None = None,
+) -> ReviewPage:
+    try:
+        items, next_cursor = store.page_review_summaries(
+            _review_fields(fields),
+            limit,
+            cursor=cursor,
+            status=status,
+            repo=repo,
+            created_after=created_after,
+            created_before=created_before,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return ReviewPage(items=[ReviewSummary(**item) for item in items], next_cursor=next_cursor)
 
 
 @app.get("/api/reviews/{review_id}/comments", response_model=list[Comment])
@@ -219,6 +422,31 @@ def feedback_summary(review_id: UUID) -> FeedbackSummary:
     return FeedbackSummary(review_id=review_id, **summary)
 
 
+def _feedback_rollup(rollup: dict) -> FeedbackRollup:
+    return FeedbackRollup(**rollup, acceptance_rate=acceptance_rate(rollup["up"], rollup["down"]))
+
+
+def _rollup_scope(scope: str) -> str:
+    if scope not in ROLLUP_SCOPES:
+        raise HTTPException(status_code=404, detail="Unknown rollup scope")
+    return scope
+
+
+@app.get("/api/feedback/rollups/{scope}", response_model=list[FeedbackRollup])
+def list_feedback_rollups(
+    scope: str, limit: int = Query(default=50, ge=1, le=settings.api_page_size_max)
+) -> list[FeedbackRollup]:
+    return [_feedback_rollup(rollup) for rollup in store.list_feedback_rollups(_rollup_scope(scope), limit)]
+
+
+@app.get("/api/feedback/rollups/{scope}/{key:path}", response_model=FeedbackRollup)
+def get_feedback_rollup(scope: str, key: str) -> FeedbackRollup:
+    rollup = store.feedback_rollup(_rollup_scope(scope), key)
+    if rollup is None:
+        rollup = {"scope": scope, "key": key, "up": 0, "down": 0, "neutral": 0}
+    return _feedback_rollup(rollup)
+
+
 def _build_preferences(review_id: UUID, limit: int) -> list[PreferencePair]:
     feedback = store.list_feedback(review_id)
     if not feedback:
@@ -235,7 +463,7 @@ def _build_preferences(review_id: UUID, limit: int) -> list[PreferencePair]:
     if not positive or not negative:
         return []
 
-    diff_text = store.get_review(review_id).metadata.get("diff", "")
+    diff_text = load_review_diff(store.get_review(review_id).metadata)
     prompt = f"Review this code diff:\n\n{diff_text}".strip()
 
     pairs: list[PreferencePair] = []
@@ -270,7 +498,7 @@ def export_auto_preferences(review_id: UUID) -> list[PreferencePair]:
         review = store.get_review(review_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Review not found")
-    diff_text = review.metadata.get("diff", "")
+    diff_text = load_review_diff(review.metadata)
     pairs = generate_preference_pairs(diff_text)
     prompt = f"Review this code diff:\n\n{diff_text}".strip()
     return [
@@ -288,7 +516,7 @@ def export_auto_preferences(review_id: UUID) -> list[PreferencePair]:
 def export_all_auto_preferences(limit: int = 200) -> list[PreferencePair]:
     pairs: list[PreferencePair] = []
     for review in store.list_reviews():
-        diff_text = review.metadata.get("diff", "")
+        diff_text = load_review_diff(review.metadata)
         prompt = f"Review this code diff:\n\n{diff_text}".strip()
         for chosen, rejected in generate_preference_pairs(diff_text):
             pairs.append(
@@ -321,8 +549,15 @@ def reset_store(_user: str = Depends(require_api_key)) -> dict:
         store.comments.clear()
         store.traces.clear()
         store.messages.clear()
+        store.trace_log.clear()
+        store.message_log.clear()
+        store.trace_positions.clear()
+        store.message_positions.clear()
         store.feedback.clear()
+        store.feedback_rollups.clear()
+        store.idempotency_keys.clear()
         app.state.rag_index = RagService()
+        worker.configure(store, app.state.rag_index)
         return {"status": "reset"}
     raise HTTPException(status_code=400, detail="Reset only supported for in-memory store")
 
@@ -332,19 +567,83 @@ def list_agents() -> list[AgentInfo]:
     return [AgentInfo(**agent) for agent in AGENTS]
 
 
+@app.get("/api/queue/stats")
+def queue_stats() -> dict:
+    return app.state.queue.stats()
+
+
+@app.get("/api/db/pool")
+def db_pool_stats() -> dict:
+    engine = getattr(store, "engine", None)
+    return {
+        "sync": {**(pool_status(engine) if engine is not None else {}), **checkout_stats["sync"].snapshot()},
+        "async": {**aio_store.pool_status(), **checkout_stats["async"].snapshot()},
+    }
+
+
+@app.get("/api/queue/autoscaler")
+def queue_autoscaler() -> dict:
+    if app.state.autoscaler is None:
+        return {"enabled": False, "workers": app.state.queue.active_workers}
+    return {"enabled": True, "workers": app.state.queue.active_workers, **app.state.autoscaler.snapshot()}
+
+
+@app.get("/api/llm/routing")
+def llm_routing_stats() -> dict:
+    return router.stats()
+
+
+@app.get("/api/llm/breaker")
+def llm_breaker_state() -> dict:
+    return llm_breaker.snapshot()
+
+
 @app.get("/api/auth/tokens")
 def list_oauth_tokens(provider: str, user_id: str) -> list[OAuthToken]:
     return store.list_oauth_tokens(provider, user_id)
 
 
-@app.get("/api/agents/{agent_id}/trace", response_model=list[AgentTrace])
-def get_agent_trace(agent_id: str) -> list[AgentTrace]:
-    return store.list_traces_by_agent(agent_id)
-
-
-@app.get("/api/agents/{agent_id}/messages", response_model=list[AgentMessage])
-def get_agent_messages(agent_id: str) -> list[AgentMessage]:
-    return store.list_messages_by_agent(agent_id)
+@app.get("/api/agents/{agent_id}/trace", response_model=TracePage)
+def get_agent_trace(
+    agent_id: str,
+    limit: int = Query(default=50, ge=1, le=settings.api_page_size_max),
+    cursor: str | None = None,
+    review_id: UUID | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> TracePage:
+    try:
+        items, next_cursor = store.page_traces_by_agent(
+            agent_id, limit, cursor=cursor, review_id=review_id, since=since, until=until
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return TracePage(items=items, next_cursor=next_cursor)
+
+
+@app.get("/api/agents/{agent_id}/messages", response_model=MessagePage)
+def get_agent_messages(
+    agent_id: str,
+    limit: int = Query(default=50, ge=1, le=settings.api_page_size_max),
+    cursor: str | None = None,
+    review_id: UUID | None = None,
+    message_type: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> MessagePage:
+    try:
+        items, next_cursor = store.page_messages_by_agent(
+            agent_id,
+            limit,
+            cursor=cursor,
+            review_id=review_id,
+            message_type=message_type,
+            since=since,
+            until=until,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return MessagePage(items=items, next_cursor=next_cursor)
 
 
 @app.post("/api/rag/index")
@@ -508,19 +807,21 @@ def get_session(x_session_token: str | None = Header(default=None)) -> dict:
 async def github_webhook(
     request: Request,
     x_hub_signature_256: str | None = Header(default=None),
+    x_github_delivery: str | None = Header(default=None),
 ) -> dict:
     payload = await request.body()
     if not verify_github_signature(settings.github_webhook_secret, payload, x_hub_signature_256):
         raise HTTPException(status_code=401, detail="Invalid signature")
-    return await handle_github_webhook(payload, enqueue_review)
+    return await handle_github_webhook(payload, enqueue_review, delivery_id=x_github_delivery)
 
 
 @app.post("/api/webhooks/gitlab")
 async def gitlab_webhook(
     request: Request,
     x_gitlab_token: str | None = Header(default=None),
+    x_gitlab_event_uuid: str | None = Header(default=None),
 ) -> dict:
     payload = await request.body()
     if not verify_gitlab_token(settings.gitlab_webhook_secret, x_gitlab_token):
         raise HTTPException(status_code=401, detail="Invalid token")
-    return await handle_gitlab_webhook(payload, enqueue_review)
+    return await handle_gitlab_webhook(payload, enqueue_review, delivery_id=x_gitlab_event_uuid)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import logging
+import sys
+import zlib
+from datetime import datetime
+from typing import Callable, List, Set, Tuple
+
+from sqlalchemy import case, delete, func, insert, inspect, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db_models import (
+    Base,
+    CommentModel,
+    DiffBlobModel,
+    FeedbackModel,
+    FeedbackRollupModel,
+    IdempotencyKeyModel,
+    MessageModel,
+    OAuthTokenModel,
+    ReviewModel,
+    SchemaVersionModel,
+    TraceModel,
+)
+from app.feedback_rollups import RATING_BUCKETS
+
+
+logger = logging.getLogger("codereview")
+
+
+def _add_columns(conn: Connection, model, names: List[str]) -> None:
+    table = model.__table__
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for name in names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        column_type = column.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+
+
+def _create_indexes(conn: Connection, model, names: List[str] | None = None) -> None:
+    for index in model.__table__.indexes:
+        if names is None or index.name in names:
+            index.create(conn, checkfirst=True)
+
+
+def _baseline(conn: Connection) -> None:
+    Base.metadata.create_all(conn)
+
+
+def _review_columns(conn: Connection) -> None:
+    _add_columns(conn, ReviewModel, ["pr_key", "lease_owner", "lease_expires_at"])
+    _create_indexes(conn, ReviewModel, ["ix_reviews_pr_key"])
+
+
+def _lookup_indexes(conn: Connection) -> None:
+    _create_indexes(conn, ReviewModel, ["ix_reviews_created_at_id", "ix_reviews_status_created_at"])
+    for model in (CommentModel, TraceModel, MessageModel, FeedbackModel, OAuthTokenModel, IdempotencyKeyModel):
+        _create_indexes(conn, model)
+
+
+def _review_repo_column(conn: Connection) -> None:
+    _add_columns(conn, ReviewModel, ["repo"])
+    reviews = ReviewModel.__table__
+    rows = conn.execute(select(reviews.c.id, reviews.c.meta).where(reviews.c.repo.is_(None))).all()
+    for review_id, meta in rows:
+        repo = (meta or {}).get("repo")
+        if repo:
+            conn.execute(update(reviews).where(reviews.c.id == review_id).values(repo=repo))
+    _create_indexes(conn, ReviewModel, ["ix_reviews_repo_created_at"])
+
+
+def _legacy_diffs(conn: Connection) -> bool:
+    from app.blobs import blob_ref
+    from app.config import settings
+    from app.scheduling import diff_size
+
+    reviews = ReviewModel.__table__
+    ids = conn.execute(select(reviews.c.id).where(reviews.c.meta["diff"].as_string().is_not(None))).scalars().all()
+    if not ids:
+        return True
+    if settings.diff_blob_backend != "db":
+        logger.info("Keeping %s legacy inline review diffs until DIFF_BLOB_BACKEND is db", len(ids))
+        return False
+    DiffBlobModel.__table__.create(conn, checkfirst=True)
+    for review_id in ids:
+        meta = dict(conn.execute(select(reviews.c.meta).where(reviews.c.id == review_id)).scalar_one() or {})
+        diff_text = meta.pop("diff", None)
+        if not isinstance(diff_text, str):
+            continue
+        data = diff_text.encode("utf-8")
+        ref = blob_ref(data)
+        if conn.execute(select(DiffBlobModel.ref).where(DiffBlobModel.ref == ref)).first() is None:
+            conn.execute(
+                insert(DiffBlobModel).values(
+                    ref=ref, payload=zlib.compress(data), size=len(data), created_at=datetime.utcnow()
+                )
+            )
+        meta.setdefault("diff_ref", ref)
+        meta.setdefault("diff_lines", diff_size(diff_text))
+        conn.execute(update(reviews).where(reviews.c.id == review_id).values(meta=meta))
+    logger.info("Moved %s legacy review diffs to the diff_blobs table", len(ids))
+    return True
+
+
+def _feedback_rollups(conn: Connection) -> None:
+    FeedbackRollupModel.__table__.create(conn, checkfirst=True)
+    conn.execute(delete(FeedbackRollupModel))
+    feedback = FeedbackModel.__table__
+    bucket = case((feedback.c.rating > 0, "up"), (feedback.c.rating < 0, "down"), else_="neutral")
+    dimensions = [
+        ("review", feedback.c.review_id, feedback),
+        ("agent", CommentModel.agent_id, feedback.join(CommentModel, CommentModel.id == feedback.c.comment_id)),
+        ("repo", ReviewModel.repo, feedback.join(ReviewModel, ReviewModel.id == feedback.c.review_id)),
+        ("day", func.date(feedback.c.created_at), feedback),
+    ]
+    now = datetime.utcnow()
+    for scope, key_column, source in dimensions:
+        rows = conn.execute(
+            select(key_column, bucket, func.count())
+            .select_from(source)
+            .where(key_column.is_not(None))
+            .group_by(key_column, bucket)
+        ).all()
+        totals: dict = {}
+        for key, name, count in rows:
+            totals.setdefault(str(key), dict.fromkeys(RATING_BUCKETS, 0))[name] += count
+        if totals:
+            conn.execute(
+                insert(FeedbackRollupModel),
+                [{"scope": scope, "key": key, **counts, "updated_at": now} for key, counts in totals.items()],
+            )
+
+
+# An upgrade that returns False is deferred: it is not recorded and runs
+# again on the next migrate().
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], bool | None]]] = [
+    (1, "baseline schema", _baseline),
+    (2, "review pr_key and lease columns", _review_columns),
+    (3, "lookup indexes", _lookup_indexes),
+    (4, "review repo column", _review_repo_column),
+    (5, "move legacy review diffs to blob table", _legacy_diffs),
+    (6, "feedback rollups", _feedback_rollups),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def applied_versions(engine) -> Set[int]:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(SchemaVersionModel.__tablename__):
+            return set()
+        return set(conn.execute(select(SchemaVersionModel.version)).scalars().all())
+
+
+def current_version(engine) -> int:
+    return max(applied_versions(engine), default=0)
+
+
+def migrate(engine, target: int | None = None) -> List[int]:
+    target = LATEST_VERSION if target is None else target
+    applied: List[int] = []
+    for version, name, upgrade in MIGRATIONS:
+        if version > target or version in applied_versions(engine):
+            continue
+        try:
+            with engine.begin() as conn:
+                SchemaVersionModel.__table__.create(conn, checkfirst=True)
+                if upgrade(conn) is False:
+                    logger.info("Deferred schema migration %s: %s", version, name)
+                    continue
+                conn.execute(
+                    SchemaVersionModel.__table__.insert().values(
+                        version=version, name=name, applied_at=datetime.utcnow()
+                    )
+                )
+        except SQLAlchemyError:
+            if version in applied_versions(engine):
+                continue
+            raise
+        logger.info("Applied schema migration %s: %s", version, name)
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from app.config import settings
+    from app.db import build_engine
+
+    url = sys.argv[1] if len(sys.argv) > 1 else settings.database_url
+    engine = build_engine(url)
+    applied = migrate(engine)
+    print(f"schema version {current_version(engine)} (applied: {applied or 'none'})")
@@ -59,6 +59,15 @@ class FeedbackSummary(BaseModel):
     neutral: int
 
 
+class FeedbackRollup(BaseModel):
+    scope: str
+    key: str
+    up: int
+    down: int
+    neutral: int
+    acceptance_rate: Optional[float]
+
+
 class PreferencePair(BaseModel):
     review_id: UUID
     prompt: str
@@ -94,6 +103,36 @@ class AgentTrace(BaseModel):
     output_summary: str
 
 
+class ReviewSummary(BaseModel):
+    id: UUID
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    repo: Optional[str] = None
+    pr_url: Optional[str] = None
+    lane: Optional[str] = None
+    source: Optional[str] = None
+    diff_lines: Optional[int] = None
+    degraded: Optional[bool] = None
+    error: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class ReviewPage(BaseModel):
+    items: List[ReviewSummary]
+    next_cursor: Optional[str] = None
+
+
+class TracePage(BaseModel):
+    items: List[AgentTrace]
+    next_cursor: Optional[str] = None
+
+
+class MessagePage(BaseModel):
+    items: List[AgentMessage]
+    next_cursor: Optional[str] = None
+
+
 class RagChunkRequest(BaseModel):
     chunk_id: str
     content: str
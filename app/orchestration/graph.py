@@ -1,172 +1,281 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import operator
+import threading
 from datetime import datetime
-from typing import List, Tuple
+from typing import Annotated, Any, Dict, List, Tuple, TypedDict
 from uuid import UUID
 
 try:
-    from langgraph.graph import END, StateGraph
+    from langgraph.graph import END, START, StateGraph
 except Exception:  # pragma: no cover
     StateGraph = None
+    START = None
     END = None
 
+from app.agents.base import AgentFinding
 from app.agents.orchestrator import AgentOrchestrator
-from app.llm import LLMClient, parse_findings, parse_json_block
-from app.prompts import critic_prompt
+from app.circuit_breaker import llm_breaker
 from app.models import AgentMessage, AgentTrace, Comment
-from app.pipeline.diff_parser import parse_diff
-from app.rag.service import RagService
+from app.pipeline.checkpoints import (
+    ReviewCheckpointer,
+    dump_agent_result,
+    dump_changes,
+    load_agent_result,
+    load_changes,
+)
+from app.pipeline.diff_parser import DiffChange, parse_diff
+from app.rag.index import RagChunk
 
 
-@dataclass
-class GraphState:
+def _merge_findings(
+    left: Dict[str, List[AgentFinding]], right: Dict[str, List[AgentFinding]]
+) -> Dict[str, List[AgentFinding]]:
+    return {**left, **right}
+
+
+class GraphState(TypedDict, total=False):
     review_id: UUID
     diff_text: str
+    changes: List[DiffChange]
     rag_context: str
+    agent_findings: Annotated[Dict[str, List[AgentFinding]], _merge_findings]
+    degraded: Annotated[bool, operator.or_]
     comments: List[Comment]
-    traces: List[AgentTrace]
-    messages: List[AgentMessage]
+    traces: Annotated[List[AgentTrace], operator.add]
+    messages: Annotated[List[AgentMessage], operator.add]
 
 
-def build_graph() -> StateGraph:
-    if StateGraph is None:
-        raise RuntimeError("LangGraph not available")
+def _services(config: Dict[str, Any]) -> Dict[str, Any]:
+    return (config or {}).get("configurable", {})
 
-    graph = StateGraph(GraphState)
 
-    def parse_step(state: GraphState) -> GraphState:
-        state.messages.append(
+def _checkpoints(config: Dict[str, Any], state: GraphState) -> ReviewCheckpointer:
+    return _services(config).get("checkpointer") or ReviewCheckpointer(None, state["review_id"])
+
+
+def parse_step(state: GraphState, config) -> dict:
+    checkpoints = _checkpoints(config, state)
+    checkpoints.ensure_current()
+    saved = checkpoints.get("parse")
+    if saved is None:
+        changes = parse_diff(state["diff_text"])
+        checkpoints.save("parse", dump_changes(changes))
+    else:
+        changes = load_changes(saved)
+    return {
+        "changes": changes,
+        "messages": [
             AgentMessage(
                 agent_id="parser",
                 message_type="parsed",
                 timestamp=datetime.utcnow(),
-                payload={"diff_len": len(state.diff_text)},
+                payload={"diff_len": len(state["diff_text"]), "changes": len(changes)},
             )
-        )
-        return state
+        ],
+    }
 
-    def rag_step(state: GraphState) -> GraphState:
-        rag = RagService()
-        retrieved = rag.query(state.diff_text, limit=5)
-        state.rag_context = "\n".join(chunk.content for chunk in retrieved)
-        state.messages.append(
+
+def rag_step(state: GraphState, config) -> dict:
+    checkpoints = _checkpoints(config, state)
+    checkpoints.ensure_current()
+    saved = checkpoints.get("rag")
+    if saved is not None:
+        return {"rag_context": saved}
+    rag_index = _services(config).get("rag_index")
+    retrieved: List[RagChunk] = []
+    if rag_index is not None:
+        results = rag_index.query(state["diff_text"], limit=5)
+        if isinstance(results, list):
+            retrieved = [chunk for chunk in results if isinstance(chunk, RagChunk)]
+    rag_context = "\n".join(chunk.content for chunk in retrieved)
+    checkpoints.save("rag", rag_context)
+    return {
+        "rag_context": rag_context,
+        "messages": [
             AgentMessage(
                 agent_id="rag",
                 message_type="context",
                 timestamp=datetime.utcnow(),
                 payload={"chunks": len(retrieved)},
             )
-        )
-        return state
-
-    def agent_step(state: GraphState) -> GraphState:
-        orchestrator = AgentOrchestrator()
-        changes = parse_diff(state.diff_text)
-        result = orchestrator.run(changes, state.rag_context)
-        state.traces.extend(result.traces)
-        state.comments.extend(
-            [
-                Comment(
-                    review_id=state.review_id,
-                    agent_id=agent_id,
-                    file_path=finding.file_path,
-                    line_number=finding.line_number,
-                    severity=finding.severity,
-                    content=finding.description,
-                    metadata={"category": finding.category, "suggestion": finding.suggestion},
-                )
-                for agent_id, finding in result.findings
-            ]
-        )
-        state.messages.append(
+        ],
+    }
+
+
+def agents_step(state: GraphState, config) -> dict:
+    from app.pipeline.review import degraded_reason_for
+
+    checkpoints = _checkpoints(config, state)
+    checkpoints.ensure_current()
+    orchestrator: AgentOrchestrator = _services(config)["orchestrator"]
+    agent_findings: Dict[str, List[AgentFinding]] = {}
+    traces: List[AgentTrace] = []
+    degraded = False
+    pending = []
+    for agent in orchestrator.agents:
+        saved = checkpoints.get(f"agent:{agent.id}")
+        if saved is None:
+            pending.append(agent)
+            continue
+        findings, agent_traces, agent_degraded = load_agent_result(saved)
+        agent_findings[agent.id] = findings
+        traces.extend(agent_traces)
+        degraded = degraded or agent_degraded
+    if not pending:
+        return {"agent_findings": agent_findings, "degraded": degraded, "traces": traces}
+
+    def save_agent(agent_id: str, findings: list, agent_traces: List[AgentTrace], agent_degraded: bool) -> None:
+        checkpoints.save(f"agent:{agent_id}", dump_agent_result(findings, agent_traces, agent_degraded))
+
+    # One orchestrator call for all agents, so their prompts go out as one
+    # batch and the run carries a single routing decision.
+    result = orchestrator.run(state["changes"], state.get("rag_context", ""), agents=pending, on_agent=save_agent)
+    messages = []
+    for agent in pending:
+        findings = [finding for agent_id, finding in result.findings if agent_id == agent.id]
+        agent_findings[agent.id] = findings
+        messages.append(
             AgentMessage(
-                agent_id="orchestrator",
+                agent_id=agent.id,
                 message_type="result",
                 timestamp=datetime.utcnow(),
-                payload={"findings": len(result.findings)},
+                payload={"findings": len(findings)},
             )
         )
-        return state
-
-    def critic_step(state: GraphState) -> GraphState:
-        if not state.comments:
-            return state
-        review_text = "\n".join(
-            f"- [{comment.severity}] {comment.file_path}:{comment.line_number or '?'} {comment.content}"
-            for comment in state.comments
-        )
-        client = LLMClient()
-        prompt = critic_prompt(state.diff_text, review_text)
-        output = client.generate(prompt)
-        payload = parse_json_block(output) or {}
-        preferred_agent = payload.get("preferred_agent")
-        rejected_agent = payload.get("rejected_agent")
-        if preferred_agent or rejected_agent:
-            state.messages.append(
-                AgentMessage(
-                    agent_id="critic",
-                    message_type="preference",
-                    timestamp=datetime.utcnow(),
-                    payload={
-                        "preferred_agent": preferred_agent,
-                        "rejected_agent": rejected_agent,
-                        "notes": payload.get("notes", ""),
-                    },
-                )
+    traces.extend(result.traces)
+    degraded = degraded or result.degraded
+    if degraded:
+        messages.append(
+            AgentMessage(
+                agent_id="orchestrator",
+                message_type="degraded",
+                timestamp=datetime.utcnow(),
+                payload={
+                    "reason": degraded_reason_for(result.degraded_reason),
+                    "breaker": llm_breaker.snapshot(),
+                },
             )
-        findings = parse_findings(payload)
-        for item in findings:
-            state.messages.append(
-                AgentMessage(
-                    agent_id="critic",
-                    message_type="ranking",
-                    timestamp=datetime.utcnow(),
-                    payload=item,
-                )
+        )
+    if "speculative" in result.llm_stats:
+        messages.append(
+            AgentMessage(
+                agent_id="llm",
+                message_type="speculative",
+                timestamp=datetime.utcnow(),
+                payload=result.llm_stats["speculative"],
             )
-        return state
+        )
+    return {"agent_findings": agent_findings, "degraded": degraded, "traces": traces, "messages": messages}
 
-    def aggregate_step(state: GraphState) -> GraphState:
-        severity_order = {"critical": 4, "high": 3, "medium": 2, "low": 1, "info": 0}
-        state.comments.sort(
-            key=lambda comment: severity_order.get(comment.severity, 0), reverse=True
+
+def aggregate_step(state: GraphState, config) -> dict:
+    from app.pipeline.review import _aggregate_findings
+
+    _checkpoints(config, state).ensure_current()
+    orchestrator: AgentOrchestrator = _services(config)["orchestrator"]
+    agent_findings = state.get("agent_findings", {})
+    findings: List[Tuple[str, AgentFinding]] = []
+    for agent in orchestrator.agents:
+        findings.extend((agent.id, finding) for finding in agent_findings.get(agent.id, []))
+    degraded = state.get("degraded", False)
+    comments = [
+        Comment(
+            review_id=state["review_id"],
+            agent_id=agent_id,
+            file_path=finding.file_path,
+            line_number=finding.line_number,
+            severity=finding.severity,
+            content=finding.description,
+            metadata={
+                "category": finding.category,
+                "suggestion": finding.suggestion,
+                "agents": agents,
+                **({"degraded": True} if degraded else {}),
+            },
         )
-        state.messages.append(
+        for agent_id, finding, agents in _aggregate_findings(findings)
+    ]
+    severity_order = {"critical": 4, "high": 3, "medium": 2, "low": 1, "info": 0}
+    comments.sort(key=lambda comment: severity_order.get(comment.severity, 0), reverse=True)
+    return {
+        "comments": comments,
+        "messages": [
             AgentMessage(
                 agent_id="aggregator",
                 message_type="sorted",
                 timestamp=datetime.utcnow(),
-                payload={"total": len(state.comments)},
+                payload={"total": len(comments)},
             )
-        )
-        return state
+        ],
+    }
+
+
+def build_graph() -> StateGraph:
+    if StateGraph is None:
+        raise RuntimeError("LangGraph not available")
 
+    graph = StateGraph(GraphState)
     graph.add_node("parse", parse_step)
     graph.add_node("rag", rag_step)
-    graph.add_node("agent", agent_step)
-    graph.add_edge("parse", "rag")
-    graph.add_edge("rag", "agent")
-    graph.add_node("critic", critic_step)
+    graph.add_edge(START, "parse")
+    graph.add_edge(START, "rag")
+    graph.add_node("agents", agents_step)
+    graph.add_edge(["parse", "rag"], "agents")
     graph.add_node("aggregate", aggregate_step)
-    graph.add_edge("agent", "critic")
-    graph.add_edge("critic", "aggregate")
+    graph.add_edge("agents", "aggregate")
     graph.add_edge("aggregate", END)
-    graph.set_entry_point("parse")
     return graph
 
 
-def run_graph(diff_text: str, review_id) -> Tuple[List[Comment], List[AgentTrace], List[AgentMessage]]:
+_compiled_graph: Any = None
+_compile_lock = threading.Lock()
+
+
+def get_compiled_graph():
+    global _compiled_graph
+    if _compiled_graph is None:
+        with _compile_lock:
+            if _compiled_graph is None:
+                _compiled_graph = build_graph().compile()
+    return _compiled_graph
+
+
+_default_orchestrator: AgentOrchestrator | None = None
+
+
+def run_graph(
+    diff_text: str,
+    review_id,
+    rag_index: object | None = None,
+    orchestrator: AgentOrchestrator | None = None,
+    checkpointer: ReviewCheckpointer | None = None,
+) -> Tuple[List[Comment], List[AgentTrace], List[AgentMessage]]:
+    global _default_orchestrator
     if StateGraph is None:
         raise RuntimeError("LangGraph not available")
-    state = GraphState(
-        review_id=review_id,
-        diff_text=diff_text,
-        rag_context="",
-        comments=[],
-        traces=[],
-        messages=[],
+    if orchestrator is None:
+        if _default_orchestrator is None:
+            _default_orchestrator = AgentOrchestrator()
+        orchestrator = _default_orchestrator
+    graph = get_compiled_graph()
+    result = graph.invoke(
+        {
+            "review_id": review_id,
+            "diff_text": diff_text,
+            "rag_context": "",
+            "agent_findings": {},
+            "degraded": False,
+            "comments": [],
+            "traces": [],
+            "messages": [],
+        },
+        config={
+            "configurable": {
+                "rag_index": rag_index,
+                "orchestrator": orchestrator,
+                "checkpointer": checkpointer,
+            }
+        },
     )
-    graph = build_graph()
-    result = graph.compile().invoke(state)
-    return result.comments, result.traces, result.messages
+    return result["comments"], result["traces"], result["messages"]
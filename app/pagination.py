@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, List, Sequence
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _cursor_value(value: Any, kind: type) -> Any:
+    if kind is datetime:
+        if not isinstance(value, str):
+            raise InvalidCursor("Malformed cursor")
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError as exc:
+            raise InvalidCursor("Malformed cursor") from exc
+        return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise InvalidCursor("Malformed cursor")
+    return value
+
+
+def decode_cursor(cursor: str | None, kinds: Sequence[type]) -> List[Any] | None:
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(values, list) or len(values) != len(kinds):
+        raise InvalidCursor("Malformed cursor")
+    return [_cursor_value(value, kind) for value, kind in zip(values, kinds)]
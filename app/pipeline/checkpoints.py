@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import zlib
+from dataclasses import asdict
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+from app.agents.base import AgentFinding
+from app.models import AgentMessage, AgentTrace
+from app.pipeline.diff_parser import DiffChange
+
+
+def encode_checkpoint(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def decode_checkpoint(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def dump_changes(changes: List[DiffChange]) -> list:
+    return [[change.file_path, change.line_number, change.content, change.change_type] for change in changes]
+
+
+def load_changes(value: list) -> List[DiffChange]:
+    return [
+        DiffChange(file_path=item[0], line_number=item[1], content=item[2], change_type=item[3])
+        for item in value
+    ]
+
+
+def dump_agent_result(
+    findings: List[AgentFinding], traces: List[AgentTrace], degraded: bool
+) -> dict:
+    return {
+        "findings": [asdict(finding) for finding in findings],
+        "traces": [trace.model_dump(mode="json") for trace in traces],
+        "degraded": degraded,
+    }
+
+
+def load_agent_result(value: dict) -> Tuple[List[AgentFinding], List[AgentTrace], bool]:
+    return (
+        [AgentFinding(**item) for item in value.get("findings", [])],
+        [AgentTrace(**item) for item in value.get("traces", [])],
+        bool(value.get("degraded")),
+    )
+
+
+def dump_messages(messages: List[AgentMessage]) -> list:
+    return [message.model_dump(mode="json") for message in messages]
+
+
+def load_messages(value: list) -> List[AgentMessage]:
+    return [AgentMessage(**item) for item in value]
+
+
+class ReviewSuperseded(Exception):
+    pass
+
+
+class LeaseLost(ReviewSuperseded):
+    pass
+
+
+class ReviewCheckpointer:
+    def __init__(
+        self, store: object | None, review_id: UUID, prefix: str = "", lease: object | None = None
+    ) -> None:
+        self.store = store
+        self.review_id = review_id
+        self.prefix = prefix
+        self.lease = lease
+        self._stages: Dict[str, Any] | None = None
+
+    def _load(self) -> Dict[str, Any]:
+        if self._stages is None:
+            self._stages = {}
+            if self.store is not None:
+                for stage, blob in self.store.load_checkpoints(self.review_id).items():
+                    if stage.startswith(self.prefix):
+                        self._stages[stage[len(self.prefix):]] = decode_checkpoint(blob)
+        return self._stages
+
+    def get(self, stage: str) -> Any | None:
+        return self._load().get(stage)
+
+    def completed_stages(self) -> List[str]:
+        return list(self._load().keys())
+
+    def ensure_current(self) -> None:
+        if self.lease is not None and self.lease.lost:
+            raise LeaseLost(str(self.review_id))
+        if self.store is not None and self.store.get_status(self.review_id) == "superseded":
+            raise ReviewSuperseded(str(self.review_id))
+
+    def save(self, stage: str, value: Any) -> None:
+        self._load()[stage] = value
+        if self.store is not None:
+            self.store.save_checkpoint(self.review_id, self.prefix + stage, encode_checkpoint(value))
+
+    def clear(self) -> None:
+        self._stages = {}
+        if self.store is not None:
+            self.store.clear_checkpoints(self.review_id)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from time import perf_counter
+from typing import List
+from uuid import UUID
+
+from app.circuit_breaker import llm_breaker
+from app.config import settings
+from app.llm import parse_findings, parse_json_block
+from app.llm_routing import router
+from app.models import AgentMessage, Comment
+from app.prompts import critic_prompt
+
+
+logger = logging.getLogger("codereview")
+
+
+def should_run_critic(review_id: UUID) -> bool:
+    rate = settings.critic_sample_rate
+    if rate <= 0:
+        return False
+    if rate >= 1:
+        return True
+    return (review_id.int % 10000) < rate * 10000
+
+
+def render_findings(comments: List[Comment]) -> str:
+    return "\n".join(
+        f"- {comment.agent_id} [{comment.severity}] {comment.file_path}:{comment.line_number or '?'} "
+        f"{comment.content}"
+        for comment in comments
+    )
+
+
+def run_critic(diff_text: str, comments: List[Comment]) -> List[AgentMessage]:
+    if not comments:
+        return []
+    permit = llm_breaker.allow()
+    if not permit:
+        logger.info("Skipping critic: LLM circuit breaker is %s", llm_breaker.state)
+        return []
+    client = router.tier_client("large", reason="critic")
+    started = perf_counter()
+    try:
+        output = client.generate(critic_prompt(diff_text, render_findings(comments)))
+    except Exception:
+        llm_breaker.record(perf_counter() - started, ok=False, permit=permit)
+        raise
+    llm_breaker.record(perf_counter() - started, ok=True, permit=permit)
+    payload = parse_json_block(output) or {}
+    messages: List[AgentMessage] = []
+    preferred_agent = payload.get("preferred_agent")
+    rejected_agent = payload.get("rejected_agent")
+    if preferred_agent or rejected_agent:
+        messages.append(
+            AgentMessage(
+                agent_id="critic",
+                message_type="preference",
+                timestamp=datetime.utcnow(),
+                payload={
+                    "preferred_agent": preferred_agent,
+                    "rejected_agent": rejected_agent,
+                    "notes": payload.get("notes", ""),
+                },
+            )
+        )
+    for item in parse_findings(payload):
+        messages.append(
+            AgentMessage(
+                agent_id="critic",
+                message_type="ranking",
+                timestamp=datetime.utcnow(),
+                payload=item,
+            )
+        )
+    if not messages:
+        messages.append(
+            AgentMessage(
+                agent_id="critic",
+                message_type="ranking",
+                timestamp=datetime.utcnow(),
+                payload={"findings_reviewed": len(comments), "ranked": False},
+            )
+        )
+    return messages
@@ -6,8 +6,17 @@ from typing import Dict, List, Tuple
 from uuid import UUID
 
 from app.agents.orchestrator import AgentOrchestrator
+from app.circuit_breaker import llm_breaker
 from app.config import settings
 from app.models import AgentMessage, AgentTrace, Comment
+from app.pipeline.checkpoints import (
+    ReviewCheckpointer,
+    ReviewSuperseded,
+    dump_agent_result,
+    dump_changes,
+    load_agent_result,
+    load_changes,
+)
 from app.pipeline.diff_parser import parse_diff
 from app.rag.index import RagChunk
 
@@ -55,29 +64,142 @@ def _aggregate_findings(
     return [(group["agents"][0], group["finding"], group["agents"]) for group in grouped.values()]
 
 
+def degraded_reason_for(reason: str) -> str:
+    # Agents restored from checkpoints carry no reason; report the breaker instead.
+    return reason or f"llm circuit {llm_breaker.state}"
+
+
+def is_degraded(messages: List[AgentMessage]) -> bool:
+    return any(message.message_type == "degraded" for message in messages)
+
+
 def run_review_pipeline(
-    review_id: UUID, diff_text: str, rag_index: object | None = None
+    review_id: UUID,
+    diff_text: str,
+    rag_index: object | None = None,
+    checkpointer: ReviewCheckpointer | None = None,
 ) -> Tuple[List[Comment], List[AgentTrace], List[AgentMessage]]:
+    checkpoints = checkpointer or ReviewCheckpointer(None, review_id)
     if settings.use_langgraph:
         try:
             from app.orchestration.graph import run_graph
 
-            comments, traces, messages = run_graph(diff_text, review_id)
+            comments, traces, messages = run_graph(
+                diff_text, review_id, rag_index=rag_index, checkpointer=checkpoints
+            )
             return comments, traces, messages
+        except ReviewSuperseded:
+            raise
         except Exception:
             pass
-    changes = parse_diff(diff_text)
+    checkpoints.ensure_current()
+    saved_changes = checkpoints.get("parse")
+    if saved_changes is None:
+        changes = parse_diff(diff_text)
+        checkpoints.save("parse", dump_changes(changes))
+    else:
+        changes = load_changes(saved_changes)
+    orchestrator = AgentOrchestrator()
+    checkpoints.ensure_current()
+    rag_context = checkpoints.get("rag")
+    if rag_context is None:
+        rag_context = ""
+        if rag_index is not None:
+            retrieved = rag_index.query(diff_text, limit=5)
+            if isinstance(retrieved, list) and retrieved and isinstance(retrieved[0], RagChunk):
+                rag_context = "\n".join(chunk.content for chunk in retrieved)
+        checkpoints.save("rag", rag_context)
+
+    agent_results: Dict[str, tuple] = {}
+    pending = []
+    for agent in orchestrator.agents:
+        saved = checkpoints.get(f"agent:{agent.id}")
+        if saved is None:
+            pending.append(agent)
+        else:
+            agent_results[agent.id] = load_agent_result(saved)
+
+    def save_agent(agent_id: str, agent_findings: list, agent_traces: List[AgentTrace], degraded: bool) -> None:
+        agent_results[agent_id] = (agent_findings, agent_traces, degraded)
+        checkpoints.save(f"agent:{agent_id}", dump_agent_result(agent_findings, agent_traces, degraded))
+
+    router_traces: List[AgentTrace] = []
+    llm_stats: dict = {}
+    degraded_reason = ""
+    if pending:
+        checkpoints.ensure_current()
+        result = orchestrator.run(changes, rag_context, agents=pending, on_agent=save_agent)
+        llm_stats = result.llm_stats
+        degraded_reason = result.degraded_reason
+        router_traces = [trace for trace in result.traces if trace.agent_id == "router"]
+
+    checkpoints.ensure_current()
+    return _assemble_review(
+        review_id, changes, orchestrator, agent_results, router_traces, llm_stats, degraded_reason
+    )
+
+
+def run_review_batch(
+    jobs: List[Tuple[UUID, str]], rag_index: object | None = None
+) -> List[Tuple[List[Comment], List[AgentTrace], List[AgentMessage]]]:
     orchestrator = AgentOrchestrator()
-    rag_context = ""
-    if rag_index is not None:
-        retrieved = rag_index.query(diff_text, limit=5)
-        if isinstance(retrieved, list) and retrieved and isinstance(retrieved[0], RagChunk):
-            rag_context = "\n".join(chunk.content for chunk in retrieved)
+    items = []
+    for _review_id, diff_text in jobs:
+        changes = parse_diff(diff_text)
+        rag_context = ""
+        if rag_index is not None:
+            retrieved = rag_index.query(diff_text, limit=5)
+            if isinstance(retrieved, list) and retrieved and isinstance(retrieved[0], RagChunk):
+                rag_context = "\n".join(chunk.content for chunk in retrieved)
+        items.append((changes, rag_context))
+    outputs = []
+    for (review_id, _diff_text), (changes, _context), result in zip(
+        jobs, items, orchestrator.run_batch(items)
+    ):
+        agent_results = {
+            agent.id: (
+                [finding for agent_id, finding in result.findings if agent_id == agent.id],
+                [trace for trace in result.traces if trace.agent_id == agent.id],
+                result.degraded,
+            )
+            for agent in orchestrator.agents
+        }
+        router_traces = [trace for trace in result.traces if trace.agent_id == "router"]
+        outputs.append(
+            _assemble_review(
+                review_id,
+                changes,
+                orchestrator,
+                agent_results,
+                router_traces,
+                result.llm_stats,
+                result.degraded_reason,
+            )
+        )
+    return outputs
+
+
+def _assemble_review(
+    review_id: UUID,
+    changes: list,
+    orchestrator: AgentOrchestrator,
+    agent_results: Dict[str, tuple],
+    router_traces: List[AgentTrace],
+    llm_stats: dict,
+    degraded_reason: str = "",
+) -> Tuple[List[Comment], List[AgentTrace], List[AgentMessage]]:
+    findings: List[Tuple[str, object]] = []
+    traces: List[AgentTrace] = list(router_traces)
+    degraded = False
+    for agent in orchestrator.agents:
+        agent_findings, agent_traces, agent_degraded = agent_results[agent.id]
+        findings.extend((agent.id, finding) for finding in agent_findings)
+        traces.extend(agent_traces)
+        degraded = degraded or agent_degraded
 
-    result = orchestrator.run(changes, rag_context)
     comments: List[Comment] = []
     messages: List[AgentMessage] = []
-    aggregated = _aggregate_findings(result.findings)
+    aggregated = _aggregate_findings(findings)
     for agent_id, finding, agents in aggregated:
         comments.append(
             Comment(
@@ -91,12 +213,13 @@ def run_review_pipeline(
                     "category": finding.category,
                     "suggestion": finding.suggestion,
                     "agents": agents,
+                    **({"degraded": True} if degraded else {}),
                 },
             )
         )
 
-    if not result.traces:
-        result.traces.append(
+    if not traces:
+        traces.append(
             AgentTrace(
                 agent_id="orchestrator",
                 started_at=datetime.utcnow(),
@@ -106,7 +229,7 @@ def run_review_pipeline(
             )
         )
 
-    for trace in result.traces:
+    for trace in traces:
         messages.append(
             AgentMessage(
                 agent_id=trace.agent_id,
@@ -119,4 +242,24 @@ def run_review_pipeline(
             )
         )
 
-    return comments, result.traces, messages
+    if degraded:
+        messages.append(
+            AgentMessage(
+                agent_id="orchestrator",
+                message_type="degraded",
+                timestamp=datetime.utcnow(),
+                payload={"reason": degraded_reason_for(degraded_reason), "breaker": llm_breaker.snapshot()},
+            )
+        )
+
+    if "speculative" in llm_stats:
+        messages.append(
+            AgentMessage(
+                agent_id="llm",
+                message_type="speculative",
+                timestamp=datetime.utcnow(),
+                payload=llm_stats["speculative"],
+            )
+        )
+
+    return comments, traces, messages
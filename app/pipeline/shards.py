@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Tuple
+from uuid import UUID
+
+from unidiff import PatchSet
+
+from app.models import AgentMessage, AgentTrace, Comment
+from app.pipeline.checkpoints import dump_messages, load_messages
+
+
+SEVERITY_ORDER = {"critical": 4, "high": 3, "medium": 2, "low": 1, "info": 0}
+
+
+def split_diff(diff_text: str, max_lines: int) -> List[str]:
+    shards: List[str] = []
+    current: List[str] = []
+    current_lines = 0
+    for patched_file in PatchSet(diff_text):
+        lines = patched_file.added + patched_file.removed
+        if current and current_lines + lines > max_lines:
+            shards.append("".join(current))
+            current, current_lines = [], 0
+        current.append(str(patched_file))
+        current_lines += lines
+    if current:
+        shards.append("".join(current))
+    return shards
+
+
+def dump_shard_result(
+    index: int, comments: List[Comment], traces: List[AgentTrace], messages: List[AgentMessage]
+) -> dict:
+    return {
+        "index": index,
+        "comments": [comment.model_dump(mode="json") for comment in comments],
+        "traces": [trace.model_dump(mode="json") for trace in traces],
+        "messages": dump_messages(messages),
+    }
+
+
+def merge_shard_results(
+    review_id: UUID, results: List[dict]
+) -> Tuple[List[Comment], List[AgentTrace], List[AgentMessage]]:
+    comments: List[Comment] = []
+    traces: List[AgentTrace] = []
+    messages: List[AgentMessage] = []
+    seen = set()
+    for result in sorted(results, key=lambda item: item["index"]):
+        for item in result.get("comments", []):
+            comment = Comment(**item)
+            key = (comment.file_path, comment.line_number, comment.content)
+            if key in seen:
+                continue
+            seen.add(key)
+            comments.append(comment)
+        traces.extend(AgentTrace(**item) for item in result.get("traces", []))
+        messages.extend(load_messages(result.get("messages", [])))
+    comments.sort(key=lambda comment: SEVERITY_ORDER.get(comment.severity, 0), reverse=True)
+    messages.append(
+        AgentMessage(
+            agent_id="aggregator",
+            message_type="sharded",
+            timestamp=datetime.utcnow(),
+            payload={"shards": len(results), "total": len(comments)},
+        )
+    )
+    return comments, traces, messages
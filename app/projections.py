@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import List
+
+from app.models import ReviewStatus
+
+
+REVIEW_FIELDS = (
+    "id",
+    "status",
+    "created_at",
+    "updated_at",
+    "repo",
+    "pr_url",
+    "lane",
+    "source",
+    "diff_lines",
+    "degraded",
+    "error",
+    "metadata",
+)
+REVIEW_SUMMARY_FIELDS = REVIEW_FIELDS[:-1]
+METADATA_FIELDS = ("repo", "pr_url", "lane", "source", "diff_lines", "degraded", "error")
+
+
+def parse_fields(fields: str | None) -> List[str]:
+    if not fields:
+        return list(REVIEW_SUMMARY_FIELDS)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(REVIEW_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return [name for name in REVIEW_FIELDS if name in requested]
+
+
+def project_review(review: ReviewStatus, fields: List[str]) -> dict:
+    values = {
+        "id": review.id,
+        "status": review.status,
+        "created_at": review.created_at,
+        "updated_at": review.updated_at,
+        "metadata": review.metadata,
+        **{name: review.metadata.get(name) for name in METADATA_FIELDS},
+    }
+    return {name: values[name] for name in fields}
@@ -1,35 +1,371 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
-from typing import Awaitable, Callable
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Set
 from uuid import UUID
 
 
+logger = logging.getLogger("codereview")
+
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Review queue is full")
+        self.retry_after = retry_after
+
+
 @dataclass(frozen=True)
 class ReviewJob:
     review_id: UUID
-    diff_text: str
+    diff_ref: str
+    priority: int = 0
+    dedupe_key: str = ""
+    lane: str = "small"
+    cost: int = 0
+    repo: str = ""
+    pr_key: str = ""
+    enqueued_at: float = field(default_factory=time.time)
+
+
+@dataclass(frozen=True)
+class CriticJob:
+    review_id: UUID
+    diff_ref: str
+    comments: List[Any] = field(default_factory=list)
+
+
+@dataclass
+class WorkerStats:
+    worker_id: int
+    jobs: int = 0
+    busy_seconds: float = 0.0
+    current_started: float | None = None
 
 
 class ReviewQueue:
-    def __init__(self) -> None:
-        self._queue: asyncio.Queue[ReviewJob] = asyncio.Queue()
-        self._worker_task: asyncio.Task | None = None
+    def __init__(
+        self,
+        workers: int = 1,
+        executor: str = "thread",
+        initializer: Callable[[], None] | None = None,
+        max_size: int = 0,
+        admission: str = "reject",
+        default_retry_after: int = 30,
+        aging_seconds: float = 120.0,
+        max_running_per_repo: int = 0,
+        max_workers: int = 0,
+    ) -> None:
+        self.workers = max(workers, 1)
+        self.max_workers = max_workers
+        self.executor_kind = executor
+        self.max_size = max_size
+        self.admission = admission
+        self.default_retry_after = default_retry_after
+        self.aging_seconds = aging_seconds
+        self.max_running_per_repo = max_running_per_repo
+        self._initializer = initializer
+        self._pending: List[ReviewJob] = []
+        self._deferred: Deque[CriticJob] = deque()
+        self._by_key: Dict[str, ReviewJob] = {}
+        self._reserved = 0
+        self._running_by_repo: Dict[str, int] = {}
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._unfinished = 0
+        self._worker_tasks: Dict[int, asyncio.Task] = {}
+        self._retiring: Set[int] = set()
+        self._next_worker_id = 0
+        self._handler: Callable[[ReviewJob], CriticJob | None] | None = None
+        self._deferred_handler: Callable[[CriticJob], None] | None = None
+        self._executor: Executor | None = None
+        self._stats: Dict[int, WorkerStats] = {}
+        self._started_at = 0.0
+        self._accepting = True
+        self._counters = {"enqueued": 0, "rejected": 0, "shed": 0, "collapsed": 0, "superseded": 0}
+        self._waits: Deque[float] = deque(maxlen=500)
+        self._service_times: Deque[float] = deque(maxlen=100)
 
-    async def start(self, handler: Callable[[ReviewJob], Awaitable[None]]) -> None:
-        if self._worker_task is not None:
+    def _build_executor(self) -> Executor:
+        size = max(self.workers, self.max_workers)
+        if self.executor_kind == "process":
+            return ProcessPoolExecutor(max_workers=size, initializer=self._initializer)
+        return ThreadPoolExecutor(max_workers=size, thread_name_prefix="review-worker")
+
+    async def start(
+        self,
+        handler: Callable[[ReviewJob], CriticJob | None],
+        deferred_handler: Callable[[CriticJob], None] | None = None,
+    ) -> None:
+        if self._worker_tasks:
             return
+        self._handler = handler
+        self._deferred_handler = deferred_handler
+        self._executor = self._build_executor()
+        self._started_at = time.monotonic()
+        for _ in range(self.workers):
+            self._spawn_worker()
+
+    def _spawn_worker(self) -> None:
+        stats = WorkerStats(worker_id=self._next_worker_id)
+        self._next_worker_id += 1
+        self._stats[stats.worker_id] = stats
+        self._worker_tasks[stats.worker_id] = asyncio.create_task(self._run_worker(stats))
 
-        async def _run() -> None:
-            while True:
-                job = await self._queue.get()
+    async def _run_worker(self, stats: WorkerStats) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while stats.worker_id not in self._retiring:
+                job = await self._next_job()
+                stats.current_started = time.monotonic()
+                error: BaseException | None = None
                 try:
-                    await handler(job)
+                    if isinstance(job, ReviewJob):
+                        follow_up = await loop.run_in_executor(self._executor, self._handler, job)
+                        if follow_up is not None and self._deferred_handler is not None:
+                            await self.enqueue_deferred(follow_up)
+                    elif self._deferred_handler is not None:
+                        await loop.run_in_executor(self._executor, self._deferred_handler, job)
+                except asyncio.CancelledError as exc:
+                    error = exc
+                    raise
+                except Exception as exc:
+                    error = exc
+                    logger.exception("Queue job for review %s failed", job.review_id)
                 finally:
-                    self._queue.task_done()
+                    elapsed = time.monotonic() - stats.current_started
+                    if isinstance(job, ReviewJob):
+                        self._service_times.append(elapsed)
+                        self._release_repo(job.repo)
+                    stats.busy_seconds += elapsed
+                    stats.current_started = None
+                    stats.jobs += 1
+                    try:
+                        if isinstance(job, ReviewJob):
+                            await self._job_done(job, error)
+                    finally:
+                        self._task_done()
+        finally:
+            self._retiring.discard(stats.worker_id)
+            self._worker_tasks.pop(stats.worker_id, None)
+            self._stats.pop(stats.worker_id, None)
+
+    @property
+    def active_workers(self) -> int:
+        return len(self._worker_tasks) - len(self._retiring)
+
+    def resize(self, target: int) -> int:
+        target = max(1, min(target, max(self.workers, self.max_workers)))
+        if not self._worker_tasks:
+            self.workers = target
+            return target
+        current = self.active_workers
+        if target > current:
+            revived = [worker_id for worker_id in self._retiring][: target - current]
+            for worker_id in revived:
+                self._retiring.discard(worker_id)
+            for _ in range(target - current - len(revived)):
+                self._spawn_worker()
+        elif target < current:
+            candidates = sorted(
+                (worker_id for worker_id in self._worker_tasks if worker_id not in self._retiring),
+                key=lambda worker_id: self._stats[worker_id].current_started is not None,
+            )
+            for worker_id in candidates[: current - target]:
+                self._retiring.add(worker_id)
+                if self._stats[worker_id].current_started is None:
+                    self._worker_tasks[worker_id].cancel()
+        return target
+
+    async def _next_job(self) -> ReviewJob | CriticJob:
+        while True:
+            if self._pending:
+                job = self._select()
+                self._pending.remove(job)
+                if self._by_key.get(job.dedupe_key) is job:
+                    self._by_key.pop(job.dedupe_key, None)
+                if job.repo:
+                    self._running_by_repo[job.repo] = self._running_by_repo.get(job.repo, 0) + 1
+                self._waits.append(time.time() - job.enqueued_at)
+                return job
+            if self._deferred:
+                return self._deferred.popleft()
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def _rank(self, job: ReviewJob, now: float) -> tuple:
+        waited = max(now - job.enqueued_at, 0.0)
+        if self.aging_seconds > 0:
+            promotions = int(waited // self.aging_seconds)
+            cost = job.cost / (1.0 + waited / self.aging_seconds)
+        else:
+            promotions = 0
+            cost = job.cost
+        return (-(job.priority + promotions), cost, job.enqueued_at)
+
+    def _select(self) -> ReviewJob:
+        candidates = self._pending
+        if self.max_running_per_repo > 0:
+            fair = [
+                job
+                for job in candidates
+                if not job.repo or self._running_by_repo.get(job.repo, 0) < self.max_running_per_repo
+            ]
+            candidates = fair or candidates
+        now = time.time()
+        return min(candidates, key=lambda job: self._rank(job, now))
+
+    def _release_repo(self, repo: str) -> None:
+        if not repo:
+            return
+        running = self._running_by_repo.get(repo, 0) - 1
+        if running > 0:
+            self._running_by_repo[repo] = running
+        else:
+            self._running_by_repo.pop(repo, None)
+
+    async def _job_done(self, job: ReviewJob, error: BaseException | None) -> None:
+        pass
+
+    def _task_done(self) -> None:
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._idle.set()
+
+    def _track(self) -> None:
+        self._unfinished += 1
+        self._idle.clear()
+        self._wakeup.set()
+
+    def find_duplicate(self, dedupe_key: str) -> UUID | None:
+        if self.admission != "collapse" or not dedupe_key:
+            return None
+        job = self._by_key.get(dedupe_key)
+        if job is None:
+            return None
+        self._counters["collapsed"] += 1
+        return job.review_id
+
+    def retry_after(self) -> int:
+        if not self._service_times:
+            return self.default_retry_after
+        average = sum(self._service_times) / len(self._service_times)
+        return max(1, int(average * (len(self._pending) + 1) / self.workers))
+
+    def make_room(self, priority: int = 0) -> List[ReviewJob]:
+        if not self._accepting:
+            self._counters["rejected"] += 1
+            raise QueueFullError(self.default_retry_after)
+        if self.max_size <= 0 or len(self._pending) + self._reserved < self.max_size:
+            self._reserved += 1
+            return []
+        if self.admission == "shed" and self._pending:
+            victim = min(self._pending, key=lambda job: (job.priority, -job.enqueued_at))
+            if victim.priority < priority:
+                self._remove(victim)
+                self._counters["shed"] += 1
+                self._reserved += 1
+                return [victim]
+        self._counters["rejected"] += 1
+        raise QueueFullError(self.retry_after())
+
+    def release_slot(self) -> None:
+        self._reserved = max(self._reserved - 1, 0)
+
+    def drop_superseded(self, pr_key: str, keep_review_id: UUID) -> List[ReviewJob]:
+        if not pr_key:
+            return []
+        dropped = [
+            job for job in self._pending if job.pr_key == pr_key and job.review_id != keep_review_id
+        ]
+        for job in dropped:
+            self._remove(job)
+        self._counters["superseded"] += len(dropped)
+        return dropped
+
+    def _remove(self, job: ReviewJob) -> None:
+        self._pending.remove(job)
+        if self._by_key.get(job.dedupe_key) is job:
+            self._by_key.pop(job.dedupe_key, None)
+        self._task_done()
+
+    async def enqueue(self, job: ReviewJob, reserved: bool = False) -> None:
+        if reserved:
+            self.release_slot()
+        if not self._accepting:
+            raise QueueFullError(self.default_retry_after)
+        self._push(job)
+        self._counters["enqueued"] += 1
+
+    def _push(self, job: ReviewJob) -> None:
+        self._pending.append(job)
+        if job.dedupe_key:
+            self._by_key[job.dedupe_key] = job
+        self._track()
+
+    async def enqueue_deferred(self, job: CriticJob) -> None:
+        self._deferred.append(job)
+        self._track()
 
-        self._worker_task = asyncio.create_task(_run())
+    async def stop(self, timeout: float = 30.0) -> None:
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        tasks = list(self._worker_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = {}
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
-    async def enqueue(self, job: ReviewJob) -> None:
-        await self._queue.put(job)
+    def stats(self) -> dict:
+        now = time.monotonic()
+        uptime = max(now - self._started_at, 1e-9) if self._started_at else 0.0
+        workers = []
+        for stats in self._stats.values():
+            busy = stats.busy_seconds
+            if stats.current_started is not None:
+                busy += now - stats.current_started
+            workers.append(
+                {
+                    "worker": stats.worker_id,
+                    "jobs": stats.jobs,
+                    "busy": stats.current_started is not None,
+                    "busy_seconds": round(busy, 3),
+                    "utilization": round(busy / uptime, 3) if uptime else 0.0,
+                }
+            )
+        waits = sorted(self._waits)
+        oldest = min((job.enqueued_at for job in self._pending), default=None)
+        return {
+            "executor": self.executor_kind,
+            "active_workers": self.active_workers,
+            "workers": workers,
+            "depth": len(self._pending),
+            "reserved": self._reserved,
+            "lanes": {
+                lane: sum(1 for job in self._pending if job.lane == lane)
+                for lane in sorted({job.lane for job in self._pending})
+            },
+            "running_by_repo": dict(self._running_by_repo),
+            "deferred_depth": len(self._deferred),
+            "max_size": self.max_size,
+            "admission": self.admission,
+            "accepting": self._accepting,
+            **self._counters,
+            "wait_seconds": {
+                "mean": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                "oldest_pending": round(time.time() - oldest, 3) if oldest is not None else 0.0,
+            },
+        }
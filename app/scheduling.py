@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from app.config import settings
+
+
+LANES = ("interactive", "small", "large")
+LANE_PRIORITY = {"interactive": 2, "small": 1, "large": 0}
+
+
+def diff_size(diff_text: str) -> int:
+    size = 0
+    for line in diff_text.splitlines():
+        if line.startswith(("+++", "---")):
+            continue
+        if line.startswith(("+", "-")):
+            size += 1
+    return size
+
+
+def classify(diff_text: str, metadata: dict) -> str:
+    if metadata.get("source") == "api":
+        return "interactive"
+    if diff_size(diff_text) <= settings.schedule_small_max_lines:
+        return "small"
+    return "large"
+
+
+def celery_queue(lane: str) -> str:
+    return f"reviews.{lane}"
+
+
+def celery_priority(lane: str) -> int:
+    return {"interactive": 9, "small": 5, "large": 0}[lane]
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Dict, List
+import bisect
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
 from uuid import UUID, uuid4
 
 from app.crypto import TokenCipher
+from app.feedback_rollups import RATING_BUCKETS, rating_bucket, rollup_keys
+from app.idempotency import REUSABLE_STATUSES, SUPERSEDABLE_STATUSES, is_newer
 from app.models import AgentMessage, AgentTrace, Comment, FeedbackEntry, OAuthToken, ReviewResult, ReviewStatus
+from app.pagination import decode_cursor, encode_cursor
+from app.projections import project_review
 
 
 class InMemoryStore:
@@ -15,7 +21,16 @@ class InMemoryStore:
         self.traces: Dict[UUID, List[AgentTrace]] = {}
         self.messages: Dict[UUID, List[AgentMessage]] = {}
         self.feedback: Dict[UUID, List[FeedbackEntry]] = {}
+        self.feedback_rollups: Dict[Tuple[str, str], Dict[str, int]] = {}
         self.tokens: List[OAuthToken] = []
+        self.checkpoints: Dict[UUID, Dict[str, bytes]] = {}
+        self.idempotency_keys: Dict[str, UUID] = {}
+        self.leases: Dict[UUID, Tuple[str, datetime]] = {}
+        self.trace_log: List[Tuple[UUID, AgentTrace]] = []
+        self.message_log: List[Tuple[UUID, AgentMessage]] = []
+        self.trace_positions: Dict[str, List[int]] = {}
+        self.message_positions: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
         self._cipher = TokenCipher()
 
     def create_review(self, metadata: dict | None = None) -> ReviewStatus:
@@ -34,26 +49,108 @@ class InMemoryStore:
         self.feedback[review.id] = []
         return review
 
-    def complete_review(self, review_id: UUID) -> ReviewStatus:
-        review = self.reviews[review_id]
-        review.status = "completed"
-        review.updated_at = datetime.utcnow()
-        self.reviews[review_id] = review
-        return review
+    def find_review_by_keys(self, keys: List[str]) -> ReviewStatus | None:
+        for key in keys:
+            review = self.reviews.get(self.idempotency_keys.get(key))
+            if review is not None and review.status in REUSABLE_STATUSES:
+                return review
+        return None
 
-    def mark_in_progress(self, review_id: UUID) -> ReviewStatus:
-        review = self.reviews[review_id]
-        review.status = "in_progress"
-        review.updated_at = datetime.utcnow()
-        self.reviews[review_id] = review
-        return review
+    def claim_review(self, metadata: dict, keys: List[str]) -> Tuple[ReviewStatus, bool]:
+        with self._lock:
+            existing = self.find_review_by_keys(keys)
+            if existing is not None:
+                return existing, False
+            review = self.create_review(metadata=metadata)
+            for key in keys:
+                self.idempotency_keys[key] = review.id
+            return review, True
 
-    def mark_failed(self, review_id: UUID, reason: str) -> ReviewStatus:
+    def supersede_pr_reviews(self, pr_key: str, keep_review_id: UUID) -> List[UUID]:
+        with self._lock:
+            keep = self.reviews[keep_review_id]
+            others = [
+                review
+                for review in self.reviews.values()
+                if review.id != keep_review_id
+                and review.metadata.get("pr_url") == pr_key
+                and review.status in REUSABLE_STATUSES
+            ]
+            if any(is_newer(review.metadata, keep.metadata) for review in others):
+                targets = [keep]
+            else:
+                targets = others
+            superseded: List[UUID] = []
+            for review in targets:
+                if review.status in SUPERSEDABLE_STATUSES:
+                    review.status = "superseded"
+                    review.updated_at = datetime.utcnow()
+                    superseded.append(review.id)
+            return superseded
+
+    def get_status(self, review_id: UUID) -> str | None:
+        review = self.reviews.get(review_id)
+        return review.status if review is not None else None
+
+    def _lease_free(self, review_id: UUID, owner: str | None, now: datetime) -> bool:
+        lease = self.leases.get(review_id)
+        return lease is None or lease[1] < now or lease[0] == owner
+
+    def mark_in_progress(
+        self, review_id: UUID, lease_owner: str | None = None, lease_seconds: float = 0
+    ) -> ReviewStatus | None:
+        now = datetime.utcnow()
+        with self._lock:
+            review = self.reviews[review_id]
+            claimable = review.status in ("pending", "failed") or (
+                review.status == "in_progress" and self._lease_free(review_id, lease_owner, now)
+            )
+            if not claimable:
+                return None
+            review.status = "in_progress"
+            review.updated_at = now
+            if lease_owner is not None:
+                self.leases[review_id] = (lease_owner, now + timedelta(seconds=lease_seconds))
+            else:
+                self.leases.pop(review_id, None)
+            return review
+
+    def renew_lease(self, review_id: UUID, lease_owner: str, lease_seconds: float) -> bool:
+        with self._lock:
+            lease = self.leases.get(review_id)
+            if self.reviews[review_id].status != "in_progress" or lease is None or lease[0] != lease_owner:
+                return False
+            self.leases[review_id] = (lease_owner, datetime.utcnow() + timedelta(seconds=lease_seconds))
+            return True
+
+    def complete_review(self, review_id: UUID, lease_owner: str | None = None) -> ReviewStatus | None:
+        now = datetime.utcnow()
+        with self._lock:
+            review = self.reviews[review_id]
+            if review.status != "in_progress" or not self._lease_free(review_id, lease_owner, now):
+                return None
+            review.status = "completed"
+            review.updated_at = now
+            self.leases.pop(review_id, None)
+            return review
+
+    def mark_failed(self, review_id: UUID, reason: str, lease_owner: str | None = None) -> ReviewStatus | None:
+        with self._lock:
+            review = self.reviews[review_id]
+            if lease_owner is not None:
+                lease = self.leases.get(review_id)
+                if review.status != "in_progress" or lease is None or lease[0] != lease_owner:
+                    return None
+            review.status = "failed"
+            review.updated_at = datetime.utcnow()
+            review.metadata["error"] = reason
+            self.leases.pop(review_id, None)
+            return review
+
+    def update_metadata(self, review_id: UUID, updates: dict) -> ReviewStatus:
         review = self.reviews[review_id]
-        review.status = "failed"
+        review.metadata.update(updates)
         review.updated_at = datetime.utcnow()
-        review.metadata["error"] = reason
-        self.reviews[review_id] = review
         return review
 
     def add_comments(self, review_id: UUID, new_comments: List[Comment]) -> None:
@@ -61,12 +158,55 @@ class InMemoryStore:
         self.comments[review_id].extend(new_comments)
 
     def add_traces(self, review_id: UUID, new_traces: List[AgentTrace]) -> None:
-        self.traces.setdefault(review_id, [])
-        self.traces[review_id].extend(new_traces)
+        self.traces.setdefault(review_id, []).extend(new_traces)
+        for trace in new_traces:
+            self.trace_log.append((review_id, trace))
+            self.trace_positions.setdefault(trace.agent_id, []).append(len(self.trace_log))
 
     def add_messages(self, review_id: UUID, new_messages: List[AgentMessage]) -> None:
-        self.messages.setdefault(review_id, [])
-        self.messages[review_id].extend(new_messages)
+        self.messages.setdefault(review_id, []).extend(new_messages)
+        for message in new_messages:
+            self.message_log.append((review_id, message))
+            self.message_positions.setdefault(message.agent_id, []).append(len(self.message_log))
+
+    def persist_review_result(
+        self,
+        review_id: UUID,
+        comments: List[Comment],
+        traces: List[AgentTrace],
+        messages: List[AgentMessage],
+        metadata_updates: dict | None = None,
+        lease_owner: str | None = None,
+    ) -> ReviewStatus | None:
+        now = datetime.utcnow()
+        with self._lock:
+            review = self.reviews[review_id]
+            if review.status != "in_progress" or not self._lease_free(review_id, lease_owner, now):
+                return None
+            self.comments.setdefault(review_id, []).extend(comments)
+            self.add_traces(review_id, traces)
+            self.add_messages(review_id, messages)
+            if metadata_updates:
+                review.metadata.update(metadata_updates)
+            review.status = "completed"
+            review.updated_at = now
+            self.leases.pop(review_id, None)
+            self.checkpoints.pop(review_id, None)
+            return review
+
+    def complete_reviews(
+        self,
+        results: List[Tuple[UUID, List[Comment], List[AgentTrace], List[AgentMessage], dict]],
+        lease_owner: str | None = None,
+    ) -> List[ReviewStatus]:
+        completed: List[ReviewStatus] = []
+        for review_id, comments, traces, messages, metadata_updates in results:
+            review = self.persist_review_result(
+                review_id, comments, traces, messages, metadata_updates, lease_owner=lease_owner
+            )
+            if review is not None:
+                completed.append(review)
+        return completed
 
     def get_result(self, review_id: UUID) -> ReviewResult:
         return ReviewResult(
@@ -80,24 +220,66 @@ class InMemoryStore:
     def list_reviews(self) -> List[ReviewStatus]:
         return list(self.reviews.values())
 
+    def page_reviews(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        status: str | None = None,
+        repo: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> Tuple[List[ReviewStatus], str | None]:
+        after = decode_cursor(cursor, (datetime, str))
+        after_key = tuple(after) if after is not None else None
+        ordered = sorted(self.reviews.values(), key=lambda review: (review.created_at, str(review.id)), reverse=True)
+        items: List[ReviewStatus] = []
+        for review in ordered:
+            if after_key is not None and (review.created_at, str(review.id)) >= after_key:
+                continue
+            if status and review.status != status:
+                continue
+            if repo and review.metadata.get("repo") != repo:
+                continue
+            if created_after and review.created_at < created_after:
+                continue
+            if created_before and review.created_at >= created_before:
+                continue
+            if len(items) == limit:
+                last = items[-1]
+                return items, encode_cursor([last.created_at.isoformat(), str(last.id)])
+            items.append(review)
+        return items, None
+
     def add_feedback(self, entry: FeedbackEntry) -> None:
-        self.feedback.setdefault(entry.review_id, [])
-        self.feedback[entry.review_id].append(entry)
+        agent_id = next(
+            (comment.agent_id for comment in self.comments.get(entry.review_id, []) if comment.id == entry.comment_id),
+            None,
+        )
+        review = self.reviews.get(entry.review_id)
+        repo = review.metadata.get("repo") if review is not None else None
+        bucket = rating_bucket(entry.rating)
+        with self._lock:
+            self.feedback.setdefault(entry.review_id, []).append(entry)
+            for key in rollup_keys(entry.review_id, agent_id, repo, entry.created_at):
+                self.feedback_rollups.setdefault(key, dict.fromkeys(RATING_BUCKETS, 0))[bucket] += 1
 
     def list_feedback(self, review_id: UUID) -> List[FeedbackEntry]:
         return self.feedback.get(review_id, [])
 
     def feedback_summary(self, review_id: UUID) -> dict:
-        entries = self.feedback.get(review_id, [])
-        summary = {"up": 0, "down": 0, "neutral": 0}
-        for entry in entries:
-            if entry.rating > 0:
-                summary["up"] += 1
-            elif entry.rating < 0:
-                summary["down"] += 1
-            else:
-                summary["neutral"] += 1
-        return summary
+        return dict(self.feedback_rollups.get(("review", str(review_id)), dict.fromkeys(RATING_BUCKETS, 0)))
+
+    def feedback_rollup(self, scope: str, key: str) -> dict | None:
+        counts = self.feedback_rollups.get((scope, key))
+        return {"scope": scope, "key": key, **counts} if counts is not None else None
+
+    def list_feedback_rollups(self, scope: str, limit: int) -> List[dict]:
+        with self._lock:
+            keys = sorted(
+                (key for rollup_scope, key in self.feedback_rollups if rollup_scope == scope),
+                reverse=scope == "day",
+            )
+            return [{"scope": scope, "key": key, **self.feedback_rollups[(scope, key)]} for key in keys[:limit]]
 
     def get_comments(self, review_id: UUID) -> List[Comment]:
         return self.comments.get(review_id, [])
@@ -120,6 +302,107 @@ class InMemoryStore:
             messages.extend([msg for msg in review_messages if msg.agent_id == agent_id])
         return messages
 
+    def page_review_summaries(
+        self,
+        fields: List[str],
+        limit: int,
+        cursor: str | None = None,
+        status: str | None = None,
+        repo: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> Tuple[List[dict], str | None]:
+        reviews, next_cursor = self.page_reviews(
+            limit,
+            cursor=cursor,
+            status=status,
+            repo=repo,
+            created_after=created_after,
+            created_before=created_before,
+        )
+        return [project_review(review, fields) for review in reviews], next_cursor
+
+    def get_review_summary(self, review_id: UUID, fields: List[str]) -> dict | None:
+        review = self.reviews.get(review_id)
+        return project_review(review, fields) if review is not None else None
+
+    def _page_log(
+        self,
+        log: list,
+        positions: List[int],
+        limit: int,
+        cursor: str | None,
+        matches,
+    ) -> Tuple[list, str | None]:
+        after = decode_cursor(cursor, (int,))
+        start = bisect.bisect_right(positions, after[0]) if after is not None else 0
+        items = []
+        for position in positions[start:]:
+            review_id, entry = log[position - 1]
+            if not matches(review_id, entry):
+                continue
+            if len(items) == limit:
+                return [entry for _, entry in items], encode_cursor([items[-1][0]])
+            items.append((position, entry))
+        return [entry for _, entry in items], None
+
+    def page_traces_by_agent(
+        self,
+        agent_id: str,
+        limit: int,
+        cursor: str | None = None,
+        review_id: UUID | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Tuple[List[AgentTrace], str | None]:
+        return self._page_log(
+            self.trace_log,
+            self.trace_positions.get(agent_id, []),
+            limit,
+            cursor,
+            lambda owner, trace: (review_id is None or owner == review_id)
+            and (since is None or trace.started_at >= since)
+            and (until is None or trace.started_at < until),
+        )
+
+    def page_messages_by_agent(
+        self,
+        agent_id: str,
+        limit: int,
+        cursor: str | None = None,
+        review_id: UUID | None = None,
+        message_type: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Tuple[List[AgentMessage], str | None]:
+        return self._page_log(
+            self.message_log,
+            self.message_positions.get(agent_id, []),
+            limit,
+            cursor,
+            lambda owner, message: (review_id is None or owner == review_id)
+            and (not message_type or message.message_type == message_type)
+            and (since is None or message.timestamp >= since)
+            and (until is None or message.timestamp < until),
+        )
+
+    def save_checkpoint(self, review_id: UUID, stage: str, payload: bytes) -> None:
+        self.checkpoints.setdefault(review_id, {})[stage] = payload
+
+    def load_checkpoints(self, review_id: UUID) -> Dict[str, bytes]:
+        return dict(self.checkpoints.get(review_id, {}))
+
+    def clear_checkpoints(self, review_id: UUID) -> None:
+        self.checkpoints.pop(review_id, None)
+
+    def prune_checkpoints(self, older_than: datetime) -> int:
+        pruned = 0
+        for review_id in list(self.checkpoints):
+            review = self.reviews.get(review_id)
+            if review is None or (review.status in ("failed", "superseded") and review.updated_at < older_than):
+                pruned += len(self.checkpoints.pop(review_id, {}))
+        return pruned
+
     def add_oauth_token(self, token: OAuthToken) -> None:
         encrypted = OAuthToken(
             provider=token.provider,
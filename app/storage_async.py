@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+
+from app.crypto import TokenCipher
+from app.db import async_database_url, build_async_engine, pool_status
+from app.storage_sql import SqlStore
+
+
+logger = logging.getLogger("codereview")
+
+
+class _ConnectionStore(SqlStore):
+    def __init__(self, connection, cipher: TokenCipher) -> None:
+        self.engine = connection
+        self._cipher = cipher
+
+
+class _AsyncStore:
+    async def _call(self, name: str, *args, **kwargs):
+        raise NotImplementedError
+
+
+def _delegate(name: str):
+    method = getattr(SqlStore, name)
+
+    @functools.wraps(method)
+    async def call(self, *args, **kwargs):
+        return await self._call(name, *args, **kwargs)
+
+    return call
+
+
+STORE_METHODS = sorted(name for name, value in vars(SqlStore).items() if callable(value) and not name.startswith("_"))
+
+for _name in STORE_METHODS:
+    setattr(_AsyncStore, _name, _delegate(_name))
+
+
+class AsyncSqlStore(_AsyncStore):
+    def __init__(self, database_url: str) -> None:
+        self.engine = build_async_engine(database_url)
+        self._cipher = TokenCipher()
+
+    async def _call(self, name: str, *args, **kwargs):
+        async with self.engine.connect() as conn:
+            return await conn.run_sync(
+                lambda sync_conn: getattr(_ConnectionStore(sync_conn, self._cipher), name)(*args, **kwargs)
+            )
+
+    def pool_status(self) -> dict:
+        return pool_status(self.engine.sync_engine)
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
+
+
+class AsyncStoreAdapter(_AsyncStore):
+    def __init__(self, store: object, offload: bool = False) -> None:
+        self.store = store
+        self.offload = offload
+
+    async def _call(self, name: str, *args, **kwargs):
+        method = getattr(self.store, name)
+        if self.offload:
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
+    def pool_status(self) -> dict:
+        engine = getattr(self.store, "engine", None)
+        return pool_status(engine) if engine is not None else {}
+
+    async def dispose(self) -> None:
+        return None
+
+
+def build_async_store(store: object, database_url: str) -> _AsyncStore:
+    if async_database_url(database_url) is None:
+        backend = store.engine.url.get_backend_name()
+        logger.warning("No async driver for %s; offloading store calls to threads", backend)
+        return AsyncStoreAdapter(store, offload=True)
+    return AsyncSqlStore(database_url)
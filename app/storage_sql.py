@@ -1,15 +1,156 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
 from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
 
 from app.db import build_engine, get_session, init_db
 from app.crypto import TokenCipher
-from app.db_models import CommentModel, FeedbackModel, MessageModel, OAuthTokenModel, ReviewModel, TraceModel
+from app.db_models import (
+    CheckpointModel,
+    CommentModel,
+    FeedbackModel,
+    FeedbackRollupModel,
+    IdempotencyKeyModel,
+    MessageModel,
+    OAuthTokenModel,
+    ReviewModel,
+    TraceModel,
+)
+from app.feedback_rollups import RATING_BUCKETS, rating_bucket, rollup_keys
+from app.idempotency import REUSABLE_STATUSES, SUPERSEDABLE_STATUSES, is_newer
 from app.models import AgentMessage, AgentTrace, Comment, FeedbackEntry, OAuthToken, ReviewResult, ReviewStatus
+from app.pagination import decode_cursor, encode_cursor
+
+
+def _lease_free(owner: str | None, now: datetime):
+    return or_(
+        ReviewModel.lease_owner.is_(None),
+        ReviewModel.lease_expires_at < now,
+        ReviewModel.lease_owner == owner,
+    )
+
+
+def _comment_rows(review_id: str, comments: List[Comment]) -> List[dict]:
+    return [
+        {
+            "id": str(comment.id),
+            "review_id": review_id,
+            "agent_id": comment.agent_id,
+            "file_path": comment.file_path,
+            "line_number": comment.line_number,
+            "severity": comment.severity,
+            "content": comment.content,
+            "meta": comment.metadata,
+        }
+        for comment in comments
+    ]
+
+
+def _trace_rows(review_id: str, traces: List[AgentTrace]) -> List[dict]:
+    return [
+        {
+            "review_id": review_id,
+            "agent_id": trace.agent_id,
+            "started_at": trace.started_at,
+            "completed_at": trace.completed_at,
+            "input_summary": trace.input_summary,
+            "output_summary": trace.output_summary,
+        }
+        for trace in traces
+    ]
+
+
+def _message_rows(review_id: str, messages: List[AgentMessage]) -> List[dict]:
+    return [
+        {
+            "review_id": review_id,
+            "agent_id": message.agent_id,
+            "message_type": message.message_type,
+            "timestamp": message.timestamp,
+            "payload": message.payload,
+        }
+        for message in messages
+    ]
+
+
+def _bulk_insert(session, model, rows: List[dict]) -> None:
+    if rows:
+        session.execute(insert(model), rows)
+
+
+_REVIEW_COLUMNS = {
+    "id": ReviewModel.id,
+    "status": ReviewModel.status,
+    "created_at": ReviewModel.created_at,
+    "updated_at": ReviewModel.updated_at,
+    "repo": ReviewModel.repo,
+    "pr_url": ReviewModel.pr_key,
+    "lane": ReviewModel.meta["lane"].as_string(),
+    "source": ReviewModel.meta["source"].as_string(),
+    "diff_lines": ReviewModel.meta["diff_lines"].as_integer(),
+    "degraded": ReviewModel.meta["degraded"].as_boolean(),
+    "error": ReviewModel.meta["error"].as_string(),
+    "metadata": ReviewModel.meta,
+}
+
+
+def _review_projection(fields: List[str]) -> list:
+    names = list(dict.fromkeys(["id", "created_at", *fields]))
+    return [_REVIEW_COLUMNS[name].label(name) for name in names]
+
+
+def _projected(row, fields: List[str]) -> dict:
+    values = row._asdict()
+    values["id"] = UUID(values["id"])
+    if "metadata" in values:
+        values["metadata"] = values["metadata"] or {}
+    return {name: values[name] for name in fields}
+
+
+def _bump_rollup(session, scope: str, key: str, bucket: str) -> None:
+    now = datetime.utcnow()
+    counter = getattr(FeedbackRollupModel, bucket)
+    bumped = session.execute(
+        update(FeedbackRollupModel)
+        .where(FeedbackRollupModel.scope == scope, FeedbackRollupModel.key == key)
+        .values({bucket: counter + 1, "updated_at": now})
+    ).rowcount
+    if not bumped:
+        session.execute(
+            insert(FeedbackRollupModel).values(
+                {"scope": scope, "key": key, **dict.fromkeys(RATING_BUCKETS, 0), bucket: 1, "updated_at": now}
+            )
+        )
+
+
+def _claim_key(session, key: str, review_id: str, now: datetime) -> bool:
+    current = session.execute(
+        select(IdempotencyKeyModel.review_id).where(IdempotencyKeyModel.key == key)
+    ).scalar_one_or_none()
+    if current is None:
+        session.execute(insert(IdempotencyKeyModel).values(key=key, review_id=review_id, created_at=now))
+        return True
+    stale = select(ReviewModel.id).where(
+        ReviewModel.id == current, ReviewModel.status.not_in(REUSABLE_STATUSES)
+    )
+    repointed = session.execute(
+        update(IdempotencyKeyModel)
+        .where(
+            IdempotencyKeyModel.key == key,
+            IdempotencyKeyModel.review_id == current,
+            IdempotencyKeyModel.review_id.in_(stale),
+        )
+        .values(review_id=review_id, created_at=now)
+    )
+    return repointed.rowcount == 1
+
+
+def _rollup(row: FeedbackRollupModel) -> dict:
+    return {"scope": row.scope, "key": row.key, "up": row.up, "down": row.down, "neutral": row.neutral}
 
 
 class SqlStore:
@@ -27,6 +168,8 @@ class SqlStore:
             created_at=now,
             updated_at=now,
             meta=metadata or {},
+            pr_key=(metadata or {}).get("pr_url"),
+            repo=(metadata or {}).get("repo"),
         )
         with get_session(self.engine) as session:
             session.add(review)
@@ -39,25 +182,168 @@ class SqlStore:
                 metadata=review.meta or {},
             )
 
-    def mark_in_progress(self, review_id: UUID) -> ReviewStatus:
-        return self._update_status(review_id, "in_progress")
+    def find_review_by_keys(self, keys: List[str]) -> ReviewStatus | None:
+        if not keys:
+            return None
+        with get_session(self.engine) as session:
+            row = session.execute(
+                select(ReviewModel)
+                .join(IdempotencyKeyModel, IdempotencyKeyModel.review_id == ReviewModel.id)
+                .where(IdempotencyKeyModel.key.in_(keys), ReviewModel.status.in_(REUSABLE_STATUSES))
+                .limit(1)
+            ).scalar_one_or_none()
+            if row is None:
+                return None
+            return ReviewStatus(
+                id=UUID(row.id),
+                status=row.status,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+                metadata=row.meta or {},
+            )
+
+    def claim_review(self, metadata: dict, keys: List[str]) -> Tuple[ReviewStatus, bool]:
+        existing = self.find_review_by_keys(keys)
+        if existing is not None:
+            return existing, False
+        now = datetime.utcnow()
+        review_id = str(uuid4())
+        with get_session(self.engine) as session:
+            session.add(
+                ReviewModel(
+                    id=review_id,
+                    status="pending",
+                    created_at=now,
+                    updated_at=now,
+                    meta=metadata,
+                    pr_key=metadata.get("pr_url"),
+                    repo=metadata.get("repo"),
+                )
+            )
+            try:
+                for key in keys:
+                    if not _claim_key(session, key, review_id, now):
+                        raise IntegrityError("claim idempotency key", {"key": key}, None)
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                existing = self.find_review_by_keys(keys)
+                if existing is None:
+                    raise
+                return existing, False
+        return (
+            ReviewStatus(
+                id=UUID(review_id),
+                status="pending",
+                created_at=now,
+                updated_at=now,
+                metadata=metadata,
+            ),
+            True,
+        )
+
+    def supersede_pr_reviews(self, pr_key: str, keep_review_id: UUID) -> List[UUID]:
+        with get_session(self.engine) as session:
+            keep_meta = session.execute(
+                select(ReviewModel.meta).where(ReviewModel.id == str(keep_review_id))
+            ).scalar_one()
+            others = session.execute(
+                select(ReviewModel.id, ReviewModel.status, ReviewModel.meta).where(
+                    ReviewModel.pr_key == pr_key,
+                    ReviewModel.id != str(keep_review_id),
+                    ReviewModel.status.in_(REUSABLE_STATUSES),
+                )
+            ).all()
+            if any(is_newer(meta or {}, keep_meta or {}) for _id, _status, meta in others):
+                ids = [str(keep_review_id)]
+            else:
+                ids = [review_id for review_id, status, _meta in others if status in SUPERSEDABLE_STATUSES]
+            if not ids:
+                return []
+            session.execute(
+                update(ReviewModel)
+                .where(ReviewModel.id.in_(ids), ReviewModel.status.in_(SUPERSEDABLE_STATUSES))
+                .values(status="superseded", updated_at=datetime.utcnow())
+            )
+            session.commit()
+            return [UUID(review_id) for review_id in ids]
 
-    def complete_review(self, review_id: UUID) -> ReviewStatus:
-        return self._update_status(review_id, "completed")
+    def get_status(self, review_id: UUID) -> str | None:
+        with get_session(self.engine) as session:
+            return session.execute(
+                select(ReviewModel.status).where(ReviewModel.id == str(review_id))
+            ).scalar_one_or_none()
 
-    def mark_failed(self, review_id: UUID, reason: str) -> ReviewStatus:
-        review = self._update_status(review_id, "failed")
+    def _transition(self, review_id: UUID, condition, **values) -> bool:
         with get_session(self.engine) as session:
-            row = session.get(ReviewModel, str(review_id))
+            result = session.execute(
+                update(ReviewModel)
+                .where(ReviewModel.id == str(review_id), condition)
+                .values(updated_at=datetime.utcnow(), **values)
+            )
+            session.commit()
+            return result.rowcount == 1
+
+    def mark_in_progress(
+        self, review_id: UUID, lease_owner: str | None = None, lease_seconds: float = 0
+    ) -> ReviewStatus | None:
+        now = datetime.utcnow()
+        claimable = or_(
+            ReviewModel.status.in_(("pending", "failed")),
+            and_(ReviewModel.status == "in_progress", _lease_free(lease_owner, now)),
+        )
+        claimed = self._transition(
+            review_id,
+            claimable,
+            status="in_progress",
+            lease_owner=lease_owner,
+            lease_expires_at=now + timedelta(seconds=lease_seconds) if lease_owner else None,
+        )
+        return self.get_review(review_id) if claimed else None
+
+    def renew_lease(self, review_id: UUID, lease_owner: str, lease_seconds: float) -> bool:
+        return self._transition(
+            review_id,
+            and_(ReviewModel.status == "in_progress", ReviewModel.lease_owner == lease_owner),
+            lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds),
+        )
+
+    def complete_review(self, review_id: UUID, lease_owner: str | None = None) -> ReviewStatus | None:
+        completed = self._transition(
+            review_id,
+            and_(ReviewModel.status == "in_progress", _lease_free(lease_owner, datetime.utcnow())),
+            status="completed",
+            lease_owner=None,
+            lease_expires_at=None,
+        )
+        return self.get_review(review_id) if completed else None
+
+    def mark_failed(self, review_id: UUID, reason: str, lease_owner: str | None = None) -> ReviewStatus | None:
+        with get_session(self.engine) as session:
+            query = select(ReviewModel).where(ReviewModel.id == str(review_id))
+            if lease_owner is not None:
+                query = query.where(ReviewModel.status == "in_progress", ReviewModel.lease_owner == lease_owner)
+            row = session.execute(query.with_for_update()).scalar_one_or_none()
+            if row is None:
+                return None
+            row.status = "failed"
+            row.updated_at = datetime.utcnow()
+            row.lease_owner = None
+            row.lease_expires_at = None
             row.meta = {**(row.meta or {}), "error": reason}
             session.commit()
-        review.metadata["error"] = reason
-        return review
+            return ReviewStatus(
+                id=UUID(row.id),
+                status=row.status,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+                metadata=row.meta or {},
+            )
 
-    def _update_status(self, review_id: UUID, status: str) -> ReviewStatus:
+    def update_metadata(self, review_id: UUID, updates: dict) -> ReviewStatus:
         with get_session(self.engine) as session:
             row = session.get(ReviewModel, str(review_id))
-            row.status = status
+            row.meta = {**(row.meta or {}), **updates}
             row.updated_at = datetime.utcnow()
             session.commit()
             return ReviewStatus(
@@ -70,49 +356,92 @@ class SqlStore:
 
     def add_comments(self, review_id: UUID, new_comments: List[Comment]) -> None:
         with get_session(self.engine) as session:
-            for comment in new_comments:
-                session.add(
-                    CommentModel(
-                        id=str(comment.id),
-                        review_id=str(review_id),
-                        agent_id=comment.agent_id,
-                        file_path=comment.file_path,
-                        line_number=comment.line_number,
-                        severity=comment.severity,
-                        content=comment.content,
-                        meta=comment.metadata,
-                    )
-                )
+            _bulk_insert(session, CommentModel, _comment_rows(str(review_id), new_comments))
             session.commit()
 
     def add_traces(self, review_id: UUID, new_traces: List[AgentTrace]) -> None:
         with get_session(self.engine) as session:
-            for trace in new_traces:
-                session.add(
-                    TraceModel(
-                        review_id=str(review_id),
-                        agent_id=trace.agent_id,
-                        started_at=trace.started_at,
-                        completed_at=trace.completed_at,
-                        input_summary=trace.input_summary,
-                        output_summary=trace.output_summary,
-                    )
-                )
+            _bulk_insert(session, TraceModel, _trace_rows(str(review_id), new_traces))
             session.commit()
 
     def add_messages(self, review_id: UUID, new_messages: List[AgentMessage]) -> None:
         with get_session(self.engine) as session:
-            for message in new_messages:
-                session.add(
-                    MessageModel(
-                        review_id=str(review_id),
-                        agent_id=message.agent_id,
-                        message_type=message.message_type,
-                        timestamp=message.timestamp,
-                        payload=message.payload,
-                    )
+            _bulk_insert(session, MessageModel, _message_rows(str(review_id), new_messages))
+            session.commit()
+
+    def _persist_result(
+        self,
+        session,
+        review_id: UUID,
+        comments: List[Comment],
+        traces: List[AgentTrace],
+        messages: List[AgentMessage],
+        metadata_updates: dict | None,
+        lease_owner: str | None,
+        now: datetime,
+    ) -> ReviewStatus | None:
+        key = str(review_id)
+        claimed = session.execute(
+            update(ReviewModel)
+            .where(
+                ReviewModel.id == key,
+                ReviewModel.status == "in_progress",
+                _lease_free(lease_owner, now),
+            )
+            .values(status="completed", updated_at=now, lease_owner=None, lease_expires_at=None)
+        )
+        if claimed.rowcount != 1:
+            return None
+        _bulk_insert(session, CommentModel, _comment_rows(key, comments))
+        _bulk_insert(session, TraceModel, _trace_rows(key, traces))
+        _bulk_insert(session, MessageModel, _message_rows(key, messages))
+        session.execute(delete(CheckpointModel).where(CheckpointModel.review_id == key))
+        row = session.get(ReviewModel, key)
+        if metadata_updates:
+            row.meta = {**(row.meta or {}), **metadata_updates}
+        return ReviewStatus(
+            id=review_id,
+            status=row.status,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+            metadata=row.meta or {},
+        )
+
+    def persist_review_result(
+        self,
+        review_id: UUID,
+        comments: List[Comment],
+        traces: List[AgentTrace],
+        messages: List[AgentMessage],
+        metadata_updates: dict | None = None,
+        lease_owner: str | None = None,
+    ) -> ReviewStatus | None:
+        with get_session(self.engine) as session:
+            review = self._persist_result(
+                session, review_id, comments, traces, messages, metadata_updates, lease_owner, datetime.utcnow()
+            )
+            if review is None:
+                session.rollback()
+                return None
+            session.commit()
+            return review
+
+    def complete_reviews(
+        self,
+        results: List[Tuple[UUID, List[Comment], List[AgentTrace], List[AgentMessage], dict]],
+        lease_owner: str | None = None,
+    ) -> List[ReviewStatus]:
+        now = datetime.utcnow()
+        completed: List[ReviewStatus] = []
+        with get_session(self.engine) as session:
+            for review_id, comments, traces, messages, metadata_updates in results:
+                review = self._persist_result(
+                    session, review_id, comments, traces, messages, metadata_updates, lease_owner, now
                 )
+                if review is not None:
+                    completed.append(review)
             session.commit()
+        return completed
 
     def get_result(self, review_id: UUID) -> ReviewResult:
         return ReviewResult(review=self.get_review(review_id), comments=self.get_comments(review_id))
@@ -142,19 +471,120 @@ class SqlStore:
                 for row in rows
             ]
 
-    def add_feedback(self, entry: FeedbackEntry) -> None:
-        with get_session(self.engine) as session:
-            session.add(
-                FeedbackModel(
-                    id=str(entry.id),
-                    review_id=str(entry.review_id),
-                    comment_id=str(entry.comment_id),
-                    rating=entry.rating,
-                    user_id=entry.user_id,
-                    created_at=entry.created_at,
+    def _review_page_query(
+        self,
+        query,
+        cursor: str | None,
+        status: str | None,
+        repo: str | None,
+        created_after: datetime | None,
+        created_before: datetime | None,
+    ):
+        if status:
+            query = query.where(ReviewModel.status == status)
+        if repo:
+            query = query.where(ReviewModel.repo == repo)
+        if created_after:
+            query = query.where(ReviewModel.created_at >= created_after)
+        if created_before:
+            query = query.where(ReviewModel.created_at < created_before)
+        after = decode_cursor(cursor, (datetime, str))
+        if after is not None:
+            created_at, after_id = after
+            query = query.where(
+                or_(
+                    ReviewModel.created_at < created_at,
+                    and_(ReviewModel.created_at == created_at, ReviewModel.id < after_id),
                 )
             )
-            session.commit()
+        return query.order_by(ReviewModel.created_at.desc(), ReviewModel.id.desc())
+
+    def page_reviews(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        status: str | None = None,
+        repo: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> Tuple[List[ReviewStatus], str | None]:
+        query = self._review_page_query(
+            select(ReviewModel), cursor, status, repo, created_after, created_before
+        ).limit(limit + 1)
+        with get_session(self.engine) as session:
+            rows = session.execute(query).scalars().all()
+            items = [
+                ReviewStatus(
+                    id=UUID(row.id),
+                    status=row.status,
+                    created_at=row.created_at,
+                    updated_at=row.updated_at,
+                    metadata=row.meta or {},
+                )
+                for row in rows[:limit]
+            ]
+        if len(rows) <= limit:
+            return items, None
+        last = items[-1]
+        return items, encode_cursor([last.created_at.isoformat(), str(last.id)])
+
+    def page_review_summaries(
+        self,
+        fields: List[str],
+        limit: int,
+        cursor: str | None = None,
+        status: str | None = None,
+        repo: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> Tuple[List[dict], str | None]:
+        query = self._review_page_query(
+            select(*_review_projection(fields)), cursor, status, repo, created_after, created_before
+        ).limit(limit + 1)
+        with get_session(self.engine) as session:
+            rows = session.execute(query).all()
+        items = [_projected(row, fields) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return items, None
+        last = rows[limit - 1]
+        return items, encode_cursor([last.created_at.isoformat(), last.id])
+
+    def get_review_summary(self, review_id: UUID, fields: List[str]) -> dict | None:
+        with get_session(self.engine) as session:
+            row = session.execute(
+                select(*_review_projection(fields)).where(ReviewModel.id == str(review_id))
+            ).first()
+        return _projected(row, fields) if row is not None else None
+
+    def add_feedback(self, entry: FeedbackEntry) -> None:
+        bucket = rating_bucket(entry.rating)
+        for attempt in range(2):
+            with get_session(self.engine) as session:
+                agent_id = session.execute(
+                    select(CommentModel.agent_id).where(CommentModel.id == str(entry.comment_id))
+                ).scalar_one_or_none()
+                repo = session.execute(
+                    select(ReviewModel.repo).where(ReviewModel.id == str(entry.review_id))
+                ).scalar_one_or_none()
+                session.add(
+                    FeedbackModel(
+                        id=str(entry.id),
+                        review_id=str(entry.review_id),
+                        comment_id=str(entry.comment_id),
+                        rating=entry.rating,
+                        user_id=entry.user_id,
+                        created_at=entry.created_at,
+                    )
+                )
+                for scope, key in rollup_keys(entry.review_id, agent_id, repo, entry.created_at):
+                    _bump_rollup(session, scope, key, bucket)
+                try:
+                    session.commit()
+                    return
+                except IntegrityError:
+                    session.rollback()
+                    if attempt:
+                        raise
 
     def list_feedback(self, review_id: UUID) -> List[FeedbackEntry]:
         with get_session(self.engine) as session:
@@ -176,17 +606,34 @@ class SqlStore:
             ]
 
     def feedback_summary(self, review_id: UUID) -> dict:
-        entries = self.list_feedback(review_id)
-        summary = {"up": 0, "down": 0, "neutral": 0}
-        for entry in entries:
-            if entry.rating > 0:
-                summary["up"] += 1
-            elif entry.rating < 0:
-                summary["down"] += 1
-            else:
-                summary["neutral"] += 1
+        with get_session(self.engine) as session:
+            rows = session.execute(
+                select(FeedbackModel.rating, func.count())
+                .where(FeedbackModel.review_id == str(review_id))
+                .group_by(FeedbackModel.rating)
+            ).all()
+        summary = dict.fromkeys(RATING_BUCKETS, 0)
+        for rating, count in rows:
+            summary[rating_bucket(rating)] += count
         return summary
 
+    def feedback_rollup(self, scope: str, key: str) -> dict | None:
+        with get_session(self.engine) as session:
+            row = session.get(FeedbackRollupModel, (scope, key))
+            return _rollup(row) if row is not None else None
+
+    def list_feedback_rollups(self, scope: str, limit: int) -> List[dict]:
+        order = FeedbackRollupModel.key.desc() if scope == "day" else FeedbackRollupModel.key
+        with get_session(self.engine) as session:
+            rows = (
+                session.execute(
+                    select(FeedbackRollupModel).where(FeedbackRollupModel.scope == scope).order_by(order).limit(limit)
+                )
+                .scalars()
+                .all()
+            )
+            return [_rollup(row) for row in rows]
+
     def get_comments(self, review_id: UUID) -> List[Comment]:
         with get_session(self.engine) as session:
             rows = (
@@ -278,6 +725,109 @@ class SqlStore:
                 for row in rows
             ]
 
+    def page_traces_by_agent(
+        self,
+        agent_id: str,
+        limit: int,
+        cursor: str | None = None,
+        review_id: UUID | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Tuple[List[AgentTrace], str | None]:
+        query = select(TraceModel).where(TraceModel.agent_id == agent_id)
+        if review_id is not None:
+            query = query.where(TraceModel.review_id == str(review_id))
+        if since:
+            query = query.where(TraceModel.started_at >= since)
+        if until:
+            query = query.where(TraceModel.started_at < until)
+        after = decode_cursor(cursor, (int,))
+        if after is not None:
+            query = query.where(TraceModel.id > after[0])
+        with get_session(self.engine) as session:
+            rows = session.execute(query.order_by(TraceModel.id).limit(limit + 1)).scalars().all()
+            items = [
+                AgentTrace(
+                    agent_id=row.agent_id,
+                    started_at=row.started_at,
+                    completed_at=row.completed_at,
+                    input_summary=row.input_summary,
+                    output_summary=row.output_summary,
+                )
+                for row in rows[:limit]
+            ]
+        return items, encode_cursor([rows[limit - 1].id]) if len(rows) > limit else None
+
+    def page_messages_by_agent(
+        self,
+        agent_id: str,
+        limit: int,
+        cursor: str | None = None,
+        review_id: UUID | None = None,
+        message_type: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Tuple[List[AgentMessage], str | None]:
+        query = select(MessageModel).where(MessageModel.agent_id == agent_id)
+        if review_id is not None:
+            query = query.where(MessageModel.review_id == str(review_id))
+        if message_type:
+            query = query.where(MessageModel.message_type == message_type)
+        if since:
+            query = query.where(MessageModel.timestamp >= since)
+        if until:
+            query = query.where(MessageModel.timestamp < until)
+        after = decode_cursor(cursor, (int,))
+        if after is not None:
+            query = query.where(MessageModel.id > after[0])
+        with get_session(self.engine) as session:
+            rows = session.execute(query.order_by(MessageModel.id).limit(limit + 1)).scalars().all()
+            items = [
+                AgentMessage(
+                    agent_id=row.agent_id,
+                    message_type=row.message_type,
+                    timestamp=row.timestamp,
+                    payload=row.payload or {},
+                )
+                for row in rows[:limit]
+            ]
+        return items, encode_cursor([rows[limit - 1].id]) if len(rows) > limit else None
+
+    def save_checkpoint(self, review_id: UUID, stage: str, payload: bytes) -> None:
+        with get_session(self.engine) as session:
+            session.merge(
+                CheckpointModel(
+                    review_id=str(review_id),
+                    stage=stage,
+                    payload=payload,
+                    created_at=datetime.utcnow(),
+                )
+            )
+            session.commit()
+
+    def load_checkpoints(self, review_id: UUID) -> Dict[str, bytes]:
+        with get_session(self.engine) as session:
+            rows = session.execute(
+                select(CheckpointModel.stage, CheckpointModel.payload).where(
+                    CheckpointModel.review_id == str(review_id)
+                )
+            ).all()
+            return {row.stage: row.payload for row in rows}
+
+    def clear_checkpoints(self, review_id: UUID) -> None:
+        with get_session(self.engine) as session:
+            session.execute(delete(CheckpointModel).where(CheckpointModel.review_id == str(review_id)))
+            session.commit()
+
+    def prune_checkpoints(self, older_than: datetime) -> int:
+        stale = select(ReviewModel.id).where(
+            ReviewModel.status.in_(("failed", "superseded")), ReviewModel.updated_at < older_than
+        )
+        with get_session(self.engine) as session:
+            pruned = session.execute(delete(CheckpointModel).where(CheckpointModel.review_id.in_(stale))).rowcount
+            session.commit()
+        return pruned
+
     def add_oauth_token(self, token: OAuthToken) -> None:
         with get_session(self.engine) as session:
             session.add(
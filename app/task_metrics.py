@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict
+
+
+class TaskMetrics:
+    def __init__(self, window: int = 200) -> None:
+        self.window = window
+        self.process_started_at = time.time()
+        self.startup_seconds: float | None = None
+        self._running: Dict[str, float] = {}
+        self._durations: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+        self._setup: Deque[float] = deque(maxlen=window)
+        self._states: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def mark_startup(self, seconds: float) -> None:
+        self.startup_seconds = seconds
+
+    def record_setup(self, seconds: float) -> None:
+        with self._lock:
+            self._setup.append(seconds)
+
+    def task_started(self, task_id: str) -> None:
+        with self._lock:
+            self._running[task_id] = time.perf_counter()
+
+    def task_finished(self, task_id: str, name: str, state: str | None) -> float | None:
+        with self._lock:
+            started = self._running.pop(task_id, None)
+            self._states[name][state or "UNKNOWN"] += 1
+            if started is None:
+                return None
+            elapsed = time.perf_counter() - started
+            self._durations[name].append(elapsed)
+            return elapsed
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            tasks = {}
+            for name, samples in self._durations.items():
+                ordered = sorted(samples)
+                tasks[name] = {
+                    "count": sum(self._states[name].values()),
+                    "states": dict(self._states[name]),
+                    "mean_ms": round(statistics.mean(ordered) * 1000, 1),
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                }
+            setup = list(self._setup)
+            return {
+                "process_started_at": self.process_started_at,
+                "startup_ms": round(self.startup_seconds * 1000, 1) if self.startup_seconds is not None else None,
+                "setup_mean_ms": round(statistics.mean(setup) * 1000, 3) if setup else None,
+                "running": len(self._running),
+                "tasks": tasks,
+            }
+
+
+task_metrics = TaskMetrics()
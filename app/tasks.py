@@ -1,59 +1,252 @@
 from __future__ import annotations
 
+import logging
+import time
+from contextlib import ExitStack
 from uuid import UUID
 
+from celery import chord
+from celery.signals import task_postrun, task_prerun, worker_process_init
+from celery.worker.control import inspect_command
+from unidiff.errors import UnidiffParseError
+
+from app import worker
+from app.batching import batcher
+from app.blobs import diff_blobs
 from app.celery_app import celery_app
 from app.config import settings
-from app.integrations.github import build_summary, create_check_run, post_pr_comment, post_review_comments
-from app.integrations.gitlab import post_mr_comment, post_mr_inline_comments, set_commit_status
-from app.pipeline.review import run_review_pipeline
-from app.rag.service import RagService
-from app.storage_sql import SqlStore
+from app.leases import ReviewLease, lease_owner
+from app.pipeline.checkpoints import ReviewCheckpointer, ReviewSuperseded
+from app.pipeline.critic import run_critic, should_run_critic
+from app.pipeline.review import is_degraded, run_review_batch, run_review_pipeline
+from app.pipeline.shards import dump_shard_result, merge_shard_results, split_diff
+from app.task_metrics import task_metrics
+from app.worker import execute_review
+
+
+logger = logging.getLogger("codereview")
+
+
+@worker_process_init.connect
+def warm_worker_process(**_kwargs) -> None:
+    started = time.perf_counter()
+    worker.init_process_worker()
+    task_metrics.mark_startup(time.perf_counter() - started)
+    logger.info("Worker process ready in %.1fms", task_metrics.startup_seconds * 1000)
+
+
+@task_prerun.connect
+def record_task_start(task_id: str | None = None, **_kwargs) -> None:
+    task_metrics.task_started(task_id)
+
+
+@task_postrun.connect
+def record_task_end(task_id: str | None = None, task=None, state: str | None = None, **_kwargs) -> None:
+    elapsed = task_metrics.task_finished(task_id, task.name if task else "unknown", state)
+    if elapsed is not None:
+        logger.info("Task %s %s %s in %.1fms", task.name if task else "unknown", task_id, state, elapsed * 1000)
+
 
+@inspect_command()
+def review_metrics(_state) -> dict:
+    return task_metrics.snapshot()
 
-@celery_app.task(name="app.tasks.process_review")
-def process_review(review_id: str, diff_text: str) -> None:
-    store = SqlStore(settings.database_url)
-    rag_index = RagService()
+
+@celery_app.task(name="app.tasks.process_review", acks_late=True, reject_on_worker_lost=True)
+def process_review(review_id: str, diff_ref: str) -> None:
+    store, rag_index, setup_seconds = worker.resources()
+    task_metrics.record_setup(setup_seconds)
     review_uuid = UUID(review_id)
-    store.mark_in_progress(review_uuid)
+    diff_text = worker.load_job_diff(store, review_uuid, diff_ref)
+    if diff_text is None:
+        return
     try:
-        comments, traces, messages = run_review_pipeline(review_uuid, diff_text, rag_index=rag_index)
-        store.add_comments(review_uuid, comments)
-        store.add_traces(review_uuid, traces)
-        store.add_messages(review_uuid, messages)
-        store.complete_review(review_uuid)
-        review = store.get_review(review_uuid)
-        pr_url = review.metadata.get("pr_url")
-        if pr_url and settings.github_token:
-            commit_id = review.metadata.get("commit_id")
-            post_pr_comment(pr_url, build_summary(comments), settings.github_token)
-            post_review_comments(
-                pr_url,
-                "Inline review comments",
-                comments,
-                settings.github_token,
-                commit_id=commit_id,
-            )
-            if commit_id:
-                create_check_run(
-                    pr_url,
-                    commit_id,
-                    "AI Code Review",
-                    build_summary(comments),
-                    settings.github_token,
-                )
-        if pr_url and settings.gitlab_token:
-            commit_id = review.metadata.get("commit_id")
-            post_mr_comment(pr_url, build_summary(comments), settings.gitlab_token)
-            post_mr_inline_comments(pr_url, comments, settings.gitlab_token, commit_id=commit_id)
-            if commit_id:
-                set_commit_status(
-                    pr_url,
-                    commit_id,
-                    "success",
-                    "AI review completed",
-                    settings.gitlab_token,
+        shards = split_diff(diff_text, settings.review_shard_max_lines) if settings.review_sharding else []
+    except UnidiffParseError as exc:
+        logger.warning("Review %s has a malformed diff: %s", review_id, exc)
+        store.mark_failed(review_uuid, f"Malformed diff: {exc}")
+        return
+    if len(shards) > 1:
+        owner = lease_owner()
+        if store.mark_in_progress(review_uuid, lease_owner=owner, lease_seconds=settings.review_lease_seconds) is None:
+            return
+        try:
+            chord(
+                review_shard.s(review_id, index, diff_blobs().put(shard_text), owner)
+                for index, shard_text in enumerate(shards)
+            )(finalize_review.s(review_id, diff_ref, owner))
+        except Exception as exc:
+            logger.exception("Dispatching shards for review %s failed", review_id)
+            store.mark_failed(review_uuid, f"Dispatching shards failed: {exc}", lease_owner=owner)
+        return
+    comments = execute_review(store, rag_index, review_uuid, diff_text)
+    if comments is not None and should_run_critic(review_uuid):
+        critique_review.delay(review_id, diff_ref)
+
+
+def enqueue_batched_review(review_id: str, diff_ref: str) -> None:
+    size = batcher().push(review_id, diff_ref)
+    if size >= settings.review_batch_size:
+        flush_review_batch.delay()
+    elif size == 1:
+        flush_review_batch.apply_async(countdown=settings.review_batch_window_seconds)
+
+
+@celery_app.task(name="app.tasks.flush_review_batch")
+def flush_review_batch() -> int:
+    store, rag_index, setup_seconds = worker.resources()
+    task_metrics.record_setup(setup_seconds)
+    batch_id, items = batcher().take(settings.review_batch_size)
+    remaining = batcher().pending()
+    if remaining:
+        countdown = 0 if remaining >= settings.review_batch_size else settings.review_batch_window_seconds
+        flush_review_batch.apply_async(countdown=countdown)
+    if not items:
+        return 0
+    owner = lease_owner()
+    settled: set = set()
+    try:
+        count = _run_review_batch(store, rag_index, items, settled, owner)
+    except Exception as exc:
+        logger.exception("Review batch %s failed", batch_id)
+        for review_id, _diff_ref in items:
+            review_uuid = UUID(review_id)
+            if review_uuid not in settled:
+                store.mark_failed(review_uuid, f"Review batch failed: {exc}", lease_owner=owner)
+        count = 0
+    batcher().ack(batch_id)
+    return count
+
+
+def _run_review_batch(store, rag_index, items: list, settled: set, owner: str) -> int:
+    with ExitStack() as leases:
+        return _review_leased_batch(store, rag_index, items, settled, owner, leases)
+
+
+def _review_leased_batch(store, rag_index, items: list, settled: set, owner: str, leases: ExitStack) -> int:
+    jobs = []
+    for review_id, diff_ref in items:
+        review_uuid = UUID(review_id)
+        diff_text = worker.load_job_diff(store, review_uuid, diff_ref)
+        if diff_text is None:
+            settled.add(review_uuid)
+            continue
+        if store.mark_in_progress(review_uuid, lease_owner=owner, lease_seconds=settings.review_lease_seconds) is None:
+            settled.add(review_uuid)
+            continue
+        leases.enter_context(ReviewLease(store, review_uuid, owner, settings.review_lease_seconds))
+        jobs.append((review_uuid, diff_ref, diff_text))
+    if not jobs:
+        return 0
+    try:
+        outputs = run_review_batch([(review_uuid, diff_text) for review_uuid, _, diff_text in jobs], rag_index)
+    except Exception as exc:
+        logger.warning("Batch of %s reviews failed, falling back to single tasks: %s", len(jobs), exc)
+        leases.close()
+        for review_uuid, diff_ref, _diff_text in jobs:
+            store.mark_failed(review_uuid, f"Review batch failed: {exc}", lease_owner=owner)
+            process_review.delay(str(review_uuid), diff_ref)
+            settled.add(review_uuid)
+        return 0
+    completed = {
+        review.id: review
+        for review in store.complete_reviews(
+            [
+                (
+                    review_uuid,
+                    comments,
+                    traces,
+                    messages,
+                    {"batch_size": len(jobs), **({"degraded": True} if is_degraded(messages) else {})},
                 )
+                for (review_uuid, _, _), (comments, traces, messages) in zip(jobs, outputs)
+            ],
+            lease_owner=owner,
+        )
+    }
+    settled.update(review_uuid for review_uuid, _, _ in jobs)
+    for (review_uuid, diff_ref, _), (comments, _traces, _messages) in zip(jobs, outputs):
+        if review_uuid not in completed:
+            continue
+        try:
+            worker.publish_review(completed[review_uuid], comments)
+        except Exception as exc:
+            logger.warning("Publishing review %s failed: %s", review_uuid, exc)
+        if should_run_critic(review_uuid):
+            critique_review.delay(str(review_uuid), diff_ref)
+    return len(jobs)
+
+
+@celery_app.task(
+    name="app.tasks.review_shard",
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    max_retries=settings.review_shard_max_retries,
+)
+def review_shard(self, review_id: str, index: int, shard_ref: str, owner: str | None = None) -> dict:
+    store, rag_index, setup_seconds = worker.resources()
+    task_metrics.record_setup(setup_seconds)
+    review_uuid = UUID(review_id)
+    checkpoints = ReviewCheckpointer(store, review_uuid, prefix=f"shard:{index}:")
+    saved = checkpoints.get("result")
+    if saved is not None:
+        return saved
+    try:
+        with ExitStack() as lease:
+            if owner is not None:
+                lease.enter_context(ReviewLease(store, review_uuid, owner, settings.review_lease_seconds))
+            comments, traces, messages = run_review_pipeline(
+                review_uuid, diff_blobs().get(shard_ref), rag_index=rag_index, checkpointer=checkpoints
+            )
+    except ReviewSuperseded:
+        return {"index": index, "superseded": True}
     except Exception as exc:
-        store.mark_failed(review_uuid, str(exc))
+        if self.request.retries < self.max_retries:
+            countdown = settings.review_shard_retry_backoff_seconds * 2**self.request.retries
+            raise self.retry(exc=exc, countdown=countdown)
+        logger.warning("Shard %s of review %s failed: %s", index, review_id, exc)
+        return {"index": index, "error": str(exc)}
+    result = dump_shard_result(index, comments, traces, messages)
+    checkpoints.save("result", result)
+    return result
+
+
+@celery_app.task(name="app.tasks.finalize_review", acks_late=True)
+def finalize_review(results: list, review_id: str, diff_ref: str, owner: str | None = None) -> None:
+    store, _rag_index, _setup_seconds = worker.resources()
+    review_uuid = UUID(review_id)
+    if store.get_status(review_uuid) == "superseded" or any(item.get("superseded") for item in results):
+        store.clear_checkpoints(review_uuid)
+        return
+    failed = [item for item in results if item.get("error")]
+    if failed:
+        store.update_metadata(
+            review_uuid,
+            {"failed_shards": [{"index": item["index"], "error": item["error"]} for item in failed]},
+        )
+        store.mark_failed(review_uuid, f"{len(failed)} of {len(results)} shards failed", lease_owner=owner)
+        return
+    try:
+        comments, traces, messages = merge_shard_results(review_uuid, results)
+        finished = worker.finish_review(store, review_uuid, comments, traces, messages, lease_owner=owner)
+    except Exception as exc:
+        logger.exception("Finalizing review %s failed", review_id)
+        if store.get_status(review_uuid) == "in_progress":
+            store.mark_failed(review_uuid, f"Finalizing shards failed: {exc}", lease_owner=owner)
+        return
+    if finished and should_run_critic(review_uuid):
+        critique_review.delay(review_id, diff_ref)
+
+
+@celery_app.task(name="app.tasks.critique_review")
+def critique_review(review_id: str, diff_ref: str) -> None:
+    store, _rag_index, setup_seconds = worker.resources()
+    task_metrics.record_setup(setup_seconds)
+    review_uuid = UUID(review_id)
+    try:
+        diff_text = diff_blobs().get(diff_ref)
+    except (KeyError, ValueError, OSError) as exc:
+        logger.warning("Skipping critic for review %s: diff %s is unavailable: %s", review_id, diff_ref, exc)
+        return
+    store.add_messages(review_uuid, run_critic(diff_text, store.get_comments(review_uuid)))
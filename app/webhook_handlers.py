@@ -7,6 +7,7 @@ from uuid import UUID
 import requests
 
 from app.config import settings
+from app.idempotency import event_time
 
 
 def _fetch_github_diff(diff_url: str) -> str:
@@ -19,7 +20,9 @@ def _fetch_github_diff(diff_url: str) -> str:
 
 
 async def handle_github_webhook(
-    payload: bytes, enqueue: Callable[[str, str, dict], Awaitable[UUID]]
+    payload: bytes,
+    enqueue: Callable[[str, str, dict], Awaitable[UUID]],
+    delivery_id: str | None = None,
 ) -> dict:
     data = json.loads(payload.decode("utf-8"))
     action = data.get("action")
@@ -34,6 +37,8 @@ async def handle_github_webhook(
         "repo": data.get("repository", {}).get("full_name"),
         "pr_url": pr.get("html_url"),
         "commit_id": pr.get("head", {}).get("sha"),
+        "pr_updated_at": event_time(pr.get("updated_at")),
+        "delivery_id": delivery_id,
     }
 
     diff_text = ""
@@ -48,7 +53,9 @@ async def handle_github_webhook(
 
 
 async def handle_gitlab_webhook(
-    payload: bytes, enqueue: Callable[[str, str, dict], Awaitable[UUID]]
+    payload: bytes,
+    enqueue: Callable[[str, str, dict], Awaitable[UUID]],
+    delivery_id: str | None = None,
 ) -> dict:
     data = json.loads(payload.decode("utf-8"))
     if data.get("object_kind") != "merge_request":
@@ -60,6 +67,8 @@ async def handle_gitlab_webhook(
         "repo": data.get("project", {}).get("path_with_namespace"),
         "pr_url": data.get("object_attributes", {}).get("url"),
         "commit_id": data.get("object_attributes", {}).get("last_commit", {}).get("id"),
+        "pr_updated_at": event_time(data.get("object_attributes", {}).get("updated_at")),
+        "delivery_id": delivery_id,
     }
     review_id = await enqueue("", metadata)
     return {"status": "accepted", "review_id": str(review_id)}
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from app.blobs import diff_blobs
+from app.config import settings
+from app.integrations.github import build_summary, create_check_run, post_pr_comment, post_review_comments
+from app.integrations.gitlab import post_mr_comment, post_mr_inline_comments, set_commit_status
+from app.leases import ReviewLease, lease_owner
+from app.models import AgentMessage, AgentTrace, Comment, ReviewStatus
+from app.pipeline.checkpoints import LeaseLost, ReviewCheckpointer, ReviewSuperseded
+from app.pipeline.critic import run_critic, should_run_critic
+from app.pipeline.review import is_degraded, run_review_pipeline
+from app.queue import CriticJob, ReviewJob
+
+
+logger = logging.getLogger("codereview")
+
+_resources: Dict[str, object] = {}
+
+
+def configure(store: object, rag_index: object | None) -> None:
+    _resources["store"] = store
+    _resources["rag_index"] = rag_index
+
+
+def init_process_worker() -> None:
+    from app.llm_routing import router
+    from app.rag.service import RagService
+    from app.storage_sql import SqlStore
+
+    configure(SqlStore(settings.database_url), RagService())
+    if settings.llm_warm_on_start:
+        try:
+            router.warm()
+        except Exception as exc:
+            logger.warning("Model warm-up failed: %s", exc)
+
+
+def resources() -> Tuple[object, object | None, float]:
+    started = time.perf_counter()
+    if "store" not in _resources:
+        init_process_worker()
+    return _resources["store"], _resources.get("rag_index"), time.perf_counter() - started
+
+
+def load_job_diff(store, review_id: UUID, diff_ref: str) -> str | None:
+    try:
+        return diff_blobs().get(diff_ref)
+    except (KeyError, ValueError, OSError) as exc:
+        logger.warning("Diff %s for review %s is unavailable: %s", diff_ref, review_id, exc)
+        store.mark_failed(review_id, f"Review diff unavailable: {exc}")
+        return None
+
+
+def publish_review(review: ReviewStatus, comments: List[Comment]) -> None:
+    pr_url = review.metadata.get("pr_url")
+    if pr_url and settings.github_token:
+        commit_id = review.metadata.get("commit_id")
+        post_pr_comment(pr_url, build_summary(comments), settings.github_token)
+        post_review_comments(
+            pr_url,
+            "Inline review comments",
+            comments,
+            settings.github_token,
+            commit_id=commit_id,
+        )
+        if commit_id:
+            create_check_run(
+                pr_url,
+                commit_id,
+                "AI Code Review",
+                build_summary(comments),
+                settings.github_token,
+            )
+    if pr_url and settings.gitlab_token:
+        commit_id = review.metadata.get("commit_id")
+        post_mr_comment(pr_url, build_summary(comments), settings.gitlab_token)
+        post_mr_inline_comments(pr_url, comments, settings.gitlab_token, commit_id=commit_id)
+        if commit_id:
+            set_commit_status(
+                pr_url,
+                commit_id,
+                "success",
+                "AI review completed",
+                settings.gitlab_token,
+            )
+
+
+def finish_review(
+    store,
+    review_id: UUID,
+    comments: List[Comment],
+    traces: List[AgentTrace],
+    messages: List[AgentMessage],
+    lease_owner: str | None = None,
+) -> bool:
+    review = store.persist_review_result(
+        review_id,
+        comments,
+        traces,
+        messages,
+        metadata_updates={"degraded": True} if is_degraded(messages) else None,
+        lease_owner=lease_owner,
+    )
+    if review is None:
+        logger.info("Review %s changed state or lost its lease before completion; not publishing", review_id)
+        return False
+    publish_review(review, comments)
+    return True
+
+
+def execute_review(
+    store, rag_index: object | None, review_id: UUID, diff_text: str, reraise: bool = False
+) -> List[Comment] | None:
+    owner = lease_owner()
+    if store.mark_in_progress(review_id, lease_owner=owner, lease_seconds=settings.review_lease_seconds) is None:
+        logger.info("Skipping review %s: claimed elsewhere or no longer runnable", review_id)
+        return None
+    with ReviewLease(store, review_id, owner, settings.review_lease_seconds) as lease:
+        checkpointer = ReviewCheckpointer(store, review_id, lease=lease)
+        try:
+            comments, traces, messages = run_review_pipeline(
+                review_id, diff_text, rag_index=rag_index, checkpointer=checkpointer
+            )
+            if not finish_review(store, review_id, comments, traces, messages, lease_owner=owner):
+                return None
+            return comments
+        except LeaseLost:
+            logger.info("Stopped review %s after losing its lease", review_id)
+            return None
+        except ReviewSuperseded:
+            logger.info("Cancelled superseded review %s", review_id)
+            checkpointer.clear()
+            return None
+        except Exception as exc:
+            store.mark_failed(review_id, str(exc), lease_owner=owner)
+            if reraise:
+                raise
+            return None
+
+
+def run_review_job(job: ReviewJob) -> CriticJob | None:
+    store = _resources["store"]
+    diff_text = load_job_diff(store, job.review_id, job.diff_ref)
+    if diff_text is None:
+        return None
+    comments = execute_review(store, _resources.get("rag_index"), job.review_id, diff_text, reraise=True)
+    if comments is None or not should_run_critic(job.review_id):
+        return None
+    return CriticJob(review_id=job.review_id, diff_ref=job.diff_ref, comments=comments)
+
+
+def run_critic_job(job: CriticJob) -> None:
+    try:
+        diff_text = diff_blobs().get(job.diff_ref)
+        _resources["store"].add_messages(job.review_id, run_critic(diff_text, job.comments))
+    except Exception as exc:
+        logger.warning("Critic failed for review %s: %s", job.review_id, exc)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+from pathlib import Path
+from typing import Dict, List
+
+from app.autoscaler import QueueAutoscaler
+from app.config import settings
+
+
+def arrivals(duration: float, base_rate: float, burst_every: float, burst_size: int, seed: int) -> List[float]:
+    rng = random.Random(seed)
+    times: List[float] = []
+    now = 0.0
+    while base_rate > 0:
+        now += rng.expovariate(base_rate)
+        if now >= duration:
+            break
+        times.append(now)
+    burst = burst_every
+    while burst_every > 0 and burst < duration:
+        times.extend(burst + rng.uniform(0, 5) for _ in range(burst_size))
+        burst += burst_every
+    return sorted(times)
+
+
+def simulate(
+    name: str,
+    jobs: List[float],
+    service_mean: float,
+    duration: float,
+    workers: int,
+    autoscaler: QueueAutoscaler | None,
+    interval: float,
+    tick: float,
+    seed: int,
+) -> Dict[str, object]:
+    rng = random.Random(seed)
+    pending: List[float] = []
+    running: List[float] = []
+    waits: List[float] = []
+    worker_seconds = 0.0
+    max_depth = 0
+    next_job = 0
+    next_decision = interval
+    now = 0.0
+    end = duration * 3
+    while now < end and (now < duration or pending or running or next_job < len(jobs)):
+        while next_job < len(jobs) and jobs[next_job] <= now:
+            pending.append(jobs[next_job])
+            next_job += 1
+        running = [finish for finish in running if finish > now]
+        while pending and len(running) < workers:
+            enqueued = pending.pop(0)
+            waits.append(now - enqueued)
+            running.append(now + rng.lognormvariate(0, 0.5) * service_mean)
+        max_depth = max(max_depth, len(pending))
+        worker_seconds += max(workers, len(running)) * tick
+        if autoscaler is not None and now >= next_decision:
+            oldest = now - pending[0] if pending else 0.0
+            workers = autoscaler.observe(workers, len(pending), len(running), oldest, None, now)
+            next_decision += interval
+        now += tick
+    ordered = sorted(waits)
+    return {
+        "scenario": name,
+        "jobs": len(waits),
+        "wait_p50_s": round(ordered[len(ordered) // 2], 2) if ordered else 0.0,
+        "wait_p95_s": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2) if ordered else 0.0,
+        "wait_mean_s": round(statistics.mean(ordered), 2) if ordered else 0.0,
+        "max_depth": max_depth,
+        "worker_seconds": round(worker_seconds, 1),
+        "scaling_events": len(autoscaler.events) if autoscaler is not None else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate the review queue autoscaler under bursty webhook traffic.")
+    parser.add_argument("--duration", type=float, default=1800.0, help="Seconds of simulated traffic.")
+    parser.add_argument("--base-rate", type=float, default=0.05, help="Steady arrivals per second.")
+    parser.add_argument("--burst-every", type=float, default=300.0, help="Seconds between webhook bursts.")
+    parser.add_argument("--burst-size", type=int, default=40)
+    parser.add_argument("--service-mean", type=float, default=20.0, help="Mean review time in seconds.")
+    parser.add_argument("--min-workers", type=int, default=settings.review_workers_min)
+    parser.add_argument("--max-workers", type=int, default=settings.review_workers_max)
+    parser.add_argument("--interval", type=float, default=settings.review_autoscale_interval_seconds)
+    parser.add_argument("--tick", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="Optional JSON report path.")
+    args = parser.parse_args()
+
+    jobs = arrivals(args.duration, args.base_rate, args.burst_every, args.burst_size, args.seed)
+    common = dict(
+        jobs=jobs,
+        service_mean=args.service_mean,
+        duration=args.duration,
+        interval=args.interval,
+        tick=args.tick,
+        seed=args.seed,
+    )
+    report = [
+        simulate(f"fixed-{args.min_workers}", workers=args.min_workers, autoscaler=None, **common),
+        simulate(f"fixed-{args.max_workers}", workers=args.max_workers, autoscaler=None, **common),
+        simulate(
+            f"autoscale-{args.min_workers}-{args.max_workers}",
+            workers=args.min_workers,
+            autoscaler=QueueAutoscaler(
+                min_workers=args.min_workers,
+                max_workers=args.max_workers,
+                jobs_per_worker=settings.review_autoscale_jobs_per_worker,
+                target_wait_seconds=settings.review_autoscale_target_wait_seconds,
+                cooldown_seconds=settings.review_autoscale_cooldown_seconds,
+            ),
+            **common,
+        ),
+    ]
+    for row in report:
+        print(json.dumps(row))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
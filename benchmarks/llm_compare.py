@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+from difflib import SequenceMatcher
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+from app.config import settings
+from app.llm import LLMClient, parse_findings, parse_json_block
+from app.prompts import base_prompt
+
+
+ROLES = ["Code Reviewer", "Security Reviewer", "Style Reviewer"]
+
+
+def load_diffs(diff_dir: str | None, limit: int) -> List[str]:
+    if diff_dir:
+        paths = sorted(Path(diff_dir).glob("*.diff")) + sorted(Path(diff_dir).glob("*.patch"))
+        return [path.read_text(encoding="utf-8", errors="ignore") for path in paths[:limit]]
+
+    from app.blobs import load_review_diff
+    from app.storage_sql import SqlStore
+
+    store = SqlStore(settings.database_url)
+    diffs = []
+    for review in store.list_reviews():
+        diff_text = load_review_diff(review.metadata)
+        if diff_text:
+            diffs.append(diff_text)
+        if len(diffs) >= limit:
+            break
+    return diffs
+
+
+def _finding_keys(output: str) -> set:
+    payload = parse_json_block(output) or {}
+    return {
+        (item.get("file_path", ""), item.get("line_number"), item.get("severity", ""))
+        for item in parse_findings(payload)
+    }
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_variant(name: str, prompts: List[str], draft_model: str) -> Dict[str, object]:
+    quantization, _, assisted = name.partition("+")
+    client = LLMClient(
+        quantization=quantization,
+        draft_model_name=draft_model if assisted == "draft" else "",
+    )
+    load_start = perf_counter()
+    client.load()
+    load_seconds = perf_counter() - load_start
+    outputs: List[str] = []
+    latencies: List[float] = []
+    for prompt in prompts:
+        start = perf_counter()
+        outputs.append(client.generate(prompt))
+        latencies.append((perf_counter() - start) * 1000)
+    return {
+        "name": name,
+        "acceptance_rate": client.acceptance_rate(),
+        "load_seconds": round(load_seconds, 2),
+        "latencies_ms": latencies,
+        "outputs": outputs,
+    }
+
+
+def compare(baseline: Dict[str, object], candidate: Dict[str, object]) -> Dict[str, object]:
+    similarities = []
+    overlaps = []
+    parsed = 0
+    for base_output, output in zip(baseline["outputs"], candidate["outputs"]):
+        similarities.append(SequenceMatcher(None, base_output, output).ratio())
+        base_keys = _finding_keys(base_output)
+        keys = _finding_keys(output)
+        if parse_json_block(output) is not None:
+            parsed += 1
+        union = base_keys | keys
+        overlaps.append(len(base_keys & keys) / len(union) if union else 1.0)
+    latencies = candidate["latencies_ms"]
+    return {
+        "variant": candidate["name"],
+        "load_seconds": candidate["load_seconds"],
+        "acceptance_rate": candidate["acceptance_rate"],
+        "p50_ms": round(_percentile(latencies, 0.5), 1),
+        "p95_ms": round(_percentile(latencies, 0.95), 1),
+        "mean_ms": round(statistics.mean(latencies), 1) if latencies else 0.0,
+        "json_parse_rate": round(parsed / len(latencies), 3) if latencies else 0.0,
+        "text_similarity": round(statistics.mean(similarities), 3) if similarities else 0.0,
+        "finding_overlap": round(statistics.mean(overlaps), 3) if overlaps else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare LLM backends on stored diffs.")
+    parser.add_argument("--diff-dir", default=None, help="Directory of .diff/.patch files.")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument(
+        "--variants",
+        default="none,dynamic_int8",
+        help="Comma-separated quantization modes, optionally suffixed with +draft; "
+        "the first is the quality baseline.",
+    )
+    parser.add_argument("--draft-model", default=settings.llm_draft_model)
+    parser.add_argument("--output", default=None, help="Optional JSON report path.")
+    args = parser.parse_args()
+
+    settings.llm_cache_enabled = False
+    diffs = load_diffs(args.diff_dir, args.limit)
+    if not diffs:
+        raise SystemExit("No stored diffs found.")
+    prompts = [base_prompt(role, diff_text, "") for diff_text in diffs for role in ROLES]
+
+    variants = [item.strip() for item in args.variants.split(",") if item.strip()]
+    results = [run_variant(variant, prompts, args.draft_model) for variant in variants]
+    report = [compare(results[0], result) for result in results]
+    for row in report:
+        print(json.dumps(row))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from app.db import checkout_stats
+from app.storage_async import AsyncSqlStore, AsyncStoreAdapter
+from app.storage_sql import SqlStore
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 2) if ordered else 0.0
+
+
+async def _probe(interval: float, lags: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def _request(store, name: str, index: int) -> None:
+    review, _ = await store.claim_review({"repo": f"org/repo-{index % 10}"}, [f"bench:{name}:{index}"])
+    await store.get_result(review.id)
+    await store.feedback_summary(review.id)
+
+
+async def measure(name: str, store, requests: int, concurrency: int) -> Dict[str, object]:
+    lags: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(0.005, lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(index: int) -> None:
+        async with semaphore:
+            await _request(store, name, index)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bounded(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    await store.dispose()
+    return {
+        "store": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "requests_per_s": round(requests / elapsed, 1),
+        "loop_lag_p50_ms": _percentile(lags, 0.5),
+        "loop_lag_p99_ms": _percentile(lags, 0.99),
+        "loop_lag_max_ms": round(max(lags, default=0.0), 2),
+        "probe_ticks": len(lags),
+    }
+
+
+async def run(database_url: str, requests: int, concurrency: int) -> list:
+    sync_store = SqlStore(database_url)
+    return [
+        await measure("sync-in-loop", AsyncStoreAdapter(sync_store), requests, concurrency),
+        await measure("sync-thread-offload", AsyncStoreAdapter(sync_store, offload=True), requests, concurrency),
+        await measure("async", AsyncSqlStore(database_url), requests, concurrency),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Event-loop lag while async handlers hit the review store.")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--database-url", default=None, help="Sync SQLAlchemy URL (default: temp SQLite file).")
+    parser.add_argument("--output", default=None, help="Optional JSON report path.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{Path(tmp) / 'loop_stall.db'}"
+        report = asyncio.run(run(database_url, args.requests, args.concurrency))
+    for row in report:
+        print(json.dumps(row))
+    print(json.dumps({"pool_checkout": {name: stats.snapshot() for name, stats in checkout_stats.items()}}))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
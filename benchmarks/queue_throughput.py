@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+from uuid import uuid4
+
+from app.durable_queue import DurableReviewQueue
+from app.queue import ReviewJob, ReviewQueue
+
+
+def noop_handler(job: ReviewJob) -> None:
+    return None
+
+
+async def measure(name: str, queue: ReviewQueue, jobs: int) -> Dict[str, object]:
+    batch = [ReviewJob(review_id=uuid4(), diff_ref=f"sha256:{index:064x}", cost=index % 300) for index in range(jobs)]
+    started = time.perf_counter()
+    for job in batch:
+        await queue.enqueue(job)
+    enqueue_seconds = time.perf_counter() - started
+    await queue.start(noop_handler)
+    started = time.perf_counter()
+    await queue._idle.wait()
+    drain_seconds = time.perf_counter() - started
+    await queue.stop()
+    return {
+        "queue": name,
+        "jobs": jobs,
+        "enqueue_per_s": round(jobs / enqueue_seconds, 1),
+        "dequeue_per_s": round(jobs / drain_seconds, 1),
+        "enqueue_us": round(enqueue_seconds / jobs * 1e6, 1),
+        "dequeue_us": round(drain_seconds / jobs * 1e6, 1),
+    }
+
+
+async def run(jobs: int, workers: int, path: str) -> list:
+    return [
+        await measure("memory", ReviewQueue(workers=workers, max_running_per_repo=0), jobs),
+        await measure("sqlite-wal", DurableReviewQueue(path, workers=workers, max_running_per_repo=0), jobs),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare in-memory and SQLite-backed review queue throughput.")
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--path", default=None, help="SQLite file for the durable queue (default: temp dir).")
+    parser.add_argument("--output", default=None, help="Optional JSON report path.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path or str(Path(tmp) / "review_queue.db")
+        report = asyncio.run(run(args.jobs, args.workers, path))
+    for row in report:
+        print(json.dumps(row))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
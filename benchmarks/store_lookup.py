@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert, text
+
+from app.db_models import (
+    CommentModel,
+    FeedbackModel,
+    MessageModel,
+    OAuthTokenModel,
+    ReviewModel,
+    TraceModel,
+)
+from app.migrations import current_version, migrate
+from app.storage_sql import SqlStore
+
+LOOKUP_VERSION = 3
+AGENTS = ["security", "style", "performance", "tests", "docs"]
+LOOKUP_INDEXES = [
+    "ix_comments_review_id_id",
+    "ix_traces_review_id_id",
+    "ix_traces_agent_id_id",
+    "ix_messages_review_id_id",
+    "ix_messages_agent_id_id",
+    "ix_feedback_review_id_comment_id",
+    "ix_oauth_tokens_provider_user_id",
+    "ix_idempotency_keys_review_id",
+]
+
+
+def _chunks(rows: List[dict], size: int = 20000):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def populate(store: SqlStore, rows: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    review_ids = [str(uuid4()) for _ in range(max(rows // 20, 1))]
+    tables = [
+        (
+            ReviewModel,
+            [
+                {"id": review_id, "status": "completed", "created_at": now, "updated_at": now, "meta": {}}
+                for review_id in review_ids
+            ],
+        ),
+        (
+            CommentModel,
+            [
+                {
+                    "id": str(uuid4()),
+                    "review_id": rng.choice(review_ids),
+                    "agent_id": rng.choice(AGENTS),
+                    "file_path": f"src/module_{index % 500}.py",
+                    "line_number": index % 400,
+                    "severity": "low",
+                    "content": "Consider extracting this block.",
+                    "meta": {},
+                }
+                for index in range(rows)
+            ],
+        ),
+        (
+            TraceModel,
+            [
+                {
+                    "review_id": rng.choice(review_ids),
+                    "agent_id": rng.choice(AGENTS),
+                    "started_at": now,
+                    "completed_at": now,
+                    "input_summary": "diff",
+                    "output_summary": "findings",
+                }
+                for _ in range(rows // 2)
+            ],
+        ),
+        (
+            MessageModel,
+            [
+                {
+                    "review_id": rng.choice(review_ids),
+                    "agent_id": "critic" if index % 1000 == 0 else rng.choice(AGENTS),
+                    "message_type": "finding",
+                    "timestamp": now,
+                    "payload": {},
+                }
+                for index in range(rows // 2)
+            ],
+        ),
+        (
+            FeedbackModel,
+            [
+                {
+                    "id": str(uuid4()),
+                    "review_id": rng.choice(review_ids),
+                    "comment_id": str(uuid4()),
+                    "rating": rng.choice([-1, 0, 1]),
+                    "user_id": None,
+                    "created_at": now,
+                }
+                for _ in range(rows // 10)
+            ],
+        ),
+        (
+            OAuthTokenModel,
+            [
+                {
+                    "provider": rng.choice(["github", "gitlab"]),
+                    "user_id": f"user-{index}",
+                    "access_token": "encrypted",
+                    "created_at": now,
+                }
+                for index in range(max(rows // 10, 1))
+            ],
+        ),
+    ]
+    with store.engine.begin() as conn:
+        for model, table_rows in tables:
+            for chunk in _chunks(table_rows):
+                conn.execute(insert(model), chunk)
+    return review_ids
+
+
+def measure(lookups: Dict[str, Callable[[], object]], samples: int) -> Dict[str, dict]:
+    results = {}
+    for name, lookup in lookups.items():
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            lookup()
+            timings.append((time.perf_counter() - started) * 1000)
+        ordered = sorted(timings)
+        results[name] = {
+            "p50_ms": round(statistics.median(ordered), 3),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-review and per-agent SqlStore lookups before and after indexing.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Comment rows; traces and messages get half.")
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--path", default=None, help="SQLite file (default: temp dir).")
+    parser.add_argument("--output", default=None, help="Optional JSON report path.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SqlStore(f"sqlite:///{args.path or Path(tmp) / 'store_lookup.db'}")
+        with store.engine.begin() as conn:
+            for name in LOOKUP_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            conn.execute(text("DELETE FROM schema_version WHERE version >= :version"), {"version": LOOKUP_VERSION})
+        started = time.perf_counter()
+        review_ids = populate(store, args.rows, args.seed)
+        populate_seconds = time.perf_counter() - started
+        rng = random.Random(args.seed)
+        sample_ids = [UUID(rng.choice(review_ids)) for _ in range(args.samples)]
+        lookups = {
+            "get_comments": lambda: store.get_comments(rng.choice(sample_ids)),
+            "get_traces": lambda: store.get_traces(rng.choice(sample_ids)),
+            "get_messages": lambda: store.get_messages(rng.choice(sample_ids)),
+            "list_feedback": lambda: store.list_feedback(rng.choice(sample_ids)),
+            "list_messages_by_agent(critic)": lambda: store.list_messages_by_agent("critic"),
+            "list_oauth_tokens": lambda: store.list_oauth_tokens("github", f"user-{rng.randrange(args.rows // 10)}"),
+        }
+        before = measure(lookups, args.samples)
+        started = time.perf_counter()
+        migrate(store.engine)
+        migrate_seconds = time.perf_counter() - started
+        after = measure(lookups, args.samples)
+        report = {
+            "rows": {"comments": args.rows, "traces": args.rows // 2, "messages": args.rows // 2},
+            "populate_seconds": round(populate_seconds, 1),
+            "migrate_seconds": round(migrate_seconds, 1),
+            "schema_version": current_version(store.engine),
+            "lookups": {name: {"before": before[name], "after": after[name]} for name in lookups},
+        }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
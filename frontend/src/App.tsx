@@ -7,13 +7,14 @@ import ReviewSummary from "./components/ReviewSummary";
 import Sidebar from "./components/Sidebar";
 import {
   Comment,
-  ReviewStatus,
+  ReviewProjection,
   createReview,
   getComments,
   getFeedbackSummary,
   getAllPreferences,
   getPreferences,
   getReview,
+  getReviewDiff,
   getOAuthUrl,
   getSession,
   getMessages,
@@ -26,10 +27,12 @@ import {
 import { parseDiff } from "./utils/diff";
 
 const App = () => {
-  const [reviews, setReviews] = useState<ReviewStatus[]>([]);
+  const [reviews, setReviews] = useState<ReviewProjection[]>([]);
+  const [reviewsCursor, setReviewsCursor] = useState<string | null>(null);
   const [selectedReviewId, setSelectedReviewId] = useState<string | null>(null);
   const [comments, setComments] = useState<Comment[]>([]);
-  const [selectedReview, setSelectedReview] = useState<ReviewStatus | null>(null);
+  const [selectedReview, setSelectedReview] = useState<ReviewProjection | null>(null);
+  const [selectedDiff, setSelectedDiff] = useState("");
   const [diffText, setDiffText] = useState("");
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [repoPath, setRepoPath] = useState("");
@@ -53,13 +56,23 @@ const App = () => {
   const [sessionToken, setSessionToken] = useState<string | null>(null);
 
   const refreshReviews = async () => {
-    const data = await listReviews();
-    setReviews(data);
-    if (!selectedReviewId && data.length > 0) {
-      setSelectedReviewId(data[0].id);
+    const page = await listReviews({ fields: ["status", "created_at"] });
+    setReviews(page.items);
+    setReviewsCursor(page.next_cursor);
+    if (!selectedReviewId && page.items.length > 0) {
+      setSelectedReviewId(page.items[0].id);
     }
   };
 
+  const loadMoreReviews = async () => {
+    if (!reviewsCursor) {
+      return;
+    }
+    const page = await listReviews({ cursor: reviewsCursor, fields: ["status", "created_at"] });
+    setReviews((current) => [...current, ...page.items]);
+    setReviewsCursor(page.next_cursor);
+  };
+
   useEffect(() => {
     void refreshReviews();
   }, []);
@@ -68,12 +81,17 @@ const App = () => {
     if (!selectedReviewId) {
       setComments([]);
       setSelectedReview(null);
+      setSelectedDiff("");
       setFeedbackSummary({ up: 0, down: 0, neutral: 0 });
       setMessages([]);
       return;
     }
     void getComments(selectedReviewId).then(setComments);
     void getReview(selectedReviewId).then(setSelectedReview);
+    setSelectedDiff("");
+    void getReviewDiff(selectedReviewId)
+      .then((data) => setSelectedDiff(data.diff))
+      .catch(() => setSelectedDiff(""));
     void getFeedbackSummary(selectedReviewId).then(setFeedbackSummary);
     void getMessages(selectedReviewId).then(setMessages);
   }, [selectedReviewId]);
@@ -189,6 +207,7 @@ const App = () => {
     try {
       await resetStore();
       setReviews([]);
+      setReviewsCursor(null);
       setSelectedReviewId(null);
       setSelectedReview(null);
       setComments([]);
@@ -283,12 +302,18 @@ const App = () => {
       </header>
 
       <div className="layout">
-        <Sidebar reviews={reviews} selectedId={selectedReviewId} onSelect={setSelectedReviewId} />
+        <Sidebar
+          reviews={reviews}
+          selectedId={selectedReviewId}
+          onSelect={setSelectedReviewId}
+          hasMore={reviewsCursor !== null}
+          onLoadMore={loadMoreReviews}
+        />
         <main className="main">
           <ReviewDashboard reviews={reviews} />
           <div className="file-layout">
             <FileTree
-              files={parseDiff((selectedReview?.metadata?.diff as string) ?? "")}
+              files={parseDiff(selectedDiff)}
               selectedFile={selectedFile}
               onSelect={setSelectedFile}
             />
@@ -386,7 +411,7 @@ const App = () => {
             </div>
           </section>
           <DiffViewer
-            diffText={(selectedReview?.metadata?.diff as string) ?? ""}
+            diffText={selectedDiff}
             comments={comments}
             onFeedback={handleFeedback}
             selectedFile={selectedFile}
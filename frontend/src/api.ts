@@ -3,7 +3,22 @@ export type ReviewStatus = {
   status: string;
   created_at: string;
   updated_at: string;
-  metadata: Record<string, unknown>;
+  metadata?: Record<string, unknown>;
+};
+
+export type ReviewProjection = {
+  id: string;
+  status: string;
+  created_at?: string;
+  updated_at?: string;
+  repo?: string | null;
+  pr_url?: string | null;
+  lane?: string | null;
+  source?: string | null;
+  diff_lines?: number | null;
+  degraded?: boolean | null;
+  error?: string | null;
+  metadata?: Record<string, unknown>;
 };
 
 export type Comment = {
@@ -27,8 +42,28 @@ const request = async <T,>(path: string, init?: RequestInit): Promise<T> => {
   return (await response.json()) as T;
 };
 
-export const listReviews = async (): Promise<ReviewStatus[]> =>
-  request("/api/reviews");
+export type Page<T> = {
+  items: T[];
+  next_cursor: string | null;
+};
+
+export const listReviews = async (
+  params: {
+    cursor?: string | null;
+    status?: string;
+    repo?: string;
+    limit?: number;
+    fields?: string[];
+  } = {}
+): Promise<Page<ReviewProjection>> => {
+  const query = new URLSearchParams();
+  query.set("limit", String(params.limit ?? 50));
+  if (params.cursor) query.set("cursor", params.cursor);
+  if (params.status) query.set("status", params.status);
+  if (params.repo) query.set("repo", params.repo);
+  if (params.fields) query.set("fields", params.fields.join(","));
+  return request(`/api/reviews?${query.toString()}`);
+};
 
 export const createReview = async (diff: string): Promise<{ review: ReviewStatus }> =>
   request("/api/reviews", {
@@ -40,9 +75,12 @@ export const createReview = async (diff: string): Promise<{ review: ReviewStatus
 export const getComments = async (reviewId: string): Promise<Comment[]> =>
   request(`/api/reviews/${reviewId}/comments`);
 
-export const getReview = async (reviewId: string): Promise<ReviewStatus> =>
+export const getReview = async (reviewId: string): Promise<ReviewProjection> =>
   request(`/api/reviews/${reviewId}`);
 
+export const getReviewDiff = async (reviewId: string): Promise<{ diff: string }> =>
+  request(`/api/reviews/${reviewId}/diff`);
+
 export const indexRepo = async (repoPath: string, includeGlobs: string[]): Promise<{ count: number }> =>
   request("/api/rag/index/repo", {
     method: "POST",
@@ -2,9 +2,11 @@ type SidebarProps = {
   reviews: { id: string; status: string }[];
   selectedId: string | null;
   onSelect: (id: string) => void;
+  hasMore: boolean;
+  onLoadMore: () => void;
 };
 
-const Sidebar = ({ reviews, selectedId, onSelect }: SidebarProps) => {
+const Sidebar = ({ reviews, selectedId, onSelect, hasMore, onLoadMore }: SidebarProps) => {
   return (
     <aside className="sidebar">
       <div className="sidebar-card">
@@ -28,6 +30,11 @@ const Sidebar = ({ reviews, selectedId, onSelect }: SidebarProps) => {
             </button>
           ))
         )}
+        {hasMore && (
+          <button className="secondary" onClick={onLoadMore}>
+            Load more
+          </button>
+        )}
       </div>
     </aside>
   );
@@ -0,0 +1,11 @@
+import pytest
+
+from app.storage import InMemoryStore
+from app.storage_sql import SqlStore
+
+
+@pytest.fixture(params=["memory", "sql"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryStore()
+    return SqlStore(f"sqlite:///{tmp_path / 'reviews.db'}")
@@ -0,0 +1,163 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+from app import blobs
+from app import main
+from app.config import settings
+from app.queue import QueueFullError, ReviewJob, ReviewQueue
+from app.storage_async import AsyncStoreAdapter
+
+
+def _diff(index):
+    return f"diff --git a/f{index}.py b/f{index}.py\n--- a/f{index}.py\n+++ b/f{index}.py\n@@ -0,0 +1 @@\n+x = {index}\n"
+
+
+@pytest.fixture
+def api(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "use_celery", False)
+    monkeypatch.setattr(blobs, "_blob_store", blobs.FileBlobStore(str(tmp_path / "blobs")))
+    monkeypatch.setattr(main, "aio_store", AsyncStoreAdapter(store, offload=True))
+    return main
+
+
+async def _submit_all(api, count):
+    return await asyncio.gather(
+        *(api.enqueue_review(_diff(index), {"source": "api", "repo": f"org/repo{index}"}) for index in range(count)),
+        return_exceptions=True,
+    )
+
+
+def test_concurrent_submissions_respect_queue_bound(api):
+    queue = ReviewQueue(max_size=2, admission="reject")
+    api.app.state.queue = queue
+    results = asyncio.run(_submit_all(api, 10))
+    accepted = [result for result in results if not isinstance(result, BaseException)]
+    assert len(accepted) == 2
+    assert all(isinstance(result, QueueFullError) for result in results if result not in accepted)
+    assert queue.stats()["depth"] == 2
+    assert queue.stats()["reserved"] == 0
+
+
+def test_duplicate_submission_releases_its_slot(api):
+    queue = ReviewQueue(max_size=2, admission="reject")
+    api.app.state.queue = queue
+
+    async def scenario():
+        return await asyncio.gather(
+            *(api.enqueue_review(_diff(1), {"source": "api", "repo": "org/repo"}) for _ in range(2))
+        )
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert queue.stats()["depth"] == 1
+    assert queue.stats()["reserved"] == 0
+
+
+def test_redelivered_older_webhook_does_not_supersede_newer(api, store):
+    api.app.state.queue = ReviewQueue(max_size=10)
+    pr = {"source": "github", "repo": "org/repo", "pr_url": "https://github.com/org/repo/pull/1"}
+    older = {**pr, "commit_id": "a", "delivery_id": "1", "pr_updated_at": "2024-05-01T10:00:00+00:00"}
+    newer = {**pr, "commit_id": "b", "delivery_id": "2", "pr_updated_at": "2024-05-01T11:00:00+00:00"}
+
+    async def scenario():
+        first = await api.enqueue_review(_diff(1), older)
+        second = await api.enqueue_review(_diff(2), newer)
+        redelivered = await api.enqueue_review(_diff(1), older)
+        return first, second, redelivered
+
+    first, second, redelivered = asyncio.run(scenario())
+    assert store.get_status(first) == "superseded"
+    assert store.get_status(second) == "pending"
+    assert store.get_status(redelivered) == "superseded"
+    assert api.app.state.queue.stats()["depth"] == 1
+
+
+def test_duplicate_submission_does_not_shed(api, store):
+    queue = ReviewQueue(max_size=2, admission="shed")
+    api.app.state.queue = queue
+
+    async def scenario():
+        low = [
+            await api.enqueue_review(_diff(index), {"source": "github", "repo": f"org/low{index}"})
+            for index in range(2)
+        ]
+        await asyncio.gather(
+            *(api.enqueue_review(_diff(9), {"source": "api", "repo": "org/repo"}) for _ in range(4))
+        )
+        return low
+
+    low = asyncio.run(scenario())
+    assert sorted(store.get_status(review_id) for review_id in low) == ["failed", "pending"]
+    assert queue.stats()["shed"] == 1
+    assert queue.stats()["depth"] == 2
+
+
+def test_rejected_submission_can_be_retried(api, store):
+    queue = ReviewQueue(max_size=1, admission="reject")
+    api.app.state.queue = queue
+    metadata = {"source": "api", "repo": "org/repo"}
+
+    async def scenario():
+        await api.enqueue_review(_diff(1), metadata)
+        with pytest.raises(QueueFullError):
+            await api.enqueue_review(_diff(2), metadata)
+        queue.max_size = 2
+        return await api.enqueue_review(_diff(2), metadata)
+
+    retried = asyncio.run(scenario())
+    assert store.get_status(retried) == "pending"
+    assert queue.stats()["depth"] == 2
+
+
+def test_shedding_drops_the_lowest_priority_job_and_fails_its_review(api, store):
+    queue = ReviewQueue(max_size=1, admission="shed")
+    api.app.state.queue = queue
+
+    async def scenario():
+        small = await api.enqueue_review(_diff(1), {"source": "github", "repo": "org/repo"})
+        interactive = await api.enqueue_review(_diff(2), {"source": "api", "repo": "org/repo"})
+        with pytest.raises(QueueFullError):
+            await api.enqueue_review(_diff(3), {"source": "api", "repo": "org/repo"})
+        await asyncio.gather(*api._background_tasks)
+        return small, interactive
+
+    small, interactive = asyncio.run(scenario())
+    assert store.get_review(small).status == "failed"
+    assert "Shed by admission control" in store.get_review(small).metadata["error"]
+    assert store.get_status(interactive) == "pending"
+    assert queue.stats()["shed"] == 1
+    assert queue.stats()["depth"] == 1
+
+
+def test_reject_reports_retry_after(api):
+    queue = ReviewQueue(max_size=1, admission="reject", default_retry_after=7)
+    api.app.state.queue = queue
+
+    async def scenario():
+        await api.enqueue_review(_diff(1), {"source": "api", "repo": "org/repo"})
+        with pytest.raises(QueueFullError) as rejected:
+            await api.enqueue_review(_diff(2), {"source": "api", "repo": "org/repo"})
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.retry_after == 7
+    assert queue.stats()["rejected"] == 1
+
+
+def test_collapse_returns_the_queued_job():
+    async def scenario(admission):
+        queue = ReviewQueue(max_size=1, admission=admission)
+        job = ReviewJob(review_id=uuid4(), diff_ref="ref", dedupe_key="content:abc")
+        queue.make_room()
+        await queue.enqueue(job, reserved=True)
+        return job, queue.find_duplicate("content:abc"), queue.stats()
+
+    job, duplicate, stats = asyncio.run(scenario("collapse"))
+    assert duplicate == job.review_id
+    assert stats["collapsed"] == 1
+    _job, duplicate, _stats = asyncio.run(scenario("reject"))
+    assert duplicate is None
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+
+from app.autoscaler import QueueAutoscaler
+from app.queue import ReviewJob, ReviewQueue
+
+
+def _autoscaler(**kwargs):
+    return QueueAutoscaler(**{"min_workers": 1, "max_workers": 4, "cooldown_seconds": 10, "idle_rounds": 2, **kwargs})
+
+
+def test_backlog_scales_up_to_the_cap_unless_cpu_is_saturated():
+    assert _autoscaler().decide(1, depth=6, busy=1, oldest_wait=0, cpu=0.2, now=100) == (3, "backlog")
+    assert _autoscaler().decide(1, depth=50, busy=1, oldest_wait=0, cpu=0.2, now=100) == (4, "backlog")
+    assert _autoscaler().decide(1, depth=0, busy=1, oldest_wait=60, cpu=0.2, now=100) == (2, "backlog")
+    assert _autoscaler().decide(1, depth=6, busy=1, oldest_wait=0, cpu=0.95, now=100) == (1, "cpu saturated")
+
+
+def test_scale_down_needs_consecutive_idle_rounds_and_respects_cooldown():
+    autoscaler = _autoscaler()
+    assert autoscaler.observe(1, depth=6, busy=1, oldest_wait=0, cpu=None, now=100) == 3
+    assert autoscaler.observe(3, depth=0, busy=0, oldest_wait=0, cpu=None, now=105) == 3
+    assert autoscaler.observe(3, depth=0, busy=0, oldest_wait=0, cpu=None, now=111) == 3
+    assert autoscaler.observe(3, depth=0, busy=0, oldest_wait=0, cpu=None, now=112) == 2
+    assert [(event.from_workers, event.to_workers, event.reason) for event in autoscaler.events] == [
+        (1, 3, "backlog"),
+        (3, 2, "idle"),
+    ]
+
+
+def test_resize_retires_idle_workers_and_lets_busy_ones_finish(store):
+    reviews = [store.create_review({}) for _ in range(3)]
+    release = threading.Event()
+    started = []
+
+    def handler(job):
+        started.append(job.review_id)
+        release.wait(5)
+        store.mark_in_progress(job.review_id, lease_owner="queue", lease_seconds=60)
+        store.complete_review(job.review_id, lease_owner="queue")
+
+    async def wait_for(predicate):
+        deadline = time.monotonic() + 5
+        while not predicate():
+            assert time.monotonic() < deadline
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        queue = ReviewQueue(workers=1, max_workers=4)
+        await queue.start(handler)
+        assert queue.resize(3) == 3
+        assert queue.active_workers == 3
+        await queue.enqueue(ReviewJob(review_id=reviews[0].id, diff_ref="ref"))
+        await wait_for(lambda: started)
+        queue.resize(1)
+        await wait_for(lambda: len(queue.stats()["workers"]) == 1)
+        assert [worker["busy"] for worker in queue.stats()["workers"]] == [True]
+        for review in reviews[1:]:
+            await queue.enqueue(ReviewJob(review_id=review.id, diff_ref="ref"))
+        release.set()
+        await queue.stop(timeout=5)
+        return queue.resize(8)
+
+    assert asyncio.run(scenario()) == 4
+    assert all(store.get_status(review.id) == "completed" for review in reviews)
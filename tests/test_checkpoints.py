@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.agents.orchestrator import AgentOrchestrator
+from app.config import settings
+from app.pipeline import review as review_pipeline
+from app.pipeline.checkpoints import ReviewCheckpointer
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,1 +1,2 @@
+ import os
++password = "hunter2"
+"""
+
+
+def test_agent_checkpoints_survive_a_later_agent_failure(store, monkeypatch):
+    monkeypatch.setattr(settings, "llm_backend", "disabled")
+    monkeypatch.setattr(settings, "use_langgraph", False)
+    orchestrator = AgentOrchestrator()
+    first, failing = orchestrator.agents[0], orchestrator.agents[1]
+
+    def boom(changes, context):
+        raise RuntimeError("agent crashed")
+
+    monkeypatch.setattr(failing, "analyze", boom)
+    monkeypatch.setattr(review_pipeline, "AgentOrchestrator", lambda: orchestrator)
+    review = store.create_review({})
+    with pytest.raises(RuntimeError):
+        review_pipeline.run_review_pipeline(review.id, DIFF, checkpointer=ReviewCheckpointer(store, review.id))
+    stages = set(store.load_checkpoints(review.id))
+    assert f"agent:{first.id}" in stages
+    assert f"agent:{failing.id}" not in stages
+
+
+def test_prune_checkpoints_keeps_recent_and_active_reviews(store):
+    failed = store.create_review({})
+    running = store.create_review({})
+    store.mark_failed(failed.id, "boom")
+    store.mark_in_progress(running.id, lease_owner="a", lease_seconds=60)
+    for review in (failed, running):
+        store.save_checkpoint(review.id, "parse", b"x")
+    assert store.prune_checkpoints(datetime.utcnow() - timedelta(hours=1)) == 0
+    assert store.prune_checkpoints(datetime.utcnow() + timedelta(seconds=1)) == 1
+    assert store.load_checkpoints(failed.id) == {}
+    assert store.load_checkpoints(running.id) == {"parse": b"x"}
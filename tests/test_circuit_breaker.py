@@ -0,0 +1,109 @@
+import time
+from types import SimpleNamespace
+
+from app.agents import orchestrator as orchestrator_module
+from app.agents.orchestrator import AgentOrchestrator
+from app.circuit_breaker import CircuitBreaker
+from app.config import settings
+from app.pipeline.diff_parser import DiffChange
+
+
+def _breaker(cooldown=0.05):
+    return CircuitBreaker(latency_slo_ms=100, error_rate_threshold=0.5, window=4, min_samples=2, cooldown_seconds=cooldown)
+
+
+def _change(path):
+    return DiffChange(file_path=path, line_number=1, content="+x = 1", change_type="added")
+
+
+def _trip(breaker):
+    breaker.record(0.01, ok=False)
+    breaker.record(0.01, ok=False)
+    assert breaker.state == "open"
+
+
+def test_half_open_allows_one_probe_and_closes_on_success():
+    breaker = _breaker()
+    _trip(breaker)
+    assert not breaker.allow()
+    time.sleep(0.06)
+    probe = breaker.allow()
+    assert probe
+    assert not breaker.allow()
+    breaker.record(0.01, ok=True, permit=probe)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = _breaker()
+    _trip(breaker)
+    time.sleep(0.06)
+    probe = breaker.allow()
+    breaker.record(0.01, ok=False, permit=probe)
+    assert breaker.state == "open"
+    assert breaker.trips == 2
+    assert not breaker.allow()
+
+
+def test_lost_probe_is_replaced_after_cooldown():
+    breaker = _breaker()
+    _trip(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_only_the_probe_resolves_half_open():
+    breaker = _breaker()
+    admitted_before_trip = breaker.allow()
+    _trip(breaker)
+    time.sleep(0.06)
+    probe = breaker.allow()
+    breaker.record(0.01, ok=False, permit=admitted_before_trip)
+    breaker.record(0.01, ok=True)
+    assert breaker.state == "half_open"
+    breaker.record(0.01, ok=True, permit=probe)
+    assert breaker.state == "closed"
+
+
+def test_replaced_probe_reports_are_ignored():
+    breaker = _breaker()
+    _trip(breaker)
+    time.sleep(0.06)
+    lost = breaker.allow()
+    time.sleep(0.06)
+    probe = breaker.allow()
+    breaker.record(0.01, ok=True, permit=lost)
+    assert breaker.state == "half_open"
+    breaker.record(0.01, ok=False, permit=probe)
+    assert breaker.state == "open"
+
+
+def test_run_batch_sends_one_probe_per_half_open_window(monkeypatch):
+    breaker = _breaker()
+    _trip(breaker)
+    time.sleep(0.06)
+    monkeypatch.setattr(orchestrator_module, "llm_breaker", breaker)
+    monkeypatch.setattr(settings, "llm_backend", "local")
+    tiers = {"a.py": "small", "b.py": "large"}
+    monkeypatch.setattr(
+        orchestrator_module.router, "route", lambda changes: SimpleNamespace(tier=tiers[changes[0].file_path])
+    )
+    orchestrator = AgentOrchestrator()
+    probes = []
+
+    def run_llm_batch(items, permit):
+        probes.append(permit)
+        breaker.record(0.01, ok=False, permit=permit)
+        raise RuntimeError("still down")
+
+    monkeypatch.setattr(orchestrator, "_run_llm_batch", run_llm_batch)
+    results = orchestrator.run_batch([([_change("a.py")], ""), ([_change("b.py")], "")])
+    assert len(probes) == 1 and probes[0].probe
+    assert all(result.degraded for result in results)
+    assert breaker.state == "open"
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+from uuid import uuid4
+
+from app.durable_queue import DurableReviewQueue, SqliteJobJournal
+from app.queue import ReviewJob
+
+
+def _job():
+    return ReviewJob(review_id=uuid4(), diff_ref="ref", repo="org/repo")
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+def test_failing_job_is_retried_then_dead_lettered(tmp_path):
+    calls = []
+    dead = []
+
+    def handler(job):
+        calls.append(job.review_id)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        queue = DurableReviewQueue(
+            str(tmp_path / "jobs.db"), max_attempts=3, retry_backoff=0.01, on_dead=lambda job, error: dead.append(error)
+        )
+        await queue.start(handler)
+        await queue.enqueue(_job())
+        await _wait_for(lambda: dead)
+        stats = queue.stats()
+        await queue.stop(timeout=1)
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert len(calls) == 3
+    assert dead == ["boom"]
+    assert stats["retried"] == 2
+    assert stats["journal"] == {"dead": 1}
+
+
+def test_transient_failure_succeeds_on_retry(tmp_path):
+    calls = []
+
+    def handler(job):
+        calls.append(job.review_id)
+        if len(calls) == 1:
+            raise RuntimeError("flaky")
+
+    async def scenario():
+        queue = DurableReviewQueue(str(tmp_path / "jobs.db"), max_attempts=3, retry_backoff=0.01)
+        await queue.start(handler)
+        await queue.enqueue(_job())
+        await _wait_for(lambda: len(calls) == 2 and not queue.stats()["journal"])
+        stats = queue.stats()
+        await queue.stop(timeout=1)
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["retried"] == 1
+    assert stats["dead"] == 0
+
+
+def test_pending_jobs_are_recovered_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    job = _job()
+    journal = SqliteJobJournal(path)
+    journal.add(job)
+    journal.close()
+    handled = []
+
+    async def scenario():
+        queue = DurableReviewQueue(path)
+        await queue.start(lambda recovered: handled.append(recovered.review_id))
+        await _wait_for(lambda: handled)
+        stats = queue.stats()
+        await queue.stop(timeout=1)
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert handled == [job.review_id]
+    assert stats["recovered"] == 1
+
+
+def test_expired_lease_is_recovered(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    job = _job()
+    journal = SqliteJobJournal(path)
+    journal.add(job)
+    assert journal.lease(job.review_id, "dead-worker", visibility_timeout=-1) == 1
+    journal.close()
+    handled = []
+
+    async def scenario():
+        queue = DurableReviewQueue(path, max_attempts=3)
+        await queue.start(lambda recovered: handled.append(recovered.review_id))
+        await _wait_for(lambda: handled)
+        await queue.stop(timeout=1)
+
+    asyncio.run(scenario())
+    assert handled == [job.review_id]
+
+
+def test_expired_lease_on_final_attempt_is_dead_lettered(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    job = _job()
+    journal = SqliteJobJournal(path)
+    journal.add(job)
+    journal.lease(job.review_id, "dead-worker", visibility_timeout=-1)
+    journal.close()
+    dead = []
+
+    async def scenario():
+        queue = DurableReviewQueue(path, max_attempts=1, on_dead=lambda dead_job, error: dead.append(dead_job.review_id))
+        await queue.start(lambda _job: None)
+        await queue.stop(timeout=1)
+
+    asyncio.run(scenario())
+    assert dead == [job.review_id]
+
+
+def test_worker_cancelled_during_lease_hands_job_back(tmp_path):
+    handled = []
+    entered = threading.Event()
+    gate = threading.Event()
+
+    async def scenario():
+        queue = DurableReviewQueue(str(tmp_path / "jobs.db"), workers=1, max_workers=1)
+        lease = queue._journal.lease
+
+        def slow_lease(*args):
+            entered.set()
+            gate.wait(5)
+            return lease(*args)
+
+        queue._journal.lease = slow_lease
+        await queue.start(lambda job: handled.append(job.review_id))
+        job = _job()
+        await queue.enqueue(job)
+        await _wait_for(entered.is_set)
+        worker = next(iter(queue._worker_tasks.values()))
+        worker.cancel()
+        gate.set()
+        await asyncio.gather(worker, return_exceptions=True)
+        await _wait_for(lambda: queue.stats()["depth"] == 1)
+        assert queue._running_by_repo == {}
+        queue._spawn_worker()
+        await _wait_for(lambda: handled)
+        started = time.monotonic()
+        stats = queue.stats()
+        await queue.stop(timeout=5)
+        return job, stats, time.monotonic() - started
+
+    job, stats, stop_seconds = asyncio.run(scenario())
+    assert handled == [job.review_id]
+    assert stats["journal"] == {}
+    assert stop_seconds < 1
@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from uuid import uuid4
+
+from app.models import Comment, FeedbackEntry
+
+
+def _reviewed(store, repo, agents):
+    review = store.create_review({"repo": repo})
+    comments = [
+        Comment(review_id=review.id, agent_id=agent, file_path="a.py", line_number=1, severity="low", content="nit")
+        for agent in agents
+    ]
+    store.mark_in_progress(review.id, lease_owner="a", lease_seconds=60)
+    store.persist_review_result(review.id, comments, [], [], lease_owner="a")
+    return review, comments
+
+
+def _rate(store, comment, rating, day="2024-05-01"):
+    store.add_feedback(
+        FeedbackEntry(
+            id=uuid4(),
+            review_id=comment.review_id,
+            comment_id=comment.id,
+            rating=rating,
+            user_id="u",
+            created_at=datetime.fromisoformat(f"{day}T12:00:00"),
+        )
+    )
+
+
+def test_feedback_rolls_up_by_review_agent_repo_and_day(store):
+    review, (style, security) = _reviewed(store, "org/api", ["style", "security"])
+    other, (other_style,) = _reviewed(store, "org/web", ["style"])
+    _rate(store, style, 1)
+    _rate(store, style, -1)
+    _rate(store, security, 1, day="2024-05-02")
+    _rate(store, other_style, 0, day="2024-05-02")
+    assert store.feedback_summary(review.id) == {"up": 2, "down": 1, "neutral": 0}
+    assert store.feedback_summary(other.id) == {"up": 0, "down": 0, "neutral": 1}
+    assert store.feedback_rollup("agent", "style") == {"scope": "agent", "key": "style", "up": 1, "down": 1, "neutral": 1}
+    assert store.feedback_rollup("repo", "org/api")["up"] == 2
+    assert store.feedback_rollup("repo", "org/missing") is None
+    assert [rollup["key"] for rollup in store.list_feedback_rollups("day", 10)] == ["2024-05-02", "2024-05-01"]
+    assert [rollup["key"] for rollup in store.list_feedback_rollups("agent", 1)] == ["security"]
+    assert len(store.list_feedback(review.id)) == 3
+
+
+def test_concurrent_feedback_is_counted_once_each(store):
+    review, (comment,) = _reviewed(store, "org/api", ["style"])
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda rating: _rate(store, comment, rating), [1, -1] * 10))
+    assert store.feedback_summary(review.id) == {"up": 10, "down": 10, "neutral": 0}
+    assert store.feedback_rollup("agent", "style")["up"] == 10
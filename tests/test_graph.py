@@ -0,0 +1,65 @@
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from app.agents.base import AgentFinding
+from app.agents.orchestrator import AgentOrchestrator, OrchestratorResult
+from app.circuit_breaker import llm_breaker
+from app.config import settings
+from app.models import AgentTrace
+from app.orchestration.graph import run_graph
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,1 +1,2 @@
+ import os
++password = "hunter2"
+"""
+
+
+def _trace(agent_id):
+    return AgentTrace(
+        agent_id=agent_id,
+        started_at=datetime.utcnow(),
+        completed_at=datetime.utcnow(),
+        input_summary="",
+        output_summary="",
+    )
+
+
+def test_agents_run_as_one_batch_and_keep_llm_stats(monkeypatch):
+    orchestrator = AgentOrchestrator()
+    calls = []
+
+    def run(changes, context, agents=None, on_agent=None):
+        calls.append([agent.id for agent in agents])
+        finding = AgentFinding(
+            file_path="app.py", line_number=2, severity="high", category="security", description="secret", suggestion=""
+        )
+        return OrchestratorResult(
+            findings=[(agent.id, finding) for agent in agents],
+            traces=[_trace("router"), *(_trace(agent.id) for agent in agents)],
+            llm_stats={"speculative": {"generations": 3}},
+        )
+
+    monkeypatch.setattr(orchestrator, "run", run)
+    comments, traces, messages = run_graph(DIFF, uuid4(), orchestrator=orchestrator)
+    assert calls == [[agent.id for agent in orchestrator.agents]]
+    assert [trace.agent_id for trace in traces].count("router") == 1
+    assert [message.payload for message in messages if message.message_type == "speculative"] == [{"generations": 3}]
+    assert comments[0].metadata["agents"] == [agent.id for agent in orchestrator.agents]
+
+
+def test_degraded_reason_comes_from_the_breaker(monkeypatch):
+    monkeypatch.setattr(settings, "llm_backend", "local")
+    monkeypatch.setattr(llm_breaker, "state", "open")
+    monkeypatch.setattr(llm_breaker, "_opened_at", time.monotonic())
+    _comments, _traces, messages = run_graph(DIFF, uuid4(), orchestrator=AgentOrchestrator())
+    [degraded] = [message for message in messages if message.message_type == "degraded"]
+    assert degraded.payload["reason"] == "llm circuit open"
+    assert degraded.payload["breaker"]["state"] == "open"
@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.idempotency import review_keys
+
+DIFF = "diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n@@ -0,0 +1 @@\n+x = 1\n"
+METADATA = {"source": "github", "repo": "org/repo", "commit_id": "abc", "delivery_id": "42"}
+
+
+def test_repeated_submission_returns_the_first_review(store):
+    keys = review_keys(DIFF, METADATA)
+    first, created = store.claim_review(METADATA, keys)
+    again, created_again = store.claim_review(METADATA, keys)
+    assert created and not created_again
+    assert again.id == first.id
+    assert store.find_review_by_keys(keys).id == first.id
+
+
+def test_redelivery_matches_on_either_key(store):
+    first, _ = store.claim_review(METADATA, review_keys(DIFF, METADATA))
+    redelivered = {**METADATA, "delivery_id": "43"}
+    same_delivery = {**METADATA, "commit_id": "def"}
+    assert store.claim_review(redelivered, review_keys(DIFF, redelivered))[0].id == first.id
+    assert store.claim_review(same_delivery, review_keys(DIFF, same_delivery))[0].id == first.id
+
+
+def test_concurrent_claims_create_one_review(store):
+    keys = review_keys(DIFF, METADATA)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        claims = list(pool.map(lambda _: store.claim_review(METADATA, keys), range(8)))
+    assert sum(created for _, created in claims) == 1
+    assert len({review.id for review, _ in claims}) == 1
+
+
+def test_failed_review_releases_its_keys(store):
+    keys = review_keys(DIFF, METADATA)
+    first, _ = store.claim_review(METADATA, keys)
+    store.mark_failed(first.id, "boom")
+    retried, created = store.claim_review(METADATA, keys)
+    assert created
+    assert retried.id != first.id
+    assert store.find_review_by_keys(keys).id == retried.id
@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.leases import lease_owner
+from app.models import AgentMessage, Comment
+
+
+def _comment(review_id):
+    return Comment(review_id=review_id, agent_id="style", file_path="app.py", line_number=1, severity="low", content="nit")
+
+
+def test_mark_in_progress_claims_pending_once(store):
+    review = store.create_review({"repo": "org/repo"})
+    assert store.mark_in_progress(review.id, lease_owner="a", lease_seconds=60).status == "in_progress"
+    assert store.mark_in_progress(review.id, lease_owner="b", lease_seconds=60) is None
+    assert store.mark_in_progress(review.id, lease_owner="a", lease_seconds=60) is not None
+
+
+def test_expired_lease_can_be_taken_over(store):
+    review = store.create_review({})
+    store.mark_in_progress(review.id, lease_owner="a", lease_seconds=-1)
+    assert store.mark_in_progress(review.id, lease_owner="b", lease_seconds=60) is not None
+    assert store.complete_review(review.id, lease_owner="a") is None
+    assert store.complete_review(review.id, lease_owner="b").status == "completed"
+
+
+def test_complete_review_requires_lease_owner(store):
+    review = store.create_review({})
+    store.mark_in_progress(review.id, lease_owner="a", lease_seconds=60)
+    assert store.complete_review(review.id, lease_owner="b") is None
+    assert store.complete_review(review.id, lease_owner="a").status == "completed"
+    assert store.complete_review(review.id, lease_owner="a") is None
+    assert store.mark_in_progress(review.id, lease_owner="a", lease_seconds=60) is None
+
+
+def test_failed_review_can_be_claimed_again(store):
+    review = store.create_review({})
+    store.mark_in_progress(review.id, lease_owner="a", lease_seconds=60)
+    assert store.mark_failed(review.id, "boom", lease_owner="b") is None
+    assert store.mark_failed(review.id, "boom", lease_owner="a").status == "failed"
+    assert store.mark_in_progress(review.id, lease_owner="b", lease_seconds=60) is not None
+
+
+def test_persist_review_result_only_for_lease_owner(store):
+    review = store.create_review({})
+    store.mark_in_progress(review.id, lease_owner="a", lease_seconds=60)
+    message = AgentMessage(agent_id="style", message_type="result", timestamp=datetime.utcnow(), payload={})
+    assert store.persist_review_result(review.id, [_comment(review.id)], [], [message], lease_owner="b") is None
+    assert store.get_comments(review.id) == []
+    persisted = store.persist_review_result(
+        review.id, [_comment(review.id)], [], [message], {"degraded": True}, lease_owner="a"
+    )
+    assert persisted.status == "completed"
+    assert store.get_review(review.id).metadata["degraded"] is True
+    assert len(store.get_comments(review.id)) == 1
+    assert store.persist_review_result(review.id, [_comment(review.id)], [], [], lease_owner="a") is None
+
+
+def test_complete_reviews_skips_rows_held_by_another_owner(store):
+    mine = store.create_review({})
+    theirs = store.create_review({})
+    store.mark_in_progress(mine.id, lease_owner="a", lease_seconds=60)
+    store.mark_in_progress(theirs.id, lease_owner="b", lease_seconds=60)
+    completed = store.complete_reviews([(mine.id, [], [], [], {}), (theirs.id, [], [], [], {})], lease_owner="a")
+    assert [review.id for review in completed] == [mine.id]
+    assert store.get_review(theirs.id).status == "in_progress"
+
+
+def test_renew_lease_only_for_owner(store):
+    review = store.create_review({})
+    store.mark_in_progress(review.id, lease_owner="a", lease_seconds=60)
+    assert store.renew_lease(review.id, "a", 60)
+    assert not store.renew_lease(review.id, "b", 60)
+    store.complete_review(review.id, lease_owner="a")
+    assert not store.renew_lease(review.id, "a", 60)
+
+
+def test_lease_owner_is_unique_per_claim(store):
+    review = store.create_review({})
+    owners = [lease_owner() for _ in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        claims = list(
+            pool.map(lambda owner: store.mark_in_progress(review.id, lease_owner=owner, lease_seconds=60), owners)
+        )
+    assert len(set(owners)) == len(owners)
+    assert sum(claim is not None for claim in claims) == 1
@@ -0,0 +1,73 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, select, text
+
+from app.config import settings
+from app.db_models import DiffBlobModel, ReviewModel
+from app.migrations import LATEST_VERSION, applied_versions, current_version, migrate
+
+
+def _baseline_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    now = datetime(2024, 1, 1).isoformat(sep=" ")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE reviews (id VARCHAR(36) PRIMARY KEY, status VARCHAR(32) NOT NULL, "
+                "created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL, meta JSON)"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO reviews VALUES (:id, 'completed', :now, :now, :meta)"),
+            {"id": "r1", "now": now, "meta": json.dumps({"repo": "org/repo", "diff": "+added line\n"})},
+        )
+    return engine
+
+
+def test_migrate_upgrades_baseline_schema(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "diff_blob_backend", "db")
+    engine = _baseline_engine(tmp_path)
+    assert current_version(engine) == 0
+    assert migrate(engine) == list(range(1, LATEST_VERSION + 1))
+    assert current_version(engine) == LATEST_VERSION
+    columns = {column["name"] for column in inspect(engine).get_columns("reviews")}
+    assert {"pr_key", "repo", "lease_owner", "lease_expires_at"} <= columns
+    with engine.connect() as conn:
+        assert conn.execute(select(ReviewModel.repo).where(ReviewModel.id == "r1")).scalar_one() == "org/repo"
+    assert migrate(engine) == []
+
+
+def test_legacy_diffs_stay_inline_without_db_blobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "diff_blob_backend", "fs")
+    engine = _baseline_engine(tmp_path)
+    assert 5 not in migrate(engine)
+    assert 5 not in applied_versions(engine)
+    assert current_version(engine) == LATEST_VERSION
+    with engine.connect() as conn:
+        meta = conn.execute(select(ReviewModel.meta).where(ReviewModel.id == "r1")).scalar_one()
+    assert meta["diff"] == "+added line\n"
+
+
+def test_legacy_diffs_move_once_db_blobs_are_enabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "diff_blob_backend", "fs")
+    engine = _baseline_engine(tmp_path)
+    migrate(engine)
+    monkeypatch.setattr(settings, "diff_blob_backend", "db")
+    assert migrate(engine) == [5]
+    with engine.connect() as conn:
+        meta = conn.execute(select(ReviewModel.meta).where(ReviewModel.id == "r1")).scalar_one()
+    assert "diff" not in meta
+    assert migrate(engine) == []
+
+
+def test_legacy_diffs_move_to_db_blobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "diff_blob_backend", "db")
+    engine = _baseline_engine(tmp_path)
+    migrate(engine)
+    with engine.connect() as conn:
+        meta = conn.execute(select(ReviewModel.meta).where(ReviewModel.id == "r1")).scalar_one()
+        refs = conn.execute(select(DiffBlobModel.ref)).scalars().all()
+    assert "diff" not in meta
+    assert refs == [meta["diff_ref"]]
+    assert meta["diff_lines"] == 1
@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.db_models import ReviewModel
+from app.pagination import InvalidCursor, encode_cursor
+
+
+def _reviews_at(store, created_at, count):
+    reviews = [store.create_review({"repo": "org/repo"}) for _ in range(count)]
+    for review in reviews:
+        if hasattr(store, "engine"):
+            with store.engine.begin() as conn:
+                conn.execute(update(ReviewModel).where(ReviewModel.id == str(review.id)).values(created_at=created_at))
+        else:
+            review.created_at = created_at
+    return reviews
+
+
+def _walk(store, limit):
+    pages, cursor = [], None
+    while True:
+        items, cursor = store.page_reviews(limit, cursor=cursor)
+        pages.append([review.id for review in items])
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_ties_on_created_at(store):
+    reviews = _reviews_at(store, datetime(2024, 1, 2), 3) + _reviews_at(store, datetime(2024, 1, 1), 2)
+    pages = _walk(store, 2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    seen = [review_id for page in pages for review_id in page]
+    assert sorted(seen, key=str) == sorted((review.id for review in reviews), key=str)
+    newest = sorted((str(review.id) for review in reviews[:3]), reverse=True)
+    assert [str(review_id) for review_id in seen[:3]] == newest
+
+
+def test_exact_page_has_no_next_cursor(store):
+    _reviews_at(store, datetime(2024, 1, 1), 2)
+    items, cursor = store.page_reviews(2)
+    assert len(items) == 2
+    assert cursor is None
+
+
+def test_cursor_past_last_review_is_empty(store):
+    _reviews_at(store, datetime(2024, 1, 1), 1)
+    items, cursor = store.page_reviews(5, cursor=encode_cursor([datetime(2000, 1, 1).isoformat(), ""]))
+    assert items == []
+    assert cursor is None
+
+
+def test_malformed_cursor_is_rejected(store):
+    with pytest.raises(InvalidCursor):
+        store.page_reviews(5, cursor="not-a-cursor")
+    with pytest.raises(InvalidCursor):
+        store.page_reviews(5, cursor=encode_cursor(["2024-01-01T00:00:00"]))
+
+
+@pytest.mark.parametrize(
+    "values", [[1, "id"], ["2024-01-01T00:00:00", 7], ["yesterday", "id"], [None, None]]
+)
+def test_tampered_review_cursor_is_rejected(store, values):
+    with pytest.raises(InvalidCursor):
+        store.page_reviews(5, cursor=encode_cursor(values))
+
+
+@pytest.mark.parametrize("values", [["12"], [1.5], [True], [None]])
+def test_tampered_trace_cursor_is_rejected(store, values):
+    with pytest.raises(InvalidCursor):
+        store.page_traces_by_agent("style", 5, cursor=encode_cursor(values))
+
+
+def test_timezone_aware_cursor_is_accepted(store):
+    _reviews_at(store, datetime(2024, 1, 1), 2)
+    items, _cursor = store.page_reviews(5, cursor=encode_cursor(["2024-06-01T00:00:00+00:00", ""]))
+    assert len(items) == 2
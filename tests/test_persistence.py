@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from app import storage_sql
+from app.models import AgentMessage, AgentTrace, Comment
+
+
+def _result(review_id, count=2):
+    comments = [
+        Comment(review_id=review_id, agent_id="style", file_path="a.py", line_number=line, severity="low", content="nit")
+        for line in range(count)
+    ]
+    traces = [
+        AgentTrace(
+            agent_id="style",
+            started_at=datetime.utcnow(),
+            completed_at=datetime.utcnow(),
+            input_summary="1 diff changes",
+            output_summary=f"{count} findings",
+        )
+    ]
+    messages = [AgentMessage(agent_id="style", message_type="result", timestamp=datetime.utcnow(), payload={})]
+    return comments, traces, messages
+
+
+def test_persist_stores_the_whole_result_and_drops_checkpoints(store):
+    review = store.create_review({"repo": "org/repo"})
+    store.mark_in_progress(review.id, lease_owner="a", lease_seconds=60)
+    store.save_checkpoint(review.id, "parse", b"[]")
+    persisted = store.persist_review_result(review.id, *_result(review.id, count=3), {"degraded": True}, lease_owner="a")
+    assert persisted.status == "completed"
+    assert persisted.metadata == {"repo": "org/repo", "degraded": True}
+    assert len(store.get_comments(review.id)) == 3
+    assert len(store.get_traces(review.id)) == 1
+    assert len(store.get_messages(review.id)) == 1
+    assert store.load_checkpoints(review.id) == {}
+
+
+def test_complete_reviews_persists_a_batch(store):
+    reviews = [store.create_review({}) for _ in range(3)]
+    for review in reviews:
+        store.mark_in_progress(review.id, lease_owner="batch", lease_seconds=60)
+    completed = store.complete_reviews(
+        [(review.id, *_result(review.id, count=index + 1), {"batch_size": 3}) for index, review in enumerate(reviews)],
+        lease_owner="batch",
+    )
+    assert [review.id for review in completed] == [review.id for review in reviews]
+    assert [len(store.get_comments(review.id)) for review in reviews] == [1, 2, 3]
+    assert all(store.get_review(review.id).metadata["batch_size"] == 3 for review in reviews)
+
+
+def test_failed_persist_leaves_nothing_behind(store, monkeypatch):
+    if not isinstance(store, storage_sql.SqlStore):
+        pytest.skip("transaction rollback is specific to SqlStore")
+
+    def broken_rows(review_id, messages):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(storage_sql, "_message_rows", broken_rows)
+    review = store.create_review({})
+    store.mark_in_progress(review.id, lease_owner="a", lease_seconds=60)
+    with pytest.raises(RuntimeError):
+        store.persist_review_result(review.id, *_result(review.id), lease_owner="a")
+    assert store.get_status(review.id) == "in_progress"
+    assert store.get_comments(review.id) == []
+    assert store.get_traces(review.id) == []
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from uuid import uuid4
+
+import pytest
+
+from app import scheduling
+from app.config import settings
+from app.queue import ReviewJob, ReviewQueue
+
+
+def _job(name, lane="small", cost=0, waited=0.0, repo=""):
+    return ReviewJob(
+        review_id=uuid4(),
+        diff_ref=name,
+        priority=scheduling.LANE_PRIORITY[lane],
+        lane=lane,
+        cost=cost,
+        repo=repo,
+        enqueued_at=time.time() - waited,
+    )
+
+
+def _run_order(queue, jobs):
+    order = []
+
+    async def scenario():
+        for job in jobs:
+            await queue.enqueue(job)
+        await queue.start(lambda job: order.append(job.diff_ref))
+        await queue.stop(timeout=5)
+
+    asyncio.run(scenario())
+    return order
+
+
+def test_lanes_run_by_priority_then_shortest_job_first():
+    jobs = [
+        _job("large", lane="large", cost=5000),
+        _job("small-big", cost=300),
+        _job("interactive", lane="interactive", cost=900),
+        _job("small-tiny", cost=10),
+    ]
+    assert _run_order(ReviewQueue(), jobs) == ["interactive", "small-tiny", "small-big", "large"]
+
+
+def test_aging_promotes_a_job_that_waited_long_enough():
+    jobs = [_job("fresh-small", cost=10), _job("old-large", lane="large", cost=5000, waited=250)]
+    assert _run_order(ReviewQueue(aging_seconds=120), jobs) == ["old-large", "fresh-small"]
+    assert _run_order(ReviewQueue(aging_seconds=0), jobs) == ["fresh-small", "old-large"]
+
+
+def test_classify_picks_lane_by_source_and_size(monkeypatch):
+    monkeypatch.setattr(settings, "schedule_small_max_lines", 2)
+    small = "+a\n+b\n"
+    large = "+a\n+b\n+c\n"
+    assert scheduling.classify(large, {"source": "api"}) == "interactive"
+    assert scheduling.classify(small, {"source": "github"}) == "small"
+    assert scheduling.classify(large, {"source": "github"}) == "large"
+
+
+def test_submitted_review_records_its_lane(store, tmp_path, monkeypatch):
+    pytest.importorskip("chromadb")
+    from app import blobs, main
+    from app.storage_async import AsyncStoreAdapter
+
+    monkeypatch.setattr(settings, "use_celery", False)
+    monkeypatch.setattr(blobs, "_blob_store", blobs.FileBlobStore(str(tmp_path / "blobs")))
+    monkeypatch.setattr(main, "aio_store", AsyncStoreAdapter(store, offload=True))
+    queue = ReviewQueue()
+    main.app.state.queue = queue
+    diff = "diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n@@ -0,0 +1 @@\n+x = 1\n"
+    review_id = asyncio.run(main.enqueue_review(diff, {"source": "github", "repo": "org/repo"}))
+    review = store.get_review(review_id)
+    assert review.metadata["lane"] == "small"
+    assert review.metadata["diff_lines"] == 1
+    [job] = queue._pending
+    assert (job.lane, job.priority, job.cost) == ("small", scheduling.LANE_PRIORITY["small"], 1)
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.storage_async import AsyncSqlStore, AsyncStoreAdapter, build_async_store
+from app.storage_sql import SqlStore
+
+
+def _async_store(store):
+    if isinstance(store, SqlStore):
+        return build_async_store(store, store.engine.url.render_as_string(hide_password=False))
+    return AsyncStoreAdapter(store, offload=True)
+
+
+def test_async_store_shares_state_with_the_sync_store(store):
+    aio_store = _async_store(store)
+
+    async def scenario():
+        review, created = await aio_store.claim_review({"repo": "org/repo"}, ["content:abc"])
+        again, created_again = await aio_store.claim_review({"repo": "org/repo"}, ["content:abc"])
+        claimed = (await aio_store.mark_in_progress(review.id, lease_owner="a", lease_seconds=60)).status
+        contested = await asyncio.gather(
+            *(aio_store.mark_in_progress(review.id, lease_owner=f"b{index}", lease_seconds=60) for index in range(4))
+        )
+        completed = (await aio_store.complete_review(review.id, lease_owner="a")).status
+        await aio_store.dispose()
+        return review, created, again, created_again, claimed, contested, completed
+
+    review, created, again, created_again, claimed, contested, completed = asyncio.run(scenario())
+    assert created and not created_again and again.id == review.id
+    assert claimed == "in_progress"
+    assert contested == [None] * 4
+    assert completed == "completed"
+    assert store.get_status(review.id) == "completed"
+    assert store.find_review_by_keys(["content:abc"]).id == review.id
+
+
+def test_sqlite_gets_the_native_async_engine(store, monkeypatch):
+    if not isinstance(store, SqlStore):
+        pytest.skip("AsyncSqlStore needs a SQL database")
+    monkeypatch.setattr(settings, "database_async_url", "")
+    aio_store = _async_store(store)
+    assert isinstance(aio_store, AsyncSqlStore)
+    assert aio_store.engine.url.drivername == "sqlite+aiosqlite"
+    asyncio.run(aio_store.dispose())
+
+
+def test_missing_async_driver_falls_back_to_threads(store, monkeypatch):
+    if not isinstance(store, SqlStore):
+        pytest.skip("the fallback only applies to SQL databases")
+    monkeypatch.setattr(settings, "database_async_url", "")
+    monkeypatch.setattr("app.db.ASYNC_DRIVER_MODULES", {"aiosqlite": "module_that_is_not_installed"})
+    aio_store = _async_store(store)
+    assert isinstance(aio_store, AsyncStoreAdapter)
+    assert aio_store.offload and aio_store.store is store
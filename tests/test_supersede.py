@@ -0,0 +1,44 @@
+from app.idempotency import event_time
+
+PR = "https://github.com/org/repo/pull/1"
+
+
+def _review(store, updated_at=None):
+    return store.create_review({"pr_url": PR, "pr_updated_at": event_time(updated_at)})
+
+
+def test_newer_update_supersedes_older_reviews(store):
+    older = _review(store, "2024-05-01T10:00:00Z")
+    newer = _review(store, "2024-05-01T11:00:00Z")
+    assert store.supersede_pr_reviews(PR, newer.id) == [older.id]
+    assert store.get_status(older.id) == "superseded"
+    assert store.get_status(newer.id) == "pending"
+
+
+def test_late_older_update_supersedes_itself(store):
+    newer = _review(store, "2024-05-01T11:00:00Z")
+    older = _review(store, "2024-05-01T10:00:00Z")
+    assert store.supersede_pr_reviews(PR, older.id) == [older.id]
+    assert store.get_status(older.id) == "superseded"
+    assert store.get_status(newer.id) == "pending"
+
+
+def test_completed_newer_review_still_wins(store):
+    newer = _review(store, "2024-05-01T11:00:00Z")
+    store.mark_in_progress(newer.id, lease_owner="a", lease_seconds=60)
+    store.complete_review(newer.id, lease_owner="a")
+    older = _review(store, "2024-05-01T10:00:00Z")
+    assert store.supersede_pr_reviews(PR, older.id) == [older.id]
+
+
+def test_unordered_reviews_fall_back_to_arrival_order(store):
+    first = _review(store)
+    second = _review(store, "2024-05-01T10:00:00Z")
+    assert store.supersede_pr_reviews(PR, second.id) == [first.id]
+
+
+def test_event_time_normalizes_github_and_gitlab_formats():
+    assert event_time("2024-05-01T10:00:00Z") == event_time("2024-05-01 10:00:00 UTC")
+    assert event_time("2024-05-01T12:00:00+02:00") == "2024-05-01T10:00:00+00:00"
+    assert event_time("not a date") is None
+    assert event_time(None) is None
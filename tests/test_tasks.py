@@ -0,0 +1,184 @@
+import pytest
+
+from app import blobs, tasks, worker
+from app.config import settings
+
+
+def _diff(*names):
+    return "".join(
+        f"diff --git a/{name} b/{name}\n--- a/{name}\n+++ b/{name}\n@@ -0,0 +1 @@\n+x = 1\n" for name in names
+    )
+
+
+@pytest.fixture
+def celery_worker(store, tmp_path, monkeypatch):
+    monkeypatch.setitem(worker._resources, "store", store)
+    monkeypatch.setattr(blobs, "_blob_store", blobs.FileBlobStore(str(tmp_path / "blobs")))
+    monkeypatch.setattr(settings, "review_sharding", True)
+    monkeypatch.setattr(settings, "review_shard_max_lines", 1)
+    dispatched = []
+
+    def fake_chord(header):
+        shards = list(header)
+        return lambda body: dispatched.append((shards, body))
+
+    monkeypatch.setattr(tasks, "chord", fake_chord)
+    return dispatched
+
+
+def test_shard_dispatch_claims_review_with_a_lease(store, celery_worker):
+    review = store.create_review({})
+    diff_ref = blobs.diff_blobs().put(_diff("a.py", "b.py"))
+    tasks.process_review.run(str(review.id), diff_ref)
+    [(shards, body)] = celery_worker
+    owner = body.args[2]
+    assert len(shards) == 2
+    assert all(shard.args[3] == owner for shard in shards)
+    assert store.mark_in_progress(review.id, lease_owner="other", lease_seconds=60) is None
+    assert store.renew_lease(review.id, owner, 60)
+
+
+def test_finalize_only_settles_the_claim_it_was_dispatched_for(store, celery_worker):
+    review = store.create_review({})
+    store.mark_in_progress(review.id, lease_owner="stale", lease_seconds=-1)
+    store.mark_in_progress(review.id, lease_owner="current", lease_seconds=60)
+    failed = [{"index": 0, "error": "boom"}]
+    tasks.finalize_review.run(failed, str(review.id), "ref", "stale")
+    assert store.get_status(review.id) == "in_progress"
+    tasks.finalize_review.run(failed, str(review.id), "ref", "current")
+    assert store.get_status(review.id) == "failed"
+
+
+def test_shards_merge_into_one_completed_review(store, celery_worker, monkeypatch):
+    monkeypatch.setattr(settings, "llm_backend", "disabled")
+    monkeypatch.setattr(settings, "use_langgraph", False)
+    monkeypatch.setattr(tasks, "should_run_critic", lambda review_id: False)
+    review = store.create_review({})
+    tasks.process_review.run(str(review.id), blobs.diff_blobs().put(_diff("a.py", "b.py")))
+    [(shards, body)] = celery_worker
+    results = [tasks.review_shard.run(*shard.args) for shard in shards]
+    assert [result["index"] for result in results] == [0, 1]
+    tasks.finalize_review.run(results, *body.args)
+    assert store.get_status(review.id) == "completed"
+
+
+def test_malformed_diff_fails_the_review(store, celery_worker):
+    review = store.create_review({})
+    tasks.process_review.run(str(review.id), blobs.diff_blobs().put("diff --git a/a.py b/a.py\n@@ -1 +1 @@\n"))
+    assert celery_worker == []
+    assert store.get_review(review.id).metadata["error"].startswith("Malformed diff")
+
+
+def test_failed_dispatch_fails_the_review(store, celery_worker, monkeypatch):
+    def broken_chord(header):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(tasks, "chord", broken_chord)
+    review = store.create_review({})
+    tasks.process_review.run(str(review.id), blobs.diff_blobs().put(_diff("a.py", "b.py")))
+    assert store.get_review(review.id).metadata["error"] == "Dispatching shards failed: broker down"
+
+
+def test_failed_shards_are_recorded_on_the_review(store, celery_worker):
+    review = store.create_review({})
+    store.mark_in_progress(review.id, lease_owner="owner", lease_seconds=60)
+    results = [{"index": 0, "comments": []}, {"index": 1, "error": "timeout"}]
+    tasks.finalize_review.run(results, str(review.id), "ref", "owner")
+    failed = store.get_review(review.id)
+    assert failed.status == "failed"
+    assert failed.metadata["failed_shards"] == [{"index": 1, "error": "timeout"}]
+    assert failed.metadata["error"] == "1 of 2 shards failed"
+
+
+def test_finalize_error_fails_the_review(store, celery_worker, monkeypatch):
+    def broken_merge(review_id, results):
+        raise ValueError("bad shard payload")
+
+    monkeypatch.setattr(tasks, "merge_shard_results", broken_merge)
+    review = store.create_review({})
+    store.mark_in_progress(review.id, lease_owner="owner", lease_seconds=60)
+    tasks.finalize_review.run([{"index": 0}], str(review.id), "ref", "owner")
+    assert store.get_review(review.id).metadata["error"] == "Finalizing shards failed: bad shard payload"
+
+
+class FakeBatcher:
+    def __init__(self, items):
+        self.items = list(items)
+        self.acked = []
+
+    def take(self, limit):
+        taken, self.items = self.items[:limit], self.items[limit:]
+        return "batch-1", taken
+
+    def pending(self):
+        return len(self.items)
+
+    def ack(self, batch_id):
+        self.acked.append(batch_id)
+
+
+@pytest.fixture
+def batch_worker(store, monkeypatch):
+    monkeypatch.setitem(worker._resources, "store", store)
+    monkeypatch.setattr(settings, "review_batch_size", 8)
+    monkeypatch.setattr(tasks, "should_run_critic", lambda review_id: False)
+    monkeypatch.setattr(worker, "load_job_diff", lambda store, review_id, diff_ref: _diff("a.py"))
+
+    def install(reviews):
+        fake = FakeBatcher([(str(review.id), "ref") for review in reviews])
+        monkeypatch.setattr(tasks, "batcher", lambda: fake)
+        return fake
+
+    return install
+
+
+def test_batch_holds_leases_while_it_runs_and_completes_together(store, batch_worker, monkeypatch):
+    reviews = [store.create_review({}) for _ in range(3)]
+    fake = batch_worker(reviews)
+    contested = []
+
+    def run_batch(jobs, rag_index):
+        contested.extend(store.mark_in_progress(review_id, lease_owner="other", lease_seconds=60) for review_id, _ in jobs)
+        return [([], [], []) for _ in jobs]
+
+    monkeypatch.setattr(tasks, "run_review_batch", run_batch)
+    assert tasks.flush_review_batch.run() == 3
+    assert contested == [None, None, None]
+    assert fake.acked == ["batch-1"]
+    for review in reviews:
+        completed = store.get_review(review.id)
+        assert completed.status == "completed"
+        assert completed.metadata["batch_size"] == 3
+
+
+def test_batch_skips_reviews_leased_elsewhere(store, batch_worker, monkeypatch):
+    free, taken = store.create_review({}), store.create_review({})
+    store.mark_in_progress(taken.id, lease_owner="other", lease_seconds=60)
+    batch_worker([free, taken])
+    seen = []
+
+    def run_batch(jobs, rag_index):
+        seen.extend(review_id for review_id, _ in jobs)
+        return [([], [], []) for _ in jobs]
+
+    monkeypatch.setattr(tasks, "run_review_batch", run_batch)
+    assert tasks.flush_review_batch.run() == 1
+    assert seen == [free.id]
+    assert store.get_status(free.id) == "completed"
+    assert store.mark_in_progress(taken.id, lease_owner="third", lease_seconds=60) is None
+
+
+def test_failed_batch_falls_back_to_single_tasks(store, batch_worker, monkeypatch):
+    reviews = [store.create_review({}) for _ in range(2)]
+    fake = batch_worker(reviews)
+    resubmitted = []
+
+    def run_batch(jobs, rag_index):
+        raise RuntimeError("model crashed")
+
+    monkeypatch.setattr(tasks, "run_review_batch", run_batch)
+    monkeypatch.setattr(tasks.process_review, "delay", lambda review_id, diff_ref: resubmitted.append(review_id))
+    assert tasks.flush_review_batch.run() == 0
+    assert resubmitted == [str(review.id) for review in reviews]
+    assert fake.acked == ["batch-1"]
+    assert all(store.get_status(review.id) == "failed" for review in reviews)